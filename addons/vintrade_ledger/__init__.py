@@ -1,2 +1,9 @@
+from . import controllers
 from . import models
-from . import wizards
\ No newline at end of file
+from . import wizards
+
+
+def _post_init_rebuild(env):
+    """Build the maintained aggregates for data that predates the module."""
+    env["vin.wallet.balance"]._rebuild_all()
+    env["vin.ar.exposure"]._rebuild_all()
\ No newline at end of file
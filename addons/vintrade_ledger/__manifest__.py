@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     "name": "VIN Trade • Customer Ledger",
-    "version": "17.0.1.0.2",  # <-- bump
+    "version": "17.0.1.0.10",  # <-- bump
     "summary": "Customer credit limit, wallet balance, statements, and invoice guard",
     "author": "VIN Trade Inc.",
     "website": "",
@@ -10,12 +10,19 @@
     "depends": ["base", "mail", "contacts", "account", "vintrade_vehicle"],
     "data": [
         "security/ir.model.access.csv",
+        "security/ar_aging_security.xml",
+        "data/ir_cron_data.xml",
         "views/menu.xml",
         "views/partner_views.xml",
         "views/wallet_views.xml",
+        "views/ar_exposure_views.xml",
+        "views/ar_aging_views.xml",
+        "views/statement_run_views.xml",
         "wizards/statement_views.xml",
+        "wizards/ar_aging_wizard_views.xml",
         "reports/statement_templates.xml",
     ],
+    "post_init_hook": "_post_init_rebuild",
     "installable": True,
     "application": True,   # <-- make it show in Apps
 }
\ No newline at end of file
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import tempfile
+
+from werkzeug.wsgi import wrap_file
+
+from odoo import http
+from odoo.http import content_disposition, request
+
+from odoo.addons.vintrade_vehicle.tools.metrics import span, slow_threshold
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class VinLedgerController(http.Controller):
+
+    @http.route("/vintrade/statement/<int:wizard_id>/<string:fmt>", type="http", auth="user")
+    def statement_export(self, wizard_id, fmt):
+        if fmt not in EXPORT_MIMETYPES:
+            raise request.not_found()
+        wizard = request.env["vin.statement.wizard"].browse(wizard_id).exists()
+        if not wizard:
+            raise request.not_found()
+        wizard.check_access_rule("read")
+        # spool to disk so large statements never sit in memory, then stream the file
+        spool = tempfile.TemporaryFile()
+        with span(f"statement.export_{fmt}", request.env.cr, slow_ms=slow_threshold(request.env, "statement.export")):
+            wizard._export(fmt, spool)
+        size = spool.tell()
+        spool.seek(0)
+        return request.make_response(wrap_file(request.httprequest.environ, spool), headers=[
+            ("Content-Type", EXPORT_MIMETYPES[fmt]),
+            ("Content-Length", str(size)),
+            ("Content-Disposition", content_disposition(wizard._statement_filename(fmt))),
+        ])
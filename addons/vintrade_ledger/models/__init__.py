@@ -1,3 +1,10 @@
 from . import res_partner
 from . import wallet
+from . import wallet_checkpoint
+from . import wallet_allocation
+from . import ar_exposure
+from . import ar_aging
+from . import account_move
+from . import statement_engine
+from . import statement_run
 from . import vehicle_extend
\ No newline at end of file
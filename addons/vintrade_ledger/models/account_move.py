@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models
+
+
+class AccountMoveLine(models.Model):
+    _inherit = "account.move.line"
+
+    def _ar_exposure_keys(self):
+        return {
+            (line.partner_id.id, line.company_id.id)
+            for line in self
+            if line.partner_id and line.account_id.account_type == "asset_receivable"
+        }
+
+    def _ar_aging_keys(self):
+        return {
+            (line.company_id.id, line.date)
+            for line in self
+            if line.partner_id and line.account_id.account_type == "asset_receivable"
+        }
+
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def _post(self, soft=True):
+        posted = super()._post(soft)
+        self.env["vin.ar.exposure"]._refresh(posted.line_ids._ar_exposure_keys())
+        self.env["vin.ar.aging.snapshot"]._invalidate(posted.line_ids._ar_aging_keys())
+        return posted
+
+    def button_draft(self):
+        keys = self.line_ids._ar_exposure_keys()
+        aging_keys = self.line_ids._ar_aging_keys()
+        res = super().button_draft()
+        self._release_wallet_allocations()
+        self.env["vin.ar.exposure"]._refresh(keys)
+        self.env["vin.ar.aging.snapshot"]._invalidate(aging_keys)
+        return res
+
+    def button_cancel(self):
+        keys = self.line_ids._ar_exposure_keys()
+        aging_keys = self.line_ids._ar_aging_keys()
+        res = super().button_cancel()
+        self._release_wallet_allocations()
+        self.env["vin.ar.exposure"]._refresh(keys)
+        self.env["vin.ar.aging.snapshot"]._invalidate(aging_keys)
+        return res
+
+    def _release_wallet_allocations(self):
+        # wallet credit allocated to invoices that no longer need it goes back to the wallet
+        invoices = self.filtered(lambda move: move.move_type == "out_invoice")
+        if invoices:
+            self.env["vin.wallet.allocation"].sudo()._release(invoices.ids)
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = "account.partial.reconcile"
+
+    def _ar_aging_keys(self):
+        lines = self.debit_move_id | self.credit_move_id
+        if not lines._ar_exposure_keys():
+            return set()
+        return {(partial.company_id.id, partial.max_date) for partial in self}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        lines = partials.debit_move_id | partials.credit_move_id
+        lines.move_id._release_wallet_allocations()
+        self.env["vin.ar.exposure"]._refresh(lines._ar_exposure_keys())
+        self.env["vin.ar.aging.snapshot"]._invalidate(partials._ar_aging_keys())
+        return partials
+
+    def unlink(self):
+        keys = (self.debit_move_id | self.credit_move_id)._ar_exposure_keys()
+        aging_keys = self._ar_aging_keys()
+        res = super().unlink()
+        self.env["vin.ar.exposure"]._refresh(keys)
+        self.env["vin.ar.aging.snapshot"]._invalidate(aging_keys)
+        return res
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models
+
+from odoo.addons.vintrade_vehicle.tools.metrics import traced
+
+from .wallet_allocation import ALLOCATION_MOVES, allocated_share
+
+_logger = logging.getLogger(__name__)
+
+# Receivable open at the end of ``as_of`` and its age in days past due, per line.
+# amount_residual is today's residual: reconciliations dated after as_of are added back.
+# Wallet credit allocated to an invoice by then is taken off its lines, oldest first.
+_AGING_SELECT = f"""
+    WITH late AS (
+            SELECT debit_move_id AS line_id, amount AS delta
+              FROM account_partial_reconcile
+             WHERE company_id = %(company)s AND max_date > %(as_of)s
+             UNION ALL
+            SELECT credit_move_id, -amount
+              FROM account_partial_reconcile
+             WHERE company_id = %(company)s AND max_date > %(as_of)s
+    ), late_sum AS (
+            SELECT line_id, SUM(delta) AS delta FROM late GROUP BY line_id
+    ), open_lines AS (
+            SELECT aml.id, aml.move_id, aml.partner_id,
+                   %(as_of)s::date - COALESCE(aml.date_maturity, aml.date) AS age,
+                   aml.amount_residual + COALESCE(ls.delta, 0) AS residual
+              FROM account_move_line aml
+              JOIN account_account acc ON acc.id = aml.account_id
+         LEFT JOIN late_sum ls ON ls.line_id = aml.id
+             WHERE acc.account_type = 'asset_receivable'
+               AND aml.parent_state = 'posted'
+               AND aml.partner_id IS NOT NULL
+               AND aml.company_id = %(company)s
+               AND aml.date <= %(as_of)s
+               AND (aml.amount_residual <> 0 OR ls.line_id IS NOT NULL)
+    ), allocated AS (
+            SELECT w.move_id, -SUM(w.amount) AS amount
+              FROM ({ALLOCATION_MOVES}) w
+              JOIN account_move m ON m.id = w.move_id AND m.move_type = 'out_invoice'
+             WHERE w.company_id = %(company)s AND w.date <= %(as_of)s
+          GROUP BY w.move_id
+    ), netted AS (
+            SELECT o.partner_id, o.age,
+                   o.residual - {allocated_share("o.residual", "a.amount", "o.move_id", "o.age DESC, o.id")} AS residual
+              FROM open_lines o
+         LEFT JOIN allocated a ON a.move_id = o.move_id
+    )
+    SELECT o.partner_id,
+           COALESCE(SUM(o.residual) FILTER (WHERE o.age <= 30), 0),
+           COALESCE(SUM(o.residual) FILTER (WHERE o.age BETWEEN 31 AND 60), 0),
+           COALESCE(SUM(o.residual) FILTER (WHERE o.age BETWEEN 61 AND 90), 0),
+           COALESCE(SUM(o.residual) FILTER (WHERE o.age > 90), 0),
+           SUM(o.residual)
+      FROM netted o
+  GROUP BY o.partner_id
+    HAVING SUM(o.residual) <> 0
+"""
+
+
+class ArAgingSnapshot(models.Model):
+    """Aging of every customer of a company at a date, computed once and reused.
+
+    Posting, resetting, cancelling or reconciling receivables, and wallet
+    moves, mark the snapshots on or after the affected date stale; the next
+    read recomputes. Credit limits and holds are read from the customer.
+    """
+    _name = "vin.ar.aging.snapshot"
+    _description = "Receivable Aging Snapshot"
+    _order = "as_of desc, id desc"
+    _rec_name = "as_of"
+
+    company_id = fields.Many2one("res.company", required=True, readonly=True, ondelete="cascade")
+    as_of = fields.Date("As of", required=True, readonly=True)
+    computed_at = fields.Datetime("Computed at", readonly=True)
+    stale = fields.Boolean("Stale", readonly=True)
+    line_ids = fields.One2many("vin.ar.aging", "snapshot_id", string="Customers", readonly=True)
+
+    _sql_constraints = [
+        ("company_date_unique", "unique(company_id, as_of)", "One aging snapshot per company and date."),
+    ]
+
+    @api.model
+    def _get(self, company, as_of):
+        """The up-to-date snapshot of ``company`` at ``as_of``, computed if missing or stale."""
+        self.env.cr.execute("""
+            INSERT INTO vin_ar_aging_snapshot (company_id, as_of, stale, create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, TRUE, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+            ON CONFLICT (company_id, as_of) DO NOTHING
+        """, (company.id, as_of, self.env.uid, self.env.uid))
+        self.env.cr.execute(
+            "SELECT id FROM vin_ar_aging_snapshot WHERE company_id = %s AND as_of = %s FOR UPDATE",
+            (company.id, as_of))
+        snapshot = self.browse(self.env.cr.fetchone()[0])
+        if snapshot.stale:
+            snapshot._recompute()
+        return snapshot
+
+    @traced("ar_aging.compute")
+    def _recompute(self):
+        """Replace the rows of this snapshot with one grouped pass over the receivable lines."""
+        self.ensure_one()
+        self.env["account.move.line"].flush_model(
+            ["partner_id", "company_id", "account_id", "amount_residual", "parent_state", "date", "date_maturity"])
+        self.env["account.partial.reconcile"].flush_model(["debit_move_id", "credit_move_id", "amount", "max_date"])
+        self.env["vin.wallet.move"].flush_model(["partner_id", "company_id", "move_id", "date", "amount"])
+        self.env["account.move"].flush_model(["move_type"])
+        self.env.cr.execute(_AGING_SELECT, {"company": self.company_id.id, "as_of": self.as_of})
+        rows = self.env.cr.fetchall()
+        wallets = self.env["vin.wallet.move"]._balances({(row[0], self.company_id.id) for row in rows}, self.as_of)
+
+        self.env.cr.execute("DELETE FROM vin_ar_aging WHERE snapshot_id = %s", (self.id,))
+        if rows:
+            execute_values(self.env.cr._obj, """
+                INSERT INTO vin_ar_aging
+                       (snapshot_id, company_id, as_of, partner_id, amount_0_30, amount_31_60, amount_61_90,
+                        amount_90_plus, total, wallet_balance)
+                VALUES %s
+            """, [
+                (self.id, self.company_id.id, self.as_of, *row, wallets.get((row[0], self.company_id.id), 0.0))
+                for row in rows
+            ], page_size=1000)
+        self.env["vin.ar.aging"].invalidate_model()
+        self.write({"stale": False, "computed_at": fields.Datetime.now()})
+        _logger.info("AR aging of %s at %s: %s customers", self.company_id.name, self.as_of, len(rows))
+
+    @api.model
+    def _invalidate(self, keys):
+        """Mark stale the snapshots affected by receivable changes dated ``(company_id, date)``."""
+        oldest = {}
+        for company_id, date in keys:
+            if company_id and date and (company_id not in oldest or date < oldest[company_id]):
+                oldest[company_id] = date
+        if not oldest:
+            return
+        self.flush_model(["stale"])
+        execute_values(self.env.cr._obj, """
+            UPDATE vin_ar_aging_snapshot s SET stale = TRUE
+              FROM (VALUES %s) AS k (company_id, date)
+             WHERE s.company_id = k.company_id AND s.as_of >= k.date AND NOT s.stale
+        """, list(oldest.items()), template="(%s::int, %s::date)")
+        self.invalidate_model(["stale"])
+
+    @api.model
+    def _gc_snapshots(self):
+        """Drop snapshots nobody has recomputed for a month; they are rebuilt on demand."""
+        self.search([("computed_at", "<", fields.Datetime.now() - timedelta(days=30))]).unlink()
+
+
+class ArAging(models.Model):
+    """One customer's open receivable by age bucket, within an aging snapshot."""
+    _name = "vin.ar.aging"
+    _description = "Receivable Aging"
+    _order = "total desc, id"
+    _rec_name = "partner_id"
+    _log_access = False
+
+    snapshot_id = fields.Many2one("vin.ar.aging.snapshot", required=True, index=True, readonly=True,
+                                  ondelete="cascade")
+    company_id = fields.Many2one("res.company", readonly=True)
+    currency_id = fields.Many2one(related="company_id.currency_id", store=False, readonly=True)
+    as_of = fields.Date("As of", readonly=True)
+    partner_id = fields.Many2one("res.partner", string="Customer", readonly=True)
+    amount_0_30 = fields.Monetary("0-30", currency_field="currency_id", readonly=True,
+                                  help="Not yet due or up to 30 days past due.")
+    amount_31_60 = fields.Monetary("31-60", currency_field="currency_id", readonly=True)
+    amount_61_90 = fields.Monetary("61-90", currency_field="currency_id", readonly=True)
+    amount_90_plus = fields.Monetary("90+", currency_field="currency_id", readonly=True)
+    total = fields.Monetary("Total", currency_field="currency_id", readonly=True)
+    credit_limit = fields.Monetary(related="partner_id.credit_limit", currency_field="currency_id")
+    wallet_balance = fields.Monetary("Wallet", currency_field="currency_id", readonly=True)
+    on_hold = fields.Boolean(related="partner_id.on_hold")
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, fields, models
+
+from .wallet_allocation import ALLOCATED_OPEN_SELECT
+
+_logger = logging.getLogger(__name__)
+
+# Open receivable amount per (partner, company): residual of posted receivable lines.
+# The wallet credit allocated to open invoices is subtracted on top (see _net).
+_EXPOSURE_SELECT = """
+    SELECT aml.partner_id, aml.company_id, COALESCE(SUM(aml.amount_residual), 0)
+      FROM account_move_line aml
+      JOIN account_account acc ON acc.id = aml.account_id
+     WHERE acc.account_type = 'asset_receivable'
+       AND aml.parent_state = 'posted'
+       AND aml.partner_id IS NOT NULL
+"""
+
+
+class ArExposure(models.Model):
+    _name = "vin.ar.exposure"
+    _description = "Customer Receivable Exposure"
+    _rec_name = "partner_id"
+    _order = "amount desc"
+
+    partner_id = fields.Many2one("res.partner", required=True, index=True, readonly=True, ondelete="cascade")
+    company_id = fields.Many2one("res.company", required=True, readonly=True, ondelete="cascade")
+    currency_id = fields.Many2one(related="company_id.currency_id", store=False, readonly=True)
+    amount = fields.Monetary("Open Receivable", currency_field="currency_id", readonly=True)
+
+    _sql_constraints = [
+        ("partner_company_unique", "unique(partner_id, company_id)", "One exposure row per customer and company."),
+    ]
+
+    @api.model
+    def _get_amount(self, partner, company):
+        self.env.cr.execute(
+            "SELECT amount FROM vin_ar_exposure WHERE partner_id = %s AND company_id = %s",
+            (partner.id, company.id),
+        )
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0.0
+
+    def _flush_lines(self):
+        self.env["account.move.line"].flush_model(
+            ["partner_id", "company_id", "account_id", "amount_residual", "parent_state"])
+        self.env["account.move"].flush_model(["move_type", "state", "amount_residual_signed"])
+        self.env["vin.wallet.move"].flush_model(["partner_id", "company_id", "move_id", "amount"])
+
+    def _upsert(self, query, params):
+        self.env.cr.execute(f"""
+            INSERT INTO vin_ar_exposure (partner_id, company_id, amount, create_uid, create_date, write_uid, write_date)
+            SELECT partner_id, company_id, amount, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+              FROM ({query}) AS src(partner_id, company_id, amount)
+            ON CONFLICT (partner_id, company_id) DO UPDATE
+               SET amount = EXCLUDED.amount, write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+        """, (self.env.uid, self.env.uid, *params))
+        self.invalidate_model()
+
+    def _net(self, gross, keys_filter=""):
+        """Exposure query: ``gross`` ``(partner_id, company_id, amount)`` rows minus the open allocations."""
+        return f"""
+            SELECT COALESCE(g.partner_id, al.partner_id), COALESCE(g.company_id, al.company_id),
+                   COALESCE(g.amount, 0) - COALESCE(al.amount, 0)
+              FROM ({gross}) AS g(partner_id, company_id, amount)
+         FULL JOIN (SELECT * FROM ({ALLOCATED_OPEN_SELECT}) x {keys_filter}) al
+                ON al.partner_id = g.partner_id AND al.company_id = g.company_id
+        """
+
+    @api.model
+    def _refresh(self, keys):
+        """Recompute the exposure of the given ``(partner_id, company_id)`` pairs."""
+        keys = {key for key in keys if all(key)}
+        if not keys:
+            return
+        self._flush_lines()
+        partner_ids, company_ids = zip(*keys)
+        self._upsert(self._net(f"""
+            SELECT k.partner_id, k.company_id, COALESCE(x.amount, 0)
+              FROM unnest(%s::int[], %s::int[]) AS k(partner_id, company_id)
+         LEFT JOIN ({_EXPOSURE_SELECT}
+                       AND (aml.partner_id, aml.company_id) IN (SELECT * FROM unnest(%s::int[], %s::int[]))
+                  GROUP BY aml.partner_id, aml.company_id) AS x(partner_id, company_id, amount)
+                ON x.partner_id = k.partner_id AND x.company_id = k.company_id
+        """, "WHERE (x.partner_id, x.company_id) IN (SELECT * FROM unnest(%s::int[], %s::int[]))"),
+            (list(partner_ids), list(company_ids)) * 3)
+
+    @api.model
+    def _rebuild_all(self):
+        """Rebuild the whole table from the journal items and the wallet allocations."""
+        self._flush_lines()
+        self.env.cr.execute("DELETE FROM vin_ar_exposure")
+        self._upsert(self._net(f"{_EXPOSURE_SELECT} GROUP BY aml.partner_id, aml.company_id"), ())
+        _logger.info("AR exposure rebuilt")
+
+    @api.model
+    def _cron_update_on_hold(self):
+        """Re-evaluate the automatic credit hold of every customer in one set-based pass.
+
+        Customers whose open receivable (net of the wallet credit allocated to
+        open invoices) minus wallet balance exceeds their credit limit in
+        any company are put on hold; automatic holds are lifted once they are back
+        under it. Holds set by hand are left alone.
+        """
+        self.env["res.partner"].flush_model(["credit_limit", "on_hold", "on_hold_auto"])
+        self.env["vin.wallet.balance"].flush_model()
+        self.env.cr.execute("""
+            CREATE TEMPORARY TABLE vin_over_limit ON COMMIT DROP AS
+            SELECT DISTINCT e.partner_id
+              FROM vin_ar_exposure e
+              JOIN res_partner p ON p.id = e.partner_id
+         LEFT JOIN vin_wallet_balance w ON w.partner_id = e.partner_id AND w.company_id = e.company_id
+             WHERE p.credit_limit > 0
+               AND e.amount - COALESCE(w.balance, 0) > p.credit_limit
+        """)
+        self.env.cr.execute("""
+            UPDATE res_partner SET on_hold = TRUE, on_hold_auto = TRUE
+             WHERE id IN (SELECT partner_id FROM vin_over_limit) AND NOT COALESCE(on_hold, FALSE)
+        """)
+        held = self.env.cr.rowcount
+        self.env.cr.execute("""
+            UPDATE res_partner SET on_hold = FALSE, on_hold_auto = FALSE
+             WHERE on_hold_auto AND id NOT IN (SELECT partner_id FROM vin_over_limit)
+        """)
+        released = self.env.cr.rowcount
+        self.env.cr.execute("DROP TABLE vin_over_limit")
+        self.env["res.partner"].invalidate_model(["on_hold", "on_hold_auto"])
+        _logger.info("Credit holds re-evaluated: %s placed, %s released", held, released)
+
+    def action_rebuild(self):
+        self._rebuild_all()
+        return {"type": "ir.actions.client", "tag": "reload"}
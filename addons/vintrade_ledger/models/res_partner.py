@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 from odoo import api, fields, models, _
+from odoo.tools import SQL
 from odoo.tools.misc import frozendict
 
+from odoo.addons.vintrade_vehicle.tools.metrics import traced
+
 
 class ResPartner(models.Model):
-    _inherit = "res.partner"
+    _name = "res.partner"
+    _inherit = ["res.partner", "vin.related.count.mixin"]
 
     credit_limit = fields.Monetary(
         string="Credit Limit",
@@ -15,12 +19,19 @@ class ResPartner(models.Model):
         string="On Hold",
         help="If checked, new customer invoices are blocked."
     )
+    on_hold_auto = fields.Boolean(
+        string="Held Automatically",
+        readonly=True,
+        help="Set when the nightly credit check put this customer on hold; such holds are lifted automatically."
+    )
     wallet_balance = fields.Monetary(
         string="Wallet Balance",
-        currency_field="company_currency_id",
+        currency_field="wallet_currency_id",
         compute="_compute_wallet_balance",
-        help="Sum of wallet entries for this customer (per company)."
+        help="Sum of wallet entries for this customer in its company (the current company for shared contacts)."
     )
+    wallet_currency_id = fields.Many2one("res.currency", compute="_compute_wallet_balance")
+    wallet_balance_ids = fields.One2many("vin.wallet.balance", "partner_id", string="Wallet Balances")
     company_currency_id = fields.Many2one(
         "res.currency",
         related="company_id.currency_id",
@@ -31,24 +42,57 @@ class ResPartner(models.Model):
 
     wallet_move_count = fields.Integer(compute="_compute_wallet_move_count")
 
+    @api.depends("company_id", "wallet_balance_ids.balance")
+    @api.depends_context("company")
+    @traced("wallet.balance_compute")
     def _compute_wallet_balance(self):
+        # one company per partner, so the amount is never a sum over currencies
         for partner in self:
-            amount = 0.0
-            Wallet = self.env["vin.wallet.move"].with_context(
-                company_id=partner.company_id.id
-            )
-            amount = sum(Wallet.search([
-                ("partner_id", "=", partner.id),
-                ("company_id", "=", partner.company_id.id),
-            ]).mapped("amount"))
-            partner.wallet_balance = amount
+            company = partner.company_id or self.env.company
+            balances = partner.wallet_balance_ids.filtered(lambda b: b.company_id == company)
+            partner.wallet_balance = sum(balances.mapped("balance"))
+            partner.wallet_currency_id = company.currency_id
+
+    def _order_field_to_sql(self, alias, field_name, direction, nulls, query):
+        if field_name != "wallet_balance":
+            return super()._order_field_to_sql(alias, field_name, direction, nulls, query)
+        # sort on the maintained balance of the partner's company, as computed above
+        balance_alias = query.make_alias(alias, "wallet_balance")
+        query.add_join("LEFT JOIN", balance_alias, "vin_wallet_balance", SQL(
+            "%s = %s AND %s = COALESCE(%s, %s)",
+            SQL.identifier(balance_alias, "partner_id"), SQL.identifier(alias, "id"),
+            SQL.identifier(balance_alias, "company_id"), SQL.identifier(alias, "company_id"), self.env.company.id,
+        ))
+        balance = SQL(
+            "COALESCE(%s, 0)", SQL.identifier(balance_alias, "balance"),
+            to_flush=self.env["vin.wallet.balance"]._fields["balance"],
+        )
+        return SQL("%s %s %s", balance, direction, nulls)
+
+    def _get_wallet_balance(self, company, as_of=None):
+        """Wallet balance of this customer in ``company``, read from the maintained aggregate.
+
+        With ``as_of``, the balance at the end of that date, from the wallet checkpoints.
+        """
+        self.ensure_one()
+        if as_of:
+            return self.env["vin.wallet.move"]._balances({(self.id, company.id)}, as_of).get((self.id, company.id), 0.0)
+        return sum(self.wallet_balance_ids.filtered(lambda b: b.company_id == company).mapped("balance"))
 
     def _compute_wallet_move_count(self):
+        counts = self._get_related_counts("vin.wallet.move", "partner_id", groupby="company_id")
+        totals = {}
+        companies = {p.id: p.company_id.id for p in self}
+        for (partner_id, company_id), count in counts.items():
+            if not companies.get(partner_id) or companies[partner_id] == company_id:
+                totals[partner_id] = totals.get(partner_id, 0) + count
         for p in self:
-            p.wallet_move_count = self.env["vin.wallet.move"].search_count([
-                ("partner_id", "=", p.id),
-                ("company_id", "=", p.company_id.id),
-            ])
+            p.wallet_move_count = totals.get(p.id, 0)
+
+    def write(self, vals):
+        if "on_hold" in vals and "on_hold_auto" not in vals:
+            vals = dict(vals, on_hold_auto=False)
+        return super().write(vals)
 
     def action_open_wallet(self):
         self.ensure_one()
@@ -76,4 +120,25 @@ class ResPartner(models.Model):
                 "default_partner_id": self.id,
                 "default_company_id": self.company_id.id,
             },
+        }
+
+    def action_allocate_wallet(self):
+        moves, amount = self.env["vin.wallet.allocation"]._allocate(partner_ids=self.ids)
+        return {
+            "type": "ir.actions.client", "tag": "display_notification",
+            "params": {"title": _("Wallet allocation"),
+                       "message": _("%(moves)s invoices received %(amount).2f of wallet credit.",
+                                    moves=moves, amount=amount),
+                       "type": "success", "sticky": False},
+        }
+
+    def action_open_statement_run(self):
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Statement Run"),
+            "res_model": "vin.statement.run",
+            "view_mode": "form",
+            "context": {
+                "default_partner_domain": repr([("id", "in", self.ids)]),
+            },
         }
\ No newline at end of file
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import api, models
+
+from odoo.addons.vintrade_vehicle.tools.metrics import traced
+
+from .wallet_allocation import ALLOCATION_MOVES, allocated_share
+
+PAGE_SIZE = 2000
+
+
+class StatementEngine(models.AbstractModel):
+    _name = "vin.statement.engine"
+    _description = "Customer Statement Engine"
+
+    def _source(self, partner, company, include_all, as_of=None):
+        """FROM clause, WHERE clause and params shared by every statement query.
+
+        The FROM clause is a derived table ``aml`` with the columns ``id, date,
+        move_name, ref, date_maturity, debit, credit, amount, write_date``.
+        Full statements list the receivable journal items and, as credits and
+        debits, the wallet credit allocated to the customer's invoices and
+        released from them (negative ids). Open-items statements show what was
+        still due on each line at the end of ``as_of``: today's residual plus
+        the reconciliations dated after it, minus the wallet credit allocated
+        to its invoice by then, oldest installment first.
+        """
+        receivable = """
+                  FROM account_move_line aml
+                  JOIN account_account acc ON acc.id = aml.account_id
+        """
+        receivable_where = """
+                 WHERE aml.partner_id = %s
+                   AND aml.company_id = %s
+                   AND acc.account_type = 'asset_receivable'
+                   AND aml.parent_state != 'cancel'
+        """
+        if include_all:
+            from_clause = f"""(
+                SELECT aml.id, aml.date, aml.move_name, aml.ref, aml.date_maturity, aml.debit, aml.credit,
+                       aml.balance AS amount, aml.write_date
+                {receivable}
+                {receivable_where}
+                 UNION ALL
+                SELECT -w.id, w.date, m.name, w.note, NULL::date, GREATEST(w.amount, 0), GREATEST(-w.amount, 0),
+                       w.amount, w.write_date
+                  FROM ({ALLOCATION_MOVES}) w
+                  JOIN account_move m ON m.id = w.move_id AND m.move_type = 'out_invoice'
+                 WHERE w.partner_id = %s AND w.company_id = %s
+            ) aml"""
+            return from_clause, "TRUE", [partner.id, company.id, partner.id, company.id]
+        share = allocated_share("o.residual", "a.amount", "o.move_id",
+                                "COALESCE(o.date_maturity, o.date), o.id")
+        from_clause = f"""(
+            SELECT o.id, o.date, o.move_name, o.ref, o.date_maturity, o.debit, o.credit,
+                   o.residual - {share} AS amount, o.write_date
+              FROM (
+                SELECT aml.id, aml.move_id, aml.date, aml.move_name, aml.ref, aml.date_maturity,
+                       aml.debit, aml.credit, aml.write_date, aml.amount_residual + COALESCE(late.delta, 0) AS residual
+                {receivable}
+             LEFT JOIN LATERAL (
+                        SELECT SUM(CASE WHEN p.debit_move_id = aml.id THEN p.amount ELSE -p.amount END) AS delta
+                          FROM account_partial_reconcile p
+                         WHERE (p.debit_move_id = aml.id OR p.credit_move_id = aml.id) AND p.max_date > %s::date
+                       ) late ON TRUE
+                {receivable_where}
+                   AND (NOT COALESCE(aml.reconciled, FALSE) OR late.delta IS NOT NULL)
+                   ) o
+         LEFT JOIN LATERAL (
+                    SELECT -SUM(w.amount) AS amount
+                      FROM ({ALLOCATION_MOVES}) w
+                      JOIN account_move m ON m.id = w.move_id AND m.move_type = 'out_invoice'
+                     WHERE w.move_id = o.move_id AND w.date <= %s::date
+                   ) a ON TRUE
+        ) aml"""
+        as_of = as_of or "infinity"
+        return from_clause, "aml.amount <> 0", [as_of, partner.id, company.id, as_of]
+
+    def _flush(self):
+        self.env["account.move.line"].flush_model([
+            "partner_id", "company_id", "account_id", "parent_state", "reconciled", "move_id",
+            "date", "move_name", "ref", "date_maturity", "debit", "credit", "balance", "amount_residual",
+        ])
+        self.env["account.partial.reconcile"].flush_model(["debit_move_id", "credit_move_id", "amount", "max_date"])
+        self.env["account.move"].flush_model(["move_type", "name"])
+        self.env["vin.wallet.move"].flush_model(["partner_id", "company_id", "move_id", "date", "amount", "note"])
+
+    @api.model
+    def _balance_between(self, partner, company, date_from=None, date_to=None, include_all=True, as_of=None):
+        """Sum of the statement amounts with ``date_from <= date < date_to`` (bounds optional).
+
+        Open amounts are taken at the end of ``as_of``, by default the day before ``date_to``.
+        """
+        self._flush()
+        if as_of is None and date_to:
+            as_of = date_to - timedelta(days=1)
+        from_clause, where, params = self._source(partner, company, include_all, as_of)
+        if date_from:
+            where += " AND aml.date >= %s"
+            params.append(date_from)
+        if date_to:
+            where += " AND aml.date < %s"
+            params.append(date_to)
+        self.env.cr.execute(f"""
+            SELECT COALESCE(SUM(aml.amount), 0)
+              FROM {from_clause}
+             WHERE {where}
+        """, params)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _opening_balance(self, partner, company, date_from, include_all=True, as_of=None):
+        """Statement amounts dated before ``date_from``; open amounts at the end of ``as_of`` (the statement date)."""
+        if not date_from:
+            return 0.0
+        return self._balance_between(partner, company, date_to=date_from, include_all=include_all, as_of=as_of)
+
+    @api.model
+    @traced("statement.ledger_hash")
+    def _ledger_hash(self, partner, company, date_to, include_all=True):
+        """Fingerprint of every line a statement up to ``date_to`` depends on.
+
+        Any posted, reset, reconciled or edited line, and any wallet
+        allocation or release, changes an amount or write_date, and so the hash.
+        """
+        self._flush()
+        self.env["account.move.line"].flush_model(["write_date"])
+        from_clause, where, params = self._source(partner, company, include_all, date_to)
+        self.env.cr.execute(f"""
+            SELECT md5(COALESCE(string_agg(
+                       aml.id || ':' || aml.amount || ':' || aml.write_date,
+                       ',' ORDER BY aml.id), ''))
+              FROM {from_clause}
+             WHERE {where} AND aml.date <= %s
+        """, params + [date_to])
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _iter_pages(self, partner, company, date_from, date_to, include_all=True, page_size=PAGE_SIZE):
+        """Yield the statement lines in pages of at most ``page_size`` dicts, ordered by (date, id).
+
+        Each row carries ``date, move_name, ref, date_maturity, debit, credit,
+        amount`` and the running balance, computed by a window function on top
+        of the opening balance and carried from page to page.
+        """
+        self._flush()
+        running = self._opening_balance(partner, company, date_from, include_all, as_of=date_to)
+        from_clause, where, params = self._source(partner, company, include_all, date_to)
+        where += " AND aml.date <= %s"
+        params.append(date_to)
+        if date_from:
+            where += " AND aml.date >= %s"
+            params.append(date_from)
+        last_key = None
+        while True:
+            keyset = ""
+            page_params = list(params)
+            if last_key:
+                keyset = " AND (aml.date, aml.id) > (%s, %s)"
+                page_params += list(last_key)
+            self.env.cr.execute(f"""
+                SELECT page.*, %s + SUM(page.amount) OVER (ORDER BY page.date, page.id) AS running
+                  FROM (
+                        SELECT aml.id, aml.date, aml.move_name, aml.ref, aml.date_maturity,
+                               aml.debit, aml.credit, aml.amount
+                          FROM {from_clause}
+                         WHERE {where}{keyset}
+                      ORDER BY aml.date, aml.id
+                         LIMIT %s
+                       ) AS page
+              ORDER BY page.date, page.id
+            """, [running] + page_params + [page_size])
+            rows = self.env.cr.dictfetchall()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < page_size:
+                return
+            running = rows[-1]["running"]
+            last_key = (rows[-1]["date"], rows[-1]["id"])
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+from odoo.tools.safe_eval import safe_eval
+
+from odoo.addons.vintrade_vehicle.tools.metrics import inc, span, slow_threshold
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+MAX_WORKERS = 16
+DEFAULT_CHUNK_SIZE = 20
+CRON_TIME_BUDGET = 600  # seconds per cron call before handing over to a new call
+DEFAULT_CACHE_DAYS = 90
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class StatementRun(models.Model):
+    _name = "vin.statement.run"
+    _description = "Customer Statement Run"
+    _order = "id desc"
+
+    name = fields.Char(required=True, default=lambda self: _("Statements %s", fields.Date.context_today(self)))
+    company_id = fields.Many2one("res.company", required=True, default=lambda self: self.env.company)
+    partner_domain = fields.Char("Customers", required=True, default="[('customer_rank', '>', 0)]")
+    date_from = fields.Date("From", help="Earlier items are summarised in the opening balance.")
+    date_to = fields.Date("As of", required=True, default=fields.Date.context_today)
+    include_all = fields.Boolean("Include fully paid items", default=False)
+    output_type = fields.Selection(
+        [("zip", "Zip of PDFs"), ("pdf", "Merged PDF")],
+        string="Output", default="zip", required=True,
+    )
+    workers = fields.Integer(
+        "Workers", required=True,
+        default=lambda self: int(self.env["ir.config_parameter"].sudo().get_param(
+            "vintrade_ledger.statement_workers", DEFAULT_WORKERS)),
+        help="Statements rendered in parallel, each worker on its own database cursor.",
+    )
+    chunk_size = fields.Integer("Chunk Size", required=True, default=DEFAULT_CHUNK_SIZE,
+                                help="Statements handed to a worker at a time.")
+
+    state = fields.Selection(
+        [("draft", "Draft"), ("running", "Running"), ("done", "Done"), ("cancel", "Cancelled")],
+        default="draft", required=True, readonly=True,
+    )
+    line_ids = fields.One2many("vin.statement.run.line", "run_id", string="Statements", readonly=True)
+    started_at = fields.Datetime("Started", readonly=True)
+    finished_at = fields.Datetime("Finished", readonly=True)
+    output_attachment_id = fields.Many2one("ir.attachment", string="Output File", readonly=True)
+
+    line_count = fields.Integer("Statements", compute="_compute_progress")
+    rendered_count = fields.Integer("Rendered", compute="_compute_progress")
+    cached_count = fields.Integer("From Cache", compute="_compute_progress")
+    failed_count = fields.Integer("Failed", compute="_compute_progress")
+    progress = fields.Float("Progress", compute="_compute_progress")
+    throughput = fields.Float("Statements / min", compute="_compute_progress")
+
+    @api.constrains("workers", "chunk_size")
+    def _check_workers(self):
+        for run in self:
+            if not 1 <= run.workers <= MAX_WORKERS:
+                raise UserError(_("Workers must be between 1 and %s.", MAX_WORKERS))
+            if run.chunk_size <= 0:
+                raise UserError(_("Chunk size must be positive."))
+
+    @api.depends("line_ids.state", "started_at", "finished_at")
+    def _compute_progress(self):
+        counts = {}
+        for run, state, count in self.env["vin.statement.run.line"]._read_group(
+                [("run_id", "in", self.ids)], ["run_id", "state"], ["__count"]):
+            counts.setdefault(run.id, {})[state] = count
+        now = fields.Datetime.now()
+        for run in self:
+            by_state = counts.get(run.id, {})
+            total = sum(by_state.values())
+            processed = total - by_state.get("pending", 0)
+            run.line_count = total
+            run.rendered_count = by_state.get("done", 0)
+            run.cached_count = by_state.get("cached", 0)
+            run.failed_count = by_state.get("failed", 0)
+            run.progress = 100.0 * processed / total if total else 0.0
+            elapsed = ((run.finished_at or now) - run.started_at).total_seconds() if run.started_at else 0
+            run.throughput = 60.0 * processed / elapsed if elapsed else 0.0
+
+    # --- Actions ---
+    def action_start(self):
+        for run in self:
+            if run.state != "draft":
+                continue
+            partners = self.env["res.partner"].with_context(active_test=False).search(
+                safe_eval(run.partner_domain or "[]"), order="id")
+            if not partners:
+                raise UserError(_("No customer matches the selection of %s.", run.name))
+            self.env["vin.statement.run.line"].create([
+                {"run_id": run.id, "partner_id": partner_id} for partner_id in partners.ids
+            ])
+            run.write({"state": "running", "started_at": fields.Datetime.now(), "finished_at": False})
+        cron = self.env.ref("vintrade_ledger.ir_cron_statement_run", raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    def action_cancel(self):
+        self.filtered(lambda r: r.state in ("draft", "running")).write({"state": "cancel"})
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.output_attachment_id:
+            raise UserError(_("The run has not produced its output yet."))
+        return {
+            "type": "ir.actions.act_url",
+            "url": f"/web/content/{self.output_attachment_id.id}?download=true",
+            "target": "self",
+        }
+
+    # --- Processing (cron) ---
+    @api.model
+    def _cron_process(self):
+        deadline = time.monotonic() + CRON_TIME_BUDGET
+        for run in self.search([("state", "=", "running")], order="id"):
+            if not run._process(deadline):
+                # out of time: let a fresh cron call pick up where this one stopped
+                self.env.ref("vintrade_ledger.ir_cron_statement_run")._trigger()
+                return
+
+    def _process(self, deadline):
+        """Render the pending statements of this run; True once the run is finished."""
+        self.ensure_one()
+        Line = self.env["vin.statement.run.line"]
+        parallel = not getattr(threading.current_thread(), "testing", False)
+        while time.monotonic() < deadline:
+            pending = Line.search([("run_id", "=", self.id), ("state", "=", "pending")],
+                                  limit=self.chunk_size * self.workers, order="id").ids
+            if not pending:
+                self._finalize()
+                return True
+            start = time.perf_counter()
+            chunks = list(split_every(self.chunk_size, pending, list))
+            if parallel:
+                # workers open their own cursors: nothing uncommitted may hold their rows
+                self.env.cr.commit()
+                with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vin_statement") as pool:
+                    for future in [pool.submit(self._render_chunk_in_new_cursor, ids) for ids in chunks]:
+                        future.result()
+                self.env.invalidate_all()
+            else:
+                for ids in chunks:
+                    Line.browse(ids)._render()
+            _logger.info("Statement run %s: %s statements in %.1fs, %s%% done",
+                         self.id, len(pending), time.perf_counter() - start, round(self.progress))
+            if self.state != "running":
+                return True
+        return False
+
+    def _render_chunk_in_new_cursor(self, line_ids):
+        threading.current_thread().dbname = self.env.cr.dbname
+        with self.env.registry.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            env["vin.statement.run.line"].browse(line_ids)._render()
+
+    def _finalize(self):
+        """Bundle every statement of the run into a single zip or merged PDF attachment."""
+        self.ensure_one()
+        lines = self.line_ids.filtered("attachment_id").sorted(lambda l: (l.partner_id.display_name or "", l.id))
+        filename = "%s.%s" % (self.name, self.output_type)
+        with tempfile.TemporaryFile() as spool, ExitStack() as stack:
+            if self.output_type == "pdf":
+                # pages are copied lazily from the statement files when the writer saves
+                writer = PdfFileWriter()
+                for line in lines:
+                    reader = PdfFileReader(stack.enter_context(line._open_statement()), strict=False)
+                    for page in range(reader.getNumPages()):
+                        writer.addPage(reader.getPage(page))
+                if lines:
+                    writer.write(spool)
+            else:
+                # PDFs are already compressed; storing them keeps the zip cheap to build
+                with zipfile.ZipFile(spool, "w", zipfile.ZIP_STORED) as archive:
+                    for line in lines:
+                        with line._open_statement() as statement, \
+                                archive.open(line._member_name(), "w", force_zip64=True) as member:
+                            shutil.copyfileobj(statement, member, COPY_BUFFER_SIZE)
+            attachment = self._attach_file(spool, filename,
+                                           "application/pdf" if self.output_type == "pdf" else "application/zip")
+        self.write({"state": "done", "finished_at": fields.Datetime.now(), "output_attachment_id": attachment.id})
+        _logger.info("Statement run %s done: %s rendered, %s from cache, %s failed, %.1f statements/min",
+                     self.id, self.rendered_count, self.cached_count, self.failed_count, self.throughput)
+
+    def _attach_file(self, spool, filename, mimetype):
+        """Attachment of this run holding the content of the temporary file ``spool``.
+
+        With filestore storage the file is copied in chunks to its checksum
+        path and the attachment row points at it, so the output is never held
+        in memory whatever the size of the run.
+        """
+        Attachment = self.env["ir.attachment"].sudo()
+        vals = {"name": filename, "res_model": self._name, "res_id": self.id, "mimetype": mimetype}
+        spool.seek(0)
+        if Attachment._storage() != "file":
+            return Attachment.create(dict(vals, raw=spool.read()))
+        sha, size = hashlib.sha1(), 0
+        for chunk in iter(lambda: spool.read(COPY_BUFFER_SIZE), b""):
+            sha.update(chunk)
+            size += len(chunk)
+        checksum = sha.hexdigest()
+        fname = "%s/%s" % (checksum[:2], checksum)
+        full_path = Attachment._full_path(fname)
+        if not os.path.isfile(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            spool.seek(0)
+            with open(full_path + ".part", "wb") as out:
+                shutil.copyfileobj(spool, out, COPY_BUFFER_SIZE)
+            os.replace(full_path + ".part", full_path)
+        # a rolled back transaction leaves the file unreferenced; the filestore GC then removes it
+        Attachment._mark_for_gc(fname)
+        attachment = Attachment.create(vals)
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET store_fname = %s, file_size = %s, checksum = %s WHERE id = %s",
+            (fname, size, checksum, attachment.id))
+        attachment.invalidate_recordset(["store_fname", "file_size", "checksum", "raw", "datas"])
+        return attachment
+
+
+class StatementRunLine(models.Model):
+    _name = "vin.statement.run.line"
+    _description = "Customer Statement Run Line"
+    _order = "run_id, id"
+
+    run_id = fields.Many2one("vin.statement.run", required=True, index=True, ondelete="cascade")
+    partner_id = fields.Many2one("res.partner", required=True, ondelete="cascade")
+    state = fields.Selection(
+        [("pending", "Pending"), ("done", "Rendered"), ("cached", "From Cache"), ("failed", "Failed")],
+        default="pending", required=True, index=True,
+    )
+    cache_id = fields.Many2one("vin.statement.cache", string="Cache Entry", ondelete="set null")
+    attachment_id = fields.Many2one("ir.attachment", related="cache_id.attachment_id", string="Statement")
+    duration = fields.Float("Duration (s)")
+    error = fields.Text("Error")
+
+    def _open_statement(self):
+        """Open the rendered statement as a binary stream, straight from the filestore when possible."""
+        attachment = self.attachment_id.sudo()
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), "rb")
+        return io.BytesIO(attachment.raw)
+
+    def _member_name(self):
+        name = re.sub(r'[\\/:*?"<>|]+', "_", self.partner_id.display_name or "")
+        return "%s - %s.pdf" % (name, self.partner_id.id)
+
+    def _render(self):
+        Cache = self.env["vin.statement.cache"]
+        for line in self:
+            run = line.run_id
+            if run.state != "running":
+                continue
+            start = time.perf_counter()
+            try:
+                with self.env.cr.savepoint():
+                    cache, fresh = Cache._get_or_render(
+                        line.partner_id, run.company_id, run.date_from, run.date_to, run.include_all)
+                line.write({
+                    "state": "done" if fresh else "cached",
+                    "cache_id": cache.id,
+                    "duration": time.perf_counter() - start,
+                    "error": False,
+                })
+            except Exception as e:
+                _logger.warning("Statement for partner %s failed", line.partner_id.id, exc_info=True)
+                line.write({"state": "failed", "error": str(e), "duration": time.perf_counter() - start})
+
+
+class StatementCache(models.Model):
+    _name = "vin.statement.cache"
+    _description = "Customer Statement Cache"
+    _order = "last_used_at desc, id desc"
+
+    key = fields.Char("Key", required=True, index=True, readonly=True)
+    partner_id = fields.Many2one("res.partner", required=True, readonly=True, ondelete="cascade")
+    company_id = fields.Many2one("res.company", required=True, readonly=True, ondelete="cascade")
+    date_to = fields.Date("As of", required=True, readonly=True)
+    ledger_hash = fields.Char("Ledger Hash", required=True, readonly=True)
+    attachment_id = fields.Many2one("ir.attachment", string="Statement", readonly=True, ondelete="cascade")
+    last_used_at = fields.Datetime("Last used", readonly=True, default=fields.Datetime.now)
+
+    _sql_constraints = [("key_unique", "unique(key)", "A cached statement already exists for this key.")]
+
+    @api.model
+    def _cache_key(self, partner, company, date_from, date_to, include_all, ledger_hash):
+        # partner write_date: a new address or name must not be served from an old PDF
+        parts = (partner.id, fields.Datetime.to_string(partner.write_date), company.id,
+                 fields.Date.to_string(date_from), fields.Date.to_string(date_to), include_all, ledger_hash)
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    @api.model
+    def _get_or_render(self, partner, company, date_from, date_to, include_all):
+        """Return ``(cache entry, freshly rendered)`` for a statement, rendering only on a miss."""
+        ledger_hash = self.env["vin.statement.engine"]._ledger_hash(partner, company, date_to, include_all)
+        key = self._cache_key(partner, company, date_from, date_to, include_all, ledger_hash)
+        cache = self.search([("key", "=", key)], limit=1)
+        if cache and cache.attachment_id:
+            inc("vintrade_statement_cache_lookups_total", result="hit")
+            cache.last_used_at = fields.Datetime.now()
+            return cache, False
+        inc("vintrade_statement_cache_lookups_total", result="miss")
+        wizard = self.env["vin.statement.wizard"].create({
+            "partner_id": partner.id,
+            "company_id": company.id,
+            "date_from": date_from,
+            "date_to": date_to,
+            "include_all": include_all,
+        })
+        with span("statement.render_pdf", self.env.cr, slow_ms=slow_threshold(self.env, "statement.render_pdf")):
+            pdf, _fmt = self.env["ir.actions.report"]._render_qweb_pdf(
+                "vintrade_ledger.report_customer_statement", wizard.ids)
+        vals = {"key": key, "partner_id": partner.id, "company_id": company.id,
+                "date_to": date_to, "ledger_hash": ledger_hash, "last_used_at": fields.Datetime.now()}
+        cache = cache or self.create(vals)
+        cache.attachment_id = self.env["ir.attachment"].create({
+            "name": wizard._statement_filename("pdf"),
+            "raw": pdf,
+            "res_model": self._name,
+            "res_id": cache.id,
+            "mimetype": "application/pdf",
+        })
+        return cache, True
+
+    @api.model
+    def _gc_cache(self):
+        """Drop cached statements no run has used for a while."""
+        days = int(self.env["ir.config_parameter"].sudo().get_param(
+            "vintrade_ledger.statement_cache_days", DEFAULT_CACHE_DAYS))
+        stale = self.search([("last_used_at", "<", fields.Datetime.subtract(fields.Datetime.now(), days=days))])
+        stale.attachment_id.unlink()
+        stale.unlink()
+        _logger.info("Statement cache GC: %s entries dropped", len(stale))
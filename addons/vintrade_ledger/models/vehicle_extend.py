@@ -1,48 +1,63 @@
 # -*- coding: utf-8 -*-
-from odoo import api, models, _
+from odoo import models, _
 from odoo.exceptions import UserError
 
 
 class VinVehicle(models.Model):
     _inherit = "vin.vehicle"
 
-    def action_create_customer_invoice(self):
-        self.ensure_one()
-        partner = self.buyer_partner_id
-        if not partner:
-            return super().action_create_customer_invoice()
-
-        if partner.on_hold:
-            raise UserError(_("Customer is on hold; cannot create an invoice."))
-
-        # live receivable balance for this partner/company
-        aml = self.env["account.move.line"].search_read([
-            ("partner_id", "=", partner.id),
-            ("company_id", "=", self.company_id.id),
-            ("account_id.account_type", "=", "asset_receivable"),
-            ("parent_state", "!=", "cancel"),
-        ], ["balance"])
-        current_ar = sum(x["balance"] for x in aml)  # balance is signed in company currency
-
-        # credit limit check (wallet can offset)
-        limit = partner.credit_limit or 0.0
-        wallet = partner.wallet_balance or 0.0
-        projected = current_ar + (self.sale_price or self.expected_sale_price or 0.0) - wallet
-
-        if limit and projected > limit:
-            raise UserError(_(
-                "Credit limit exceeded.\n\n"
-                "Customer: %(cust)s\n"
-                "Limit: %(lim).2f\n"
-                "Current AR: %(ar).2f\n"
-                "Wallet: %(wal).2f\n"
-                "Projected after this invoice: %(proj).2f"
-            ) % {
-                "cust": partner.display_name,
-                "lim": limit,
-                "ar": current_ar,
-                "wal": wallet,
-                "proj": projected,
-            })
-
-        return super().action_create_customer_invoice()
\ No newline at end of file
+    def _draft_invoice_amounts(self, keys):
+        """``{(partner_id, company_id): amount}`` of draft customer invoices, in company currency."""
+        if not keys:
+            return {}
+        self.env["account.move"].flush_model(["partner_id", "company_id", "move_type", "state", "amount_total_signed"])
+        partner_ids, company_ids = zip(*keys)
+        self.env.cr.execute("""
+            SELECT partner_id, company_id, SUM(amount_total_signed)
+              FROM account_move
+             WHERE move_type = 'out_invoice' AND state = 'draft'
+               AND (partner_id, company_id) IN (SELECT * FROM unnest(%s::int[], %s::int[]))
+          GROUP BY partner_id, company_id
+        """, (list(partner_ids), list(company_ids)))
+        return {(partner_id, company_id): amount for partner_id, company_id, amount in self.env.cr.fetchall()}
+
+    def _check_customer_invoice_credit(self):
+        """One credit evaluation per customer and company for the whole batch being invoiced."""
+        totals = {}
+        for rec in self.filtered("buyer_partner_id"):
+            key = (rec.buyer_partner_id, rec.company_id)
+            totals[key] = totals.get(key, 0.0) + (rec._customer_invoice_amount() or 0.0)
+
+        keys = {(partner.id, company.id) for partner, company in totals}
+        # vin.ar.exposure is posted-only; invoices still in draft count against the limit too
+        drafts = self._draft_invoice_amounts(keys)
+
+        for (partner, company), amount in totals.items():
+            if partner.on_hold:
+                raise UserError(_("Customer %s is on hold; cannot create an invoice.", partner.display_name))
+
+            # open receivable for this partner/company net of wallet allocations, maintained by vin.ar.exposure
+            current_ar = self.env["vin.ar.exposure"].sudo()._get_amount(partner, company) \
+                + drafts.get((partner.id, company.id), 0.0)
+
+            # credit limit check (wallet can offset)
+            limit = partner.credit_limit or 0.0
+            wallet = partner._get_wallet_balance(company)
+            projected = current_ar + amount - wallet
+
+            if limit and projected > limit:
+                raise UserError(_(
+                    "Credit limit exceeded.\n\n"
+                    "Customer: %(cust)s\n"
+                    "Limit: %(lim).2f\n"
+                    "Current AR: %(ar).2f\n"
+                    "Wallet: %(wal).2f\n"
+                    "Projected after this invoice: %(proj).2f"
+                ) % {
+                    "cust": partner.display_name,
+                    "lim": limit,
+                    "ar": current_ar,
+                    "wal": wallet,
+                    "proj": projected,
+                })
+        return super()._check_customer_invoice_credit()
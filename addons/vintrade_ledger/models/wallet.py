@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+from odoo.addons.vintrade_vehicle.tools.metrics import traced
 
 
 class WalletMove(models.Model):
@@ -14,4 +17,148 @@ class WalletMove(models.Model):
     amount = fields.Monetary("Amount", currency_field="currency_id",
                              help="Positive = credit to customer wallet; Negative = spend/allocate.")
     note = fields.Char("Note")
-    move_id = fields.Many2one("account.move", string="Linked Journal Entry/Invoice", readonly=True)
\ No newline at end of file
+    move_id = fields.Many2one("account.move", string="Linked Journal Entry/Invoice", readonly=True,
+                              index="btree_not_null")
+
+    def init(self):
+        super().init()
+        create_index(self._cr, "vin_wallet_move_partner_company_date_idx", self._table,
+                     ["partner_id", "company_id", "date"])
+
+    def _balance_keys(self):
+        return {(m.partner_id.id, m.company_id.id) for m in self}
+
+    def _allocation_keys(self):
+        # allocations to an invoice reduce the customer's exposure
+        return {(m.partner_id.id, m.company_id.id) for m in self if m.move_id.move_type == "out_invoice"}
+
+    def _checkpoint_deltas(self, sign=1):
+        return [(m.partner_id.id, m.company_id.id, m.date, sign * m.amount) for m in self]
+
+    @api.model
+    def _balances(self, keys, as_of=None):
+        """Return ``{(partner_id, company_id): balance}`` at the end of ``as_of`` (default: all moves).
+
+        Starts from the latest vin.wallet.checkpoint on or before ``as_of`` and
+        sums only the moves after it, hot and archived, so the cost depends on
+        the moves since the last checkpoint rather than on the whole history.
+        """
+        keys = {key for key in keys if all(key)}
+        if not keys:
+            return {}
+        self.flush_model(["partner_id", "company_id", "date", "amount"])
+        self.env["vin.wallet.checkpoint"].flush_model()
+        partner_ids, company_ids = zip(*keys)
+        self.env.cr.execute("""
+            WITH k AS (SELECT * FROM unnest(%(partners)s::int[], %(companies)s::int[]) AS k (partner_id, company_id))
+            SELECT k.partner_id, k.company_id,
+                   COALESCE(cp.balance, 0)
+                   + COALESCE((SELECT SUM(m.amount) FROM vin_wallet_move m
+                                WHERE m.partner_id = k.partner_id AND m.company_id = k.company_id
+                                  AND m.date > COALESCE(cp.date, '-infinity'::date) AND m.date <= %(as_of)s::date), 0)
+                   + COALESCE((SELECT SUM(a.amount) FROM vin_wallet_move_archive a
+                                WHERE a.partner_id = k.partner_id AND a.company_id = k.company_id
+                                  AND a.date > COALESCE(cp.date, '-infinity'::date) AND a.date <= %(as_of)s::date), 0)
+              FROM k
+         LEFT JOIN LATERAL (
+                    SELECT c.date, c.balance FROM vin_wallet_checkpoint c
+                     WHERE c.partner_id = k.partner_id AND c.company_id = k.company_id AND c.date <= %(as_of)s::date
+                  ORDER BY c.date DESC
+                     LIMIT 1
+                   ) cp ON TRUE
+        """, {"partners": list(partner_ids), "companies": list(company_ids), "as_of": as_of or "infinity"})
+        return {(partner_id, company_id): balance for partner_id, company_id, balance in self.env.cr.fetchall()}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super().create(vals_list)
+        deltas = moves._checkpoint_deltas()
+        self.env["vin.wallet.checkpoint"]._shift(deltas)
+        self.env["vin.wallet.balance"]._refresh(moves._balance_keys())
+        self._invalidate_aging(deltas)
+        self.env["vin.ar.exposure"]._refresh(moves._allocation_keys())
+        return moves
+
+    def write(self, vals):
+        tracked = {"partner_id", "company_id", "date", "amount", "move_id"} & set(vals)
+        keys = self._balance_keys() if tracked else set()
+        allocation_keys = self._allocation_keys() if tracked else set()
+        deltas = self._checkpoint_deltas(-1) if tracked else []
+        res = super().write(vals)
+        if tracked:
+            deltas += self._checkpoint_deltas()
+            self.env["vin.wallet.checkpoint"]._shift(deltas)
+            self.env["vin.wallet.balance"]._refresh(keys | self._balance_keys())
+            self._invalidate_aging(deltas)
+            self.env["vin.ar.exposure"]._refresh(allocation_keys | self._allocation_keys())
+        return res
+
+    def unlink(self):
+        keys = self._balance_keys()
+        allocation_keys = self._allocation_keys()
+        deltas = self._checkpoint_deltas(-1)
+        res = super().unlink()
+        self.env["vin.wallet.checkpoint"]._shift(deltas)
+        self.env["vin.wallet.balance"]._refresh(keys)
+        self._invalidate_aging(deltas)
+        self.env["vin.ar.exposure"]._refresh(allocation_keys)
+        return res
+
+    @api.model
+    def _invalidate_aging(self, deltas):
+        # aging snapshots carry the wallet balance as of their date
+        self.env["vin.ar.aging.snapshot"]._invalidate({(company_id, date) for _p, company_id, date, _a in deltas})
+
+
+class WalletBalance(models.Model):
+    _name = "vin.wallet.balance"
+    _description = "Customer Wallet Balance"
+    _rec_name = "partner_id"
+
+    partner_id = fields.Many2one("res.partner", required=True, index=True, ondelete="cascade")
+    company_id = fields.Many2one("res.company", required=True, ondelete="cascade")
+    currency_id = fields.Many2one(related="company_id.currency_id", store=False, readonly=True)
+    balance = fields.Monetary("Balance", currency_field="currency_id", readonly=True)
+
+    _sql_constraints = [
+        ("partner_company_unique", "unique(partner_id, company_id)", "One wallet balance per customer and company."),
+    ]
+
+    @api.model
+    @traced("wallet.balance_refresh")
+    def _refresh(self, keys):
+        """Recompute the balances of the given ``(partner_id, company_id)`` pairs with one query."""
+        keys = {key for key in keys if all(key)}
+        if not keys:
+            return
+        partner_ids = list({p for p, _c in keys})
+        company_ids = list({c for _p, c in keys})
+        totals = self.env["vin.wallet.move"]._balances(keys)
+        balances = {
+            (b.partner_id.id, b.company_id.id): b
+            for b in self.sudo().search([("partner_id", "in", partner_ids), ("company_id", "in", company_ids)])
+        }
+        to_create = []
+        for key in keys:
+            amount = totals.get(key, 0.0)
+            balance = balances.get(key)
+            if balance is None:
+                to_create.append({"partner_id": key[0], "company_id": key[1], "balance": amount})
+            elif balance.balance != amount:
+                balance.balance = amount
+        self.sudo().create(to_create)
+
+    @api.model
+    def _rebuild_all(self):
+        """Recompute every wallet balance from scratch."""
+        self.env["vin.wallet.move"].flush_model(["partner_id", "company_id"])
+        self.env.cr.execute("""
+            SELECT partner_id, company_id FROM vin_wallet_move
+             UNION
+            SELECT partner_id, company_id FROM vin_wallet_move_archive
+             UNION
+            SELECT partner_id, company_id FROM vin_wallet_checkpoint
+        """)
+        keys = set(self.env.cr.fetchall())
+        keys |= set(self.sudo().search([]).mapped(lambda b: (b.partner_id.id, b.company_id.id)))
+        self._refresh(keys)
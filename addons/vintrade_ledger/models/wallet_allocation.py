@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+
+from odoo.addons.vintrade_vehicle.tools.metrics import traced
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# Wallet moves linked to a customer invoice: allocations (negative) and the
+# releases giving back what an invoice no longer needs (positive), online or
+# moved to the archive by the month-end checkpoints. Archived rows keep the
+# id they had online. Join account_move on move_type = 'out_invoice': other
+# wallet moves may be linked to other journal entries.
+ALLOCATION_MOVES = """
+    SELECT id, partner_id, company_id, move_id, date, amount, note, write_date FROM vin_wallet_move
+     WHERE move_id IS NOT NULL
+     UNION ALL
+    SELECT original_id, partner_id, company_id, move_id, date, amount, note, write_date FROM vin_wallet_move_archive
+     WHERE move_id IS NOT NULL
+"""
+
+# Per (partner, company): what is allocated to invoices that are still open,
+# capped at each invoice's residual. It offsets the open receivable.
+ALLOCATED_OPEN_SELECT = f"""
+    SELECT a.partner_id, a.company_id, SUM(LEAST(a.allocated, m.amount_residual_signed)) AS amount
+      FROM (SELECT partner_id, company_id, move_id, -SUM(amount) AS allocated
+              FROM ({ALLOCATION_MOVES}) w
+          GROUP BY partner_id, company_id, move_id) a
+      JOIN account_move m ON m.id = a.move_id
+     WHERE m.move_type = 'out_invoice' AND m.state = 'posted' AND m.amount_residual_signed > 0
+       AND a.allocated > 0
+  GROUP BY a.partner_id, a.company_id
+"""
+
+
+def allocated_share(residual, allocated, invoice, order):
+    """SQL expression: the part of an invoice's ``allocated`` credit taken by one of its receivable lines.
+
+    Credit goes to the open lines of the invoice in ``order`` (oldest
+    installment first), each line taking at most its ``residual``.
+    """
+    return f"""LEAST(GREATEST({residual}, 0), GREATEST(COALESCE({allocated}, 0) - COALESCE(SUM(GREATEST({residual}, 0))
+                OVER (PARTITION BY {invoice} ORDER BY {order} ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0), 0))"""
+
+# Order in which a customer's open invoices receive wallet credit.
+STRATEGY_ORDER = {
+    "fifo": "m.invoice_date_due NULLS LAST, m.id",
+    # oldest stock first: invoices of the earliest purchased vehicles, then the others by due date
+    "vehicle": "veh.purchase_date NULLS LAST, m.invoice_date_due NULLS LAST, m.id",
+}
+
+
+class WalletAllocation(models.AbstractModel):
+    """Applies positive wallet balances to open customer invoices, in bulk.
+
+    Each allocation is a negative vin.wallet.move linked to the invoice. What
+    an invoice can still receive is its residual minus what is already
+    allocated to it, and what a customer can give is its wallet balance, so
+    running the engine again only allocates new credit or new invoices.
+    Wallet balance rows are locked (``SKIP LOCKED``) while a customer is
+    processed, so concurrent runs never allocate the same credit twice.
+
+    Allocations do not reconcile the invoice. When an invoice is paid by
+    other means, cancelled or reset to draft, ``_release`` gives back to the
+    wallet what is allocated beyond its residual, so the customer never pays
+    twice; aging, statements and exposure subtract what remains allocated.
+    """
+    _name = "vin.wallet.allocation"
+    _description = "Customer Wallet Allocation"
+
+    @api.model
+    def _allocated_open(self, keys):
+        """``{(partner_id, company_id): amount}`` allocated to invoices still open."""
+        keys = {key for key in keys if all(key)}
+        if not keys:
+            return {}
+        self.env["vin.wallet.move"].flush_model(["partner_id", "company_id", "move_id", "amount"])
+        self.env["account.move"].flush_model(["move_type", "state", "amount_residual_signed"])
+        partner_ids, company_ids = zip(*keys)
+        self.env.cr.execute(f"""
+            SELECT x.partner_id, x.company_id, x.amount
+              FROM ({ALLOCATED_OPEN_SELECT}) x
+             WHERE (x.partner_id, x.company_id) IN (SELECT * FROM unnest(%s::int[], %s::int[]))
+        """, (list(partner_ids), list(company_ids)))
+        return {(partner_id, company_id): amount for partner_id, company_id, amount in self.env.cr.fetchall()}
+
+    @api.model
+    def _strategy(self):
+        strategy = self.env["ir.config_parameter"].sudo().get_param(
+            "vintrade_ledger.wallet_allocation_strategy", "fifo")
+        if strategy not in STRATEGY_ORDER:
+            raise UserError(_("Unknown wallet allocation strategy: %s", strategy))
+        return strategy
+
+    @api.model
+    @traced("wallet.allocate")
+    def _allocate(self, partner_ids=None, company_ids=None, strategy=None):
+        """Allocate the wallet credit of these customers (default: all) to their open invoices.
+
+        Works through the customers with a positive wallet in batches of
+        ``BATCH_SIZE``, with one query for the invoices of a whole batch and one
+        bulk create of the allocation moves. Returns ``(move_count, amount)``.
+        """
+        strategy = strategy or self._strategy()
+        if strategy not in STRATEGY_ORDER:
+            raise UserError(_("Unknown wallet allocation strategy: %s", strategy))
+        Balance = self.env["vin.wallet.balance"]
+        Move = self.env["vin.wallet.move"].sudo()
+        today = fields.Date.context_today(self)
+        moves_created, total = 0, 0.0
+        last_id = 0
+        while True:
+            Balance.flush_model()
+            self.env.cr.execute("""
+                SELECT id, partner_id, company_id, balance
+                  FROM vin_wallet_balance
+                 WHERE balance > 0 AND id > %s
+                   AND (%s::int[] IS NULL OR partner_id = ANY(%s::int[]))
+                   AND (%s::int[] IS NULL OR company_id = ANY(%s::int[]))
+              ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, (last_id, partner_ids, partner_ids, company_ids, company_ids, BATCH_SIZE))
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            available = {(partner_id, company_id): balance for _id, partner_id, company_id, balance in rows}
+            vals_list = self._allocation_vals(available, strategy, today)
+            Move.create(vals_list)
+            moves_created += len(vals_list)
+            total += -sum(vals["amount"] for vals in vals_list)
+            if len(rows) < BATCH_SIZE:
+                break
+        _logger.info("Wallet allocation (%s): %s moves, %.2f allocated", strategy, moves_created, total)
+        return moves_created, total
+
+    @api.model
+    def _allocation_vals(self, available, strategy, date):
+        """Allocation moves spending ``available[(partner_id, company_id)]`` on the open invoices."""
+        self.env["vin.wallet.move"].flush_model(["partner_id", "company_id", "move_id", "amount"])
+        self.env["account.move"].flush_model([
+            "partner_id", "company_id", "move_type", "state", "payment_state",
+            "amount_residual_signed", "invoice_date_due", "name",
+        ])
+        self.env["vin.vehicle"].flush_model(["customer_invoice_id", "purchase_date"])
+        partner_ids, company_ids = zip(*available)
+        self.env.cr.execute(f"""
+            WITH k AS (SELECT * FROM unnest(%s::int[], %s::int[]) AS k (partner_id, company_id)),
+            allocated AS (
+                    SELECT w.move_id, -SUM(w.amount) AS amount
+                      FROM ({ALLOCATION_MOVES}) w
+                      JOIN k ON k.partner_id = w.partner_id AND k.company_id = w.company_id
+                  GROUP BY w.move_id
+            )
+            SELECT m.partner_id, m.company_id, m.id, m.name,
+                   m.amount_residual_signed - COALESCE(a.amount, 0) AS open_amount
+              FROM account_move m
+              JOIN k ON k.partner_id = m.partner_id AND k.company_id = m.company_id
+         LEFT JOIN allocated a ON a.move_id = m.id
+         LEFT JOIN LATERAL (
+                    SELECT MIN(v.purchase_date) AS purchase_date FROM vin_vehicle v WHERE v.customer_invoice_id = m.id
+                   ) veh ON TRUE
+             WHERE m.move_type = 'out_invoice'
+               AND m.state = 'posted'
+               AND m.payment_state IN ('not_paid', 'partial')
+               AND m.amount_residual_signed - COALESCE(a.amount, 0) > 0
+          ORDER BY m.partner_id, m.company_id, {STRATEGY_ORDER[strategy]}
+        """, (list(partner_ids), list(company_ids)))
+        currencies = {company.id: company.currency_id for company in self.env["res.company"].browse(set(company_ids))}
+        left = dict(available)
+        vals_list = []
+        for partner_id, company_id, invoice_id, invoice_name, open_amount in self.env.cr.fetchall():
+            key = (partner_id, company_id)
+            currency = currencies[company_id]
+            amount = currency.round(min(left[key], open_amount))
+            if currency.is_zero(amount):
+                continue
+            left[key] -= amount
+            vals_list.append({
+                "partner_id": partner_id,
+                "company_id": company_id,
+                "date": date,
+                "amount": -amount,
+                "move_id": invoice_id,
+                "note": _("Wallet allocation: %s", invoice_name),
+            })
+        return vals_list
+
+    @api.model
+    @traced("wallet.release")
+    def _release(self, invoice_ids=None):
+        """Give back the credit allocated to these invoices (default: all) beyond their residual.
+
+        One positive wallet move per invoice for the excess; invoices that are
+        not posted keep nothing. Returns the number of moves created.
+        """
+        self.env["vin.wallet.move"].flush_model(["partner_id", "company_id", "move_id", "amount"])
+        self.env["account.move.line"].flush_model(["amount_residual"])
+        self.env["account.move"].flush_model(["move_type", "state", "amount_residual_signed", "name"])
+        self.env.cr.execute(f"""
+            SELECT a.partner_id, a.company_id, m.id, m.name,
+                   a.allocated - CASE WHEN m.state = 'posted' THEN GREATEST(m.amount_residual_signed, 0) ELSE 0 END
+              FROM (SELECT partner_id, company_id, move_id, -SUM(amount) AS allocated
+                      FROM ({ALLOCATION_MOVES}) w
+                     WHERE %s::int[] IS NULL OR move_id = ANY(%s::int[])
+                  GROUP BY partner_id, company_id, move_id) a
+              JOIN account_move m ON m.id = a.move_id
+             WHERE m.move_type = 'out_invoice'
+               AND a.allocated > CASE WHEN m.state = 'posted' THEN GREATEST(m.amount_residual_signed, 0) ELSE 0 END
+        """, (invoice_ids, invoice_ids))
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return 0
+        currencies = {company.id: company.currency_id
+                      for company in self.env["res.company"].browse({row[1] for row in rows})}
+        today = fields.Date.context_today(self)
+        vals_list = [
+            {
+                "partner_id": partner_id,
+                "company_id": company_id,
+                "date": today,
+                "amount": currencies[company_id].round(excess),
+                "move_id": invoice_id,
+                "note": _("Wallet allocation released: %s", invoice_name),
+            }
+            for partner_id, company_id, invoice_id, invoice_name, excess in rows
+            if not currencies[company_id].is_zero(excess)
+        ]
+        self.env["vin.wallet.move"].sudo().create(vals_list)
+        _logger.info("Wallet allocation: %s allocations released", len(vals_list))
+        return len(vals_list)
+
+    @api.model
+    def _cron_allocate(self):
+        self._release()
+        self._allocate()
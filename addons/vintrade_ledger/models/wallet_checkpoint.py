@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+
+class WalletCheckpoint(models.Model):
+    """Wallet balance of a customer in a company at the end of ``date``.
+
+    Balances as of any date read the latest checkpoint on or before it and
+    add only the later moves. Checkpoints follow back-dated changes (see
+    ``_shift``), so they always equal the sum of every move up to their date.
+    """
+    _name = "vin.wallet.checkpoint"
+    _description = "Customer Wallet Checkpoint"
+    _order = "date desc, id desc"
+    _rec_name = "date"
+
+    partner_id = fields.Many2one("res.partner", required=True, ondelete="cascade", readonly=True)
+    company_id = fields.Many2one("res.company", required=True, ondelete="cascade", readonly=True)
+    currency_id = fields.Many2one(related="company_id.currency_id", store=False, readonly=True)
+    date = fields.Date(required=True, readonly=True)
+    balance = fields.Monetary("Balance", currency_field="currency_id", readonly=True)
+    closed = fields.Boolean("Closed", readonly=True,
+                            help="Moves up to this date were moved to the wallet archive.")
+
+    _sql_constraints = [
+        ("partner_company_date_unique", "unique(partner_id, company_id, date)",
+         "One wallet checkpoint per customer, company and date."),
+    ]
+
+    @api.model
+    def _shift(self, deltas):
+        """Apply ``(partner_id, company_id, date, amount)`` changes to every checkpoint on or after ``date``."""
+        deltas = [d for d in deltas if d[0] and d[1] and d[3]]
+        if not deltas:
+            return
+        self.flush_model()
+        execute_values(self.env.cr._obj, """
+            UPDATE vin_wallet_checkpoint cp
+               SET balance = cp.balance + s.delta
+              FROM (
+                    SELECT c.id, SUM(d.amount) AS delta
+                      FROM vin_wallet_checkpoint c
+                      JOIN (VALUES %s) AS d (partner_id, company_id, date, amount)
+                        ON c.partner_id = d.partner_id AND c.company_id = d.company_id AND c.date >= d.date
+                  GROUP BY c.id
+                   ) s
+             WHERE cp.id = s.id
+        """, deltas, template="(%s::int, %s::int, %s::date, %s::numeric)")
+        self.invalidate_model(["balance"])
+
+    @api.model
+    def _generate(self, checkpoint_date):
+        """Checkpoint every customer/company with wallet activity at ``checkpoint_date``.
+
+        Each balance is the previous checkpoint plus the moves since, so the
+        cost does not grow with history.
+        """
+        self.env["vin.wallet.move"].flush_model()
+        self.flush_model()
+        self.env.cr.execute("""
+            WITH keys AS (
+                    SELECT partner_id, company_id FROM vin_wallet_move WHERE date <= %(date)s
+                     UNION
+                    SELECT partner_id, company_id FROM vin_wallet_checkpoint WHERE date < %(date)s
+            ), prev AS (
+                    SELECT DISTINCT ON (partner_id, company_id) partner_id, company_id, date, balance
+                      FROM vin_wallet_checkpoint
+                     WHERE date < %(date)s
+                  ORDER BY partner_id, company_id, date DESC
+            )
+            INSERT INTO vin_wallet_checkpoint
+                   (partner_id, company_id, date, balance, closed, create_uid, create_date, write_uid, write_date)
+            SELECT k.partner_id, k.company_id, %(date)s,
+                   COALESCE(prev.balance, 0) + COALESCE((
+                       SELECT SUM(m.amount) FROM vin_wallet_move m
+                        WHERE m.partner_id = k.partner_id AND m.company_id = k.company_id
+                          AND m.date > COALESCE(prev.date, '-infinity'::date) AND m.date <= %(date)s
+                   ), 0),
+                   FALSE, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM keys k
+         LEFT JOIN prev ON prev.partner_id = k.partner_id AND prev.company_id = k.company_id
+            ON CONFLICT (partner_id, company_id, date) DO NOTHING
+        """, {"date": checkpoint_date, "uid": self.env.uid})
+        created = self.env.cr.rowcount
+        self.invalidate_model()
+        _logger.info("Wallet checkpoints at %s: %s created", checkpoint_date, created)
+        return created
+
+    @api.model
+    def _archive_until(self, cutoff):
+        """Move wallet moves dated on or before ``cutoff`` to the archive, for customers checkpointed there."""
+        self.env["vin.wallet.move"].flush_model()
+        self.flush_model()
+        self.env.cr.execute("""
+            WITH closing AS (
+                    UPDATE vin_wallet_checkpoint SET closed = TRUE
+                     WHERE date = %(cutoff)s AND NOT closed
+                 RETURNING partner_id, company_id
+            ), moved AS (
+                    DELETE FROM vin_wallet_move m
+                     USING vin_wallet_checkpoint cp
+                     WHERE cp.date = %(cutoff)s
+                       AND cp.partner_id = m.partner_id AND cp.company_id = m.company_id
+                       AND m.date <= %(cutoff)s
+                 RETURNING m.id, m.partner_id, m.company_id, m.date, m.amount, m.note, m.move_id,
+                           m.create_uid, m.create_date
+            )
+            INSERT INTO vin_wallet_move_archive
+                   (original_id, partner_id, company_id, date, amount, note, move_id, archived_at,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT id, partner_id, company_id, date, amount, note, move_id, now() at time zone 'UTC',
+                   create_uid, create_date, %(uid)s, now() at time zone 'UTC'
+              FROM moved
+        """, {"cutoff": cutoff, "uid": self.env.uid})
+        archived = self.env.cr.rowcount
+        self.env["vin.wallet.move"].invalidate_model()
+        self.invalidate_model(["closed"])
+        _logger.info("Wallet archive: %s moves up to %s moved to the archive", archived, cutoff)
+        return archived
+
+    @api.model
+    def _cron_checkpoint(self):
+        """Month-end checkpoints, then optional archival of months older than
+        ``vintrade_ledger.wallet_archive_months`` (0 = keep everything online)."""
+        last_month_end = date.today().replace(day=1) - timedelta(days=1)
+        self._generate(last_month_end)
+        months = int(self.env["ir.config_parameter"].sudo().get_param("vintrade_ledger.wallet_archive_months", 0))
+        if months > 0:
+            cutoff = last_month_end.replace(day=1) - relativedelta(months=months - 1) - timedelta(days=1)
+            self._archive_until(cutoff)
+
+
+class WalletMoveArchive(models.Model):
+    """Cold storage for wallet moves older than a closed checkpoint; read-only."""
+    _name = "vin.wallet.move.archive"
+    _description = "Archived Customer Wallet Move"
+    _order = "date desc, id desc"
+
+    original_id = fields.Integer("Original ID", readonly=True)
+    partner_id = fields.Many2one("res.partner", required=True, readonly=True)
+    company_id = fields.Many2one("res.company", required=True, readonly=True)
+    currency_id = fields.Many2one(related="company_id.currency_id", store=False, readonly=True)
+    date = fields.Date(required=True, readonly=True)
+    amount = fields.Monetary("Amount", currency_field="currency_id", readonly=True)
+    note = fields.Char("Note", readonly=True)
+    move_id = fields.Many2one("account.move", string="Linked Journal Entry/Invoice", readonly=True,
+                              index="btree_not_null")
+    archived_at = fields.Datetime("Archived at", readonly=True)
+
+    def init(self):
+        super().init()
+        create_index(self._cr, "vin_wallet_move_archive_partner_company_date_idx", self._table,
+                     ["partner_id", "company_id", "date"])
@@ -0,0 +1,4 @@
+from . import test_ar_aging
+from . import test_perf_ledger
+from . import test_wallet_allocation
+from . import test_wallet_checkpoint
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo import Command
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged("post_install", "-at_install")
+class TestArAging(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.company = cls.company_data["company"]
+        cls.partner = cls.env["res.partner"].create({"name": "Aging Customer", "customer_rank": 1})
+        cls.Snapshot = cls.env["vin.ar.aging.snapshot"]
+        cls.as_of = date(2024, 12, 31)
+
+    def _receivable(self, move_date, due, amount):
+        """Post an entry with one receivable line of ``amount`` for the customer; return that line."""
+        receivable = self.company_data["default_account_receivable"]
+        move = self.env["account.move"].create({
+            "move_type": "entry",
+            "date": move_date,
+            "journal_id": self.company_data["default_journal_misc"].id,
+            "line_ids": [
+                Command.create({"partner_id": self.partner.id, "account_id": receivable.id, "date_maturity": due,
+                                "debit": max(amount, 0.0), "credit": max(-amount, 0.0)}),
+                Command.create({"account_id": self.company_data["default_account_revenue"].id,
+                                "debit": max(-amount, 0.0), "credit": max(amount, 0.0)}),
+            ],
+        })
+        move.action_post()
+        return move.line_ids.filtered(lambda line: line.account_id == receivable)
+
+    def _aging(self):
+        snapshot = self.Snapshot._get(self.company, self.as_of)
+        return snapshot, snapshot.line_ids.filtered(lambda line: line.partner_id == self.partner)
+
+    def test_buckets(self):
+        self._receivable(date(2024, 12, 1), date(2025, 1, 15), 100)   # not due yet
+        self._receivable(date(2024, 11, 1), date(2024, 12, 15), 200)  # 16 days
+        self._receivable(date(2024, 10, 1), date(2024, 11, 15), 300)  # 46 days
+        self._receivable(date(2024, 9, 1), date(2024, 10, 15), 400)   # 77 days
+        overdue = self._receivable(date(2024, 5, 1), date(2024, 6, 30), 500)  # 184 days
+        self._receivable(date(2025, 1, 5), date(2025, 2, 5), 700)     # after the aging date
+        # paid after the aging date: still open at that date
+        payment = self._receivable(date(2025, 1, 10), date(2025, 1, 10), -500)
+        (overdue | payment).reconcile()
+
+        _snapshot, line = self._aging()
+        self.assertRecordValues(line, [{
+            "amount_0_30": 300, "amount_31_60": 300, "amount_61_90": 400, "amount_90_plus": 500, "total": 1500,
+        }])
+
+    def test_invalidation(self):
+        self._receivable(date(2024, 11, 1), date(2024, 12, 15), 200)
+        snapshot, _line = self._aging()
+        self.assertFalse(snapshot.stale)
+
+        self._receivable(date(2025, 1, 5), date(2025, 2, 5), 100)
+        self.assertFalse(snapshot.stale)
+        self._receivable(date(2024, 12, 20), date(2025, 1, 20), 100)
+        self.assertTrue(snapshot.stale)
+        self._aging()
+
+        self.env["vin.wallet.move"].create({
+            "partner_id": self.partner.id, "company_id": self.company.id, "date": date(2024, 12, 1), "amount": 50,
+        })
+        self.assertTrue(snapshot.stale)
+        _snapshot, line = self._aging()
+        self.assertRecordValues(line, [{"total": 300, "wallet_balance": 50}])
+
+    def test_credit_data_is_live(self):
+        self._receivable(date(2024, 11, 1), date(2024, 12, 15), 200)
+        snapshot, line = self._aging()
+        self.assertRecordValues(line, [{"credit_limit": 0, "on_hold": False}])
+        self.partner.write({"credit_limit": 1000, "on_hold": True})
+        self.assertRecordValues(line, [{"credit_limit": 1000, "on_hold": True}])
+        self.assertFalse(snapshot.stale)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo.tests import tagged
+
+from odoo.addons.vintrade_vehicle.tests.common import VinTradeBenchCase, bench_scales
+
+# receivable lines / wallet moves per customer; the number of customers follows the scale
+LINES_PER_PARTNER = 50
+
+
+@tagged("post_install", "-at_install", "-standard", "vintrade_perf")
+class TestLedgerPerformance(VinTradeBenchCase):
+
+    def _customers(self, scale, **vals):
+        return self.generator.partners(max(1, scale // LINES_PER_PARTNER), **vals)
+
+    def test_wallet_balance(self):
+        for scale in bench_scales():
+            partners = self._customers(scale)
+            with self.measure("wallet moves create", scale, (20, 20)):
+                self.generator.wallet_moves(partners, LINES_PER_PARTNER, self.company)
+            with self.measure("partner wallet_balance read", scale, (10, 2)):
+                partners.read(["wallet_balance", "wallet_move_count"])
+            with self.measure("credit guard wallet lookup", scale, (5, 20)):
+                for partner in partners:
+                    partner._get_wallet_balance(self.company)
+
+    def test_wallet_checkpoints(self):
+        Checkpoint = self.env["vin.wallet.checkpoint"]
+        Move = self.env["vin.wallet.move"]
+        for scale in bench_scales():
+            partners = self._customers(scale)
+            self.generator.wallet_moves(partners, LINES_PER_PARTNER, self.company)
+            keys = {(p.id, self.company.id) for p in partners}
+            as_of = date(2024, 9, 15)
+            expected = Move._balances(keys, as_of)
+            expected_march = Move._balances(keys, date(2024, 3, 31))
+            with self.measure("wallet checkpoints generate", scale, (10, 0)):
+                for month_end in (date(2024, 6, 30), date(2024, 8, 31)):
+                    Checkpoint._generate(month_end)
+            with self.measure("wallet as-of balances", scale, (5, 0)):
+                self.assertEqual(Move._balances(keys, as_of), expected)
+            with self.measure("wallet archive", scale, (10, 0)):
+                Checkpoint._archive_until(date(2024, 6, 30))
+            self.assertEqual(Move._balances(keys, as_of), expected)
+            self.assertEqual(Move._balances(keys, date(2024, 3, 31)), expected_march)
+
+    def test_ar_exposure(self):
+        for scale in bench_scales():
+            partners = self._customers(scale)
+            with self.measure("receivable entries post", scale, (300, 900)):
+                self.generator.receivable_entries(partners, LINES_PER_PARTNER, self.company_data)
+            Exposure = self.env["vin.ar.exposure"]
+            with self.measure("ar exposure refresh", scale, (10, 0)):
+                Exposure._refresh({(p.id, self.company.id) for p in partners})
+            with self.measure("credit hold cron", scale, (20, 0)):
+                Exposure._cron_update_on_hold()
+
+    def test_ar_aging(self):
+        Snapshot = self.env["vin.ar.aging.snapshot"]
+        for scale in bench_scales():
+            partners = self._customers(scale)
+            self.generator.receivable_entries(partners, LINES_PER_PARTNER, self.company_data)
+            as_of = date(2024, 12, 31)
+            Snapshot.search([("company_id", "=", self.company.id), ("as_of", "=", as_of)]).unlink()
+            with self.measure("ar aging snapshot compute", scale, (20, 0)):
+                snapshot = Snapshot._get(self.company, as_of)
+            self.assertGreaterEqual(len(snapshot.line_ids), len(partners))
+            with self.measure("ar aging snapshot cached", scale, (5, 0)):
+                self.assertEqual(Snapshot._get(self.company, as_of), snapshot)
+            self.generator.receivable_entries(partners[:1], 1, self.company_data)
+            self.assertTrue(snapshot.stale)
+
+    def test_customer_invoice_with_credit_guard(self):
+        for scale in bench_scales():
+            buyers = self._customers(scale, credit_limit=10 ** 9)
+            self.generator.wallet_moves(buyers, 2, self.company)
+            vehicles = self.generator.vehicles(scale, self.company, buyers=buyers)
+            with self.measure("invoice + credit guard", scale, (150, 300)):
+                vehicles.action_create_customer_invoice()
+            self.assertTrue(all(vehicles.mapped("customer_invoice_id")))
+
+    def test_wallet_allocation(self):
+        Allocation = self.env["vin.wallet.allocation"]
+        for scale in bench_scales():
+            buyers = self._customers(scale, credit_limit=10 ** 9)
+            vehicles = self.generator.vehicles(scale, self.company, buyers=buyers)
+            vehicles.action_create_customer_invoice()
+            vehicles.customer_invoice_id.action_post()
+            self.generator.wallet_moves(buyers, 5, self.company)
+            for strategy in ("fifo", "vehicle"):
+                with self.measure(f"wallet allocation ({strategy})", scale, (30, 40)):
+                    Allocation._allocate(partner_ids=buyers.ids, strategy=strategy)
+                # idempotent: nothing left to allocate
+                self.assertEqual(Allocation._allocate(partner_ids=buyers.ids, strategy=strategy)[0], 0)
+
+    def test_statement(self):
+        for scale in bench_scales():
+            partner = self.generator.partners(1)
+            self.generator.receivable_entries(partner, scale, self.company_data)
+            wizard = self.env["vin.statement.wizard"].create({
+                "partner_id": partner.id,
+                "company_id": self.company.id,
+                "date_from": date(2024, 3, 1),
+                "date_to": date(2024, 12, 31),
+                "include_all": True,
+            })
+            with self.measure("statement engine pages", scale, (10, 1)):
+                rows = sum(len(page) for page in wizard._statement_pages())
+            self.assertGreater(rows, 0)
+            with self.measure("statement html render", scale, (60, 1)):
+                self.env["ir.actions.report"]._render_qweb_html(
+                    "vintrade_ledger.report_customer_statement", wizard.ids)
+            with self.measure("statement ledger hash", scale, (5, 0)):
+                self.env["vin.statement.engine"]._ledger_hash(partner, self.company, wizard.date_to)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from odoo import fields
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged("post_install", "-at_install")
+class TestWalletAllocation(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.company = cls.company_data["company"]
+        cls.partner = cls.env["res.partner"].create({"name": "Allocation Customer", "customer_rank": 1})
+        cls.key = (cls.partner.id, cls.company.id)
+        cls.Allocation = cls.env["vin.wallet.allocation"]
+        cls.Move = cls.env["vin.wallet.move"]
+        cls.invoice = cls.init_invoice("out_invoice", partner=cls.partner, amounts=[1000.0], post=True)
+        cls.due = cls.invoice.amount_residual_signed
+
+    def _credit(self, amount):
+        self.Move.create({
+            "partner_id": self.partner.id, "company_id": self.company.id,
+            "date": fields.Date.context_today(self.Move), "amount": amount,
+        })
+
+    def _allocate(self):
+        return self.Allocation._allocate(partner_ids=[self.partner.id])
+
+    def _allocated(self):
+        moves = self.Move.search([("partner_id", "=", self.partner.id), ("move_id", "=", self.invoice.id)])
+        return -sum(moves.mapped("amount"))
+
+    def test_allocation_is_idempotent(self):
+        self._credit(600)
+        self.assertEqual(self._allocate(), (1, 600))
+        self.assertEqual(self._allocate(), (0, 0))
+        # more credit than the invoice still needs: only the rest is allocated
+        self._credit(self.due)
+        count, amount = self._allocate()
+        self.assertEqual(count, 1)
+        self.assertAlmostEqual(amount, self.due - 600)
+        self.assertEqual(self._allocate(), (0, 0))
+        self.assertAlmostEqual(self._allocated(), self.due)
+        self.assertAlmostEqual(self.partner._get_wallet_balance(self.company), 600)
+
+    def test_archived_allocations_still_count(self):
+        self._credit(600)
+        self._allocate()
+        today = fields.Date.context_today(self.Move)
+        Checkpoint = self.env["vin.wallet.checkpoint"]
+        Checkpoint._generate(today)
+        Checkpoint._archive_until(today)
+        self.assertFalse(self._allocated())
+        self.assertEqual(self.Allocation._allocated_open({self.key}), {self.key: 600})
+
+        self._credit(self.due)
+        _count, amount = self._allocate()
+        self.assertAlmostEqual(amount, self.due - 600)
+
+    def test_release_when_paid_otherwise(self):
+        self._credit(600)
+        self._allocate()
+        self.env["account.payment.register"].with_context(
+            active_model="account.move", active_ids=self.invoice.ids,
+        ).create({})._create_payments()
+        self.assertEqual(self.invoice.payment_state, "paid")
+        self.assertFalse(self._allocated())
+        self.assertAlmostEqual(self.partner._get_wallet_balance(self.company), 600)
+        self.assertEqual(self.Allocation._release(), 0)
+
+    def test_release_on_reset_to_draft(self):
+        self._credit(600)
+        self._allocate()
+        self.invoice.button_draft()
+        self.assertFalse(self._allocated())
+        self.assertEqual(self.Allocation._allocated_open({self.key}), {})
+        self.invoice.action_post()
+        self.assertEqual(self._allocate(), (1, 600))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged("post_install", "-at_install")
+class TestWalletCheckpoint(AccountTestInvoicingCommon):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.company = cls.company_data["company"]
+        cls.partner = cls.env["res.partner"].create({"name": "Wallet Customer", "customer_rank": 1})
+        cls.key = (cls.partner.id, cls.company.id)
+        cls.Move = cls.env["vin.wallet.move"]
+        cls.Checkpoint = cls.env["vin.wallet.checkpoint"]
+
+    def _move(self, move_date, amount):
+        return self.Move.create({
+            "partner_id": self.partner.id, "company_id": self.company.id, "date": move_date, "amount": amount,
+        })
+
+    def _checkpoints(self):
+        checkpoints = self.Checkpoint.search([("partner_id", "=", self.partner.id)])
+        return {checkpoint.date: checkpoint.balance for checkpoint in checkpoints}
+
+    def test_checkpoints_follow_backdated_changes(self):
+        jan, mar = date(2024, 1, 31), date(2024, 3, 31)
+        january = self._move(date(2024, 1, 10), 100)
+        self._move(date(2024, 3, 10), 50)
+        self.Checkpoint._generate(jan)
+        self.Checkpoint._generate(mar)
+        self.assertEqual(self._checkpoints(), {jan: 100, mar: 150})
+
+        february = self._move(date(2024, 2, 10), -30)
+        self.assertEqual(self._checkpoints(), {jan: 100, mar: 120})
+        january.amount = 80
+        self.assertEqual(self._checkpoints(), {jan: 80, mar: 100})
+        february.date = date(2024, 1, 20)
+        self.assertEqual(self._checkpoints(), {jan: 50, mar: 100})
+        february.unlink()
+        self.assertEqual(self._checkpoints(), {jan: 80, mar: 130})
+        self.assertEqual(self.Move._balances({self.key}, mar), {self.key: 130})
+
+    def test_generate_is_idempotent(self):
+        self._move(date(2024, 1, 10), 100)
+        self.assertTrue(self.Checkpoint._generate(date(2024, 1, 31)))
+        self.assertEqual(self.Checkpoint._generate(date(2024, 1, 31)), 0)
+        self.assertEqual(self._checkpoints(), {date(2024, 1, 31): 100})
+
+    def test_archive_keeps_balances(self):
+        self._move(date(2024, 1, 10), 100)
+        self._move(date(2024, 2, 10), -40)
+        self._move(date(2024, 4, 10), 25)
+        cutoff = date(2024, 2, 29)
+        self.Checkpoint._generate(cutoff)
+        dates = [date(2024, 1, 31), cutoff, date(2024, 4, 30)]
+        before = [self.Move._balances({self.key}, as_of) for as_of in dates]
+
+        self.Checkpoint._archive_until(cutoff)
+        self.assertEqual(self.Move.search([("partner_id", "=", self.partner.id)]).mapped("amount"), [25])
+        archived = self.env["vin.wallet.move.archive"].search([("partner_id", "=", self.partner.id)])
+        self.assertEqual(sorted(archived.mapped("amount")), [-40, 100])
+        self.assertTrue(self.Checkpoint.search([("partner_id", "=", self.partner.id), ("date", "=", cutoff)]).closed)
+        self.assertEqual([self.Move._balances({self.key}, as_of) for as_of in dates], before)
+        self.assertEqual(self.partner._get_wallet_balance(self.company), 85)
+
+    def test_partners_sort_by_wallet_balance(self):
+        other = self.env["res.partner"].create({"name": "Other Wallet Customer", "customer_rank": 1})
+        self._move(date(2024, 1, 10), 100)
+        self.Move.create({"partner_id": other.id, "company_id": self.company.id, "date": date(2024, 1, 10), "amount": 40})
+        partners = self.partner | other
+        Partner = self.env["res.partner"].with_company(self.company)
+        self.assertEqual(Partner.search([("id", "in", partners.ids)], order="wallet_balance"), other | self.partner)
+        self.assertEqual(Partner.search([("id", "in", partners.ids)], order="wallet_balance desc"), self.partner | other)
@@ -1 +1,2 @@
-from . import statement_wizard
\ No newline at end of file
+from . import statement_wizard
+from . import ar_aging_wizard
\ No newline at end of file
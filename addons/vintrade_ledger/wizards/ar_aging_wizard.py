@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, _
+from odoo.exceptions import AccessError
+
+
+class ArAgingWizard(models.TransientModel):
+    _name = "vin.ar.aging.wizard"
+    _description = "Receivable Aging Wizard"
+
+    company_id = fields.Many2one("res.company", required=True, default=lambda self: self.env.company,
+                                 domain=lambda self: [("id", "in", self.env.companies.ids)])
+    as_of = fields.Date("As of", required=True, default=fields.Date.context_today)
+
+    def action_open(self):
+        self.ensure_one()
+        Snapshot = self.env["vin.ar.aging.snapshot"]
+        Snapshot.check_access_rights("read")
+        if self.company_id not in self.env.companies:
+            raise AccessError(_("You cannot see the receivable aging of %s.", self.company_id.display_name))
+        # computing reads every receivable of the company and writes the snapshot rows
+        snapshot = Snapshot.sudo()._get(self.company_id, self.as_of)
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Receivable Aging at %s", self.as_of),
+            "res_model": "vin.ar.aging",
+            "view_mode": "pivot,tree",
+            "views": [(False, "pivot"), (False, "tree")],
+            "domain": [("snapshot_id", "=", snapshot.id)],
+        }
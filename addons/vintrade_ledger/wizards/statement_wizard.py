@@ -1,5 +1,15 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models
+import csv
+import io
+from datetime import date, timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError, ValidationError
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
 
 
 class StatementWizard(models.TransientModel):
@@ -8,9 +18,97 @@ class StatementWizard(models.TransientModel):
 
     partner_id = fields.Many2one("res.partner", required=True)
     company_id = fields.Many2one("res.company", required=True, default=lambda self: self.env.company)
+    date_from = fields.Date("From", help="Earlier items are summarised in the opening balance.")
     date_to = fields.Date("As of", required=True, default=fields.Date.context_today)
     include_all = fields.Boolean("Include fully paid items", default=False)
+    output_format = fields.Selection(
+        [("pdf", "PDF"), ("csv", "CSV"), ("xlsx", "Excel")],
+        string="Format", default="pdf", required=True,
+    )
+
+    @api.constrains("date_from", "date_to")
+    def _check_dates(self):
+        for wizard in self:
+            if wizard.date_from and wizard.date_from > wizard.date_to:
+                raise ValidationError(_("The start date must be before the 'As of' date."))
 
     def action_print(self):
         self.ensure_one()
-        return self.env.ref("vintrade_ledger.report_customer_statement").report_action(self)
\ No newline at end of file
+        if self.output_format == "pdf":
+            return self.env.ref("vintrade_ledger.report_customer_statement").report_action(self)
+        return {
+            "type": "ir.actions.act_url",
+            "url": f"/vintrade/statement/{self.id}/{self.output_format}",
+            "target": "self",
+        }
+
+    # --- Statement data, shared by the report and the exports ---
+    def _statement_pages(self):
+        self.ensure_one()
+        return self.env["vin.statement.engine"]._iter_pages(
+            self.partner_id, self.company_id, self.date_from, self.date_to, self.include_all)
+
+    def _statement_rows(self):
+        for page in self._statement_pages():
+            yield from page
+
+    def _statement_opening(self):
+        self.ensure_one()
+        return self.env["vin.statement.engine"]._opening_balance(
+            self.partner_id, self.company_id, self.date_from, self.include_all, as_of=self.date_to)
+
+    def _statement_closing(self):
+        self.ensure_one()
+        return self.env["vin.statement.engine"]._balance_between(
+            self.partner_id, self.company_id, date_to=self.date_to + timedelta(days=1), include_all=self.include_all,
+            as_of=self.date_to)
+
+    # --- Exports ---
+    def _statement_filename(self, fmt):
+        self.ensure_one()
+        return "%s - %s.%s" % (_("Statement"), self.partner_id.display_name, fmt)
+
+    def _statement_header(self):
+        return [_("Date"), _("Document"), _("Reference"), _("Due Date"),
+                _("Debit"), _("Credit"), _("Amount"), _("Balance")]
+
+    def _statement_export_rows(self):
+        """Rows of plain values: opening balance, every line, closing balance."""
+        if self.date_from:
+            yield [self.date_from, _("Opening balance"), "", "", "", "", "", self._statement_opening()]
+        for row in self._statement_rows():
+            yield [row["date"], row["move_name"] or "", row["ref"] or "", row["date_maturity"] or "",
+                   row["debit"], row["credit"], row["amount"], row["running"]]
+        yield [self.date_to, _("Closing balance"), "", "", "", "", "", self._statement_closing()]
+
+    def _export(self, fmt, fileobj):
+        """Write the statement as ``csv`` or ``xlsx`` to the binary file object ``fileobj``."""
+        self.ensure_one()
+        if fmt == "csv":
+            text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+            writer = csv.writer(text)
+            writer.writerow(self._statement_header())
+            for values in self._statement_export_rows():
+                writer.writerow([fields.Date.to_string(v) if isinstance(v, date) else v for v in values])
+            text.flush()
+            text.detach()
+        elif fmt == "xlsx":
+            if xlsxwriter is None:
+                raise UserError(_("Excel export requires the xlsxwriter Python package."))
+            workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True})
+            sheet = workbook.add_worksheet(_("Statement"))
+            bold = workbook.add_format({"bold": True})
+            date_fmt = workbook.add_format({"num_format": "yyyy-mm-dd"})
+            money = workbook.add_format({"num_format": "#,##0.00"})
+            sheet.write_row(0, 0, self._statement_header(), bold)
+            for row_idx, values in enumerate(self._statement_export_rows(), start=1):
+                for col, value in enumerate(values):
+                    if isinstance(value, date):
+                        sheet.write_datetime(row_idx, col, value, date_fmt)
+                    elif isinstance(value, float):
+                        sheet.write_number(row_idx, col, value, money)
+                    else:
+                        sheet.write(row_idx, col, value)
+            workbook.close()
+        else:
+            raise UserError(_("Unsupported statement format: %s", fmt))
@@ -1 +1,4 @@
-from . import models
\ No newline at end of file
+from . import cli
+from . import controllers
+from . import models
+from . import wizards
\ No newline at end of file
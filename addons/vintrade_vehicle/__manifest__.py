@@ -1,7 +1,7 @@
 {
     "name": "VIN Trade • Vehicles",
     "summary": "Core vehicle model (VIN-first) for VIN Trade operations",
-    "version": "17.0.1.0.9",
+    "version": "17.0.1.0.22",
     "author": "VIN Trade Inc.",
     "website": "",
     "category": "Operations/Inventory",
@@ -10,9 +10,16 @@
     "data": [
         "data/ir_sequence_data.xml",
         "security/ir.model.access.csv",
+        "data/ir_cron_data.xml",
         "views/vehicle_views.xml",
         "views/sale_order_views.xml",
         "views/account_move_views.xml",
+        "views/res_company_views.xml",
+        "views/vehicle_report_views.xml",
+        "views/state_log_views.xml",
+        "views/decode_payload_views.xml",
+        "wizards/manifest_import_views.xml",
+        "wizards/state_transition_views.xml",
     ],
     "application": True,
     "installable": True,
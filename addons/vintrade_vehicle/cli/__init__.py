@@ -0,0 +1,2 @@
+from . import vpic_load
+from . import vehicle_actuals
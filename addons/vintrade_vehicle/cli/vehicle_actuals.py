@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+from pathlib import Path
+
+import odoo
+from odoo.cli import Command
+
+
+class VehicleActuals(Command):
+    """Recompute the actual cost / revenue / margin of every vehicle from posted journal items"""
+    name = "vehicle_actuals"
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f"{Path(sys.argv[0]).name} {self.name}",
+            description=self.__doc__.strip(),
+        )
+        parser.add_argument("-c", "--config", dest="config", help="Odoo configuration file")
+        parser.add_argument("-d", "--database", dest="database", required=True, help="Database to rebuild")
+        args, unknown = parser.parse_known_args(cmdargs)
+
+        config_args = ["-d", args.database] + unknown
+        if args.config:
+            config_args += ["-c", args.config]
+        odoo.tools.config.parse_config(config_args)
+
+        registry = odoo.registry(args.database)
+        with registry.cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            updated = env["vin.vehicle"]._refresh_actuals()
+        print("Updated the ledger actuals of %s vehicles." % updated)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+from pathlib import Path
+
+import odoo
+from odoo.cli import Command
+
+
+class VpicLoad(Command):
+    """Load the offline vPIC reference extract (WMI / VDS tables) into a database"""
+    name = "vpic_load"
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f"{Path(sys.argv[0]).name} {self.name}",
+            description=self.__doc__.strip(),
+        )
+        parser.add_argument("-c", "--config", dest="config", help="Odoo configuration file")
+        parser.add_argument("-d", "--database", dest="database", required=True, help="Database to load into")
+        parser.add_argument(
+            "source", nargs="?",
+            help="Directory, .zip file or URL of the extract "
+                 "(defaults to the vintrade_vehicle.vpic_extract_url parameter)",
+        )
+        args, unknown = parser.parse_known_args(cmdargs)
+
+        config_args = ["-d", args.database] + unknown
+        if args.config:
+            config_args += ["-c", args.config]
+        odoo.tools.config.parse_config(config_args)
+
+        registry = odoo.registry(args.database)
+        with registry.cursor() as cr:
+            env = odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+            counts = env["vin.offline.wmi"]._load_extract(args.source)
+        print("Loaded %(wmi)s WMIs and %(patterns)s VDS patterns." % counts)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import hmac
+import json
+import tempfile
+
+from werkzeug.http import quote_etag
+from werkzeug.wsgi import wrap_file
+
+from odoo import http
+from odoo.exceptions import UserError
+from odoo.http import content_disposition, request
+
+from ..tools.metrics import render_prometheus, span
+from ..tools.vin import validate_vins
+
+FEED_MIMETYPES = {
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+SCAN_BATCH_LIMIT = 200
+
+
+def _bearer_token(token):
+    auth = request.httprequest.headers.get("Authorization", "")
+    return token or (auth[7:] if auth.startswith("Bearer ") else "")
+
+
+def _json_response(payload, status=200, etag=None):
+    headers = [("Content-Type", "application/json"), ("Cache-Control", "private, no-cache")]
+    if etag:
+        headers.append(("ETag", quote_etag(etag)))
+    return request.make_response(json.dumps(payload, default=str, separators=(",", ":")),
+                                 headers=headers, status=status)
+
+
+def _scan(vins):
+    """Validate ``vins`` and look the valid ones up; return ``(results, etag)``.
+
+    The ETag covers every VIN asked for and the version of every vehicle
+    found, so it changes when any of them is written.
+    """
+    vins = [(vin or "").strip().upper() for vin in vins]
+    codes = validate_vins(vins, check_duplicates=False)
+    found = request.env["vin.vehicle"]._scan_lookup({vin for vin, code in zip(vins, codes) if code is None})
+    results = []
+    digest = hashlib.sha1()
+    for vin, code in zip(vins, codes):
+        values, version = found.get(vin, (None, ""))
+        digest.update(f"{vin}={code or version};".encode())
+        results.append({"vin": vin, "error": code or (None if values else "not_found"), "vehicle": values})
+    return results, digest.hexdigest()
+
+
+class VinTradeMetricsController(http.Controller):
+
+    @http.route("/vintrade/metrics", type="http", auth="public", methods=["GET"], csrf=False)
+    def metrics(self, token=None):
+        """Prometheus scrape target for this worker's vintrade metrics.
+
+        Needs the ``vintrade.metrics_token`` system parameter, passed as
+        ``?token=`` or ``Authorization: Bearer``; without one set, only
+        administrators may read it.
+        """
+        expected = request.env["ir.config_parameter"].sudo().get_param("vintrade.metrics_token")
+        given = _bearer_token(token)
+        if expected:
+            allowed = bool(given) and hmac.compare_digest(given, expected)
+        else:
+            allowed = request.env.user._is_system()
+        if not allowed:
+            return request.make_response("Forbidden\n", status=403, headers=[("Content-Type", "text/plain")])
+        return request.make_response(render_prometheus(), headers=[
+            ("Content-Type", "text/plain; version=0.0.4; charset=utf-8"),
+        ])
+
+    @http.route("/vintrade/feed/vehicles.<string:fmt>", type="http", auth="public", methods=["GET"], csrf=False)
+    def vehicle_feed(self, fmt, since=None, fields=None, company_id=None, gzip="1", token=None):
+        """Inventory feed for dealer portals (see vin.vehicle.feed).
+
+        ``since`` is the cursor returned in ``X-Feed-Cursor`` by the previous
+        call; ``fields`` a comma-separated list of vehicle fields. Callers
+        either pass the ``vintrade.feed_token`` system parameter (``?token=``
+        or ``Authorization: Bearer``) and may only export the fields listed in
+        ``vintrade.feed_token_fields``, or are logged-in internal users, whose
+        access rules apply.
+        """
+        if fmt not in FEED_MIMETYPES:
+            raise request.not_found()
+        expected = request.env["ir.config_parameter"].sudo().get_param("vintrade.feed_token")
+        given = _bearer_token(token)
+        field_names = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+        if expected and given and hmac.compare_digest(given, expected):
+            Feed = request.env["vin.vehicle.feed"].sudo()
+            # the export runs as superuser: only the whitelisted fields leave the database
+            allowed = Feed._feed_token_fields()
+            denied = [name for name in field_names or [] if name not in allowed]
+            if denied:
+                return request.make_response(f"Fields not available in the feed: {', '.join(denied)}\n",
+                                             status=400, headers=[("Content-Type", "text/plain")])
+            field_names = field_names or allowed
+        elif request.env.user._is_internal():
+            Feed = request.env["vin.vehicle.feed"]
+        else:
+            return request.make_response("Forbidden\n", status=403, headers=[("Content-Type", "text/plain")])
+        compress = gzip not in ("0", "false")
+        # spool to disk so memory stays flat whatever the inventory size, then stream the file
+        spool = tempfile.TemporaryFile()
+        try:
+            domain = [("company_id", "=", int(company_id))] if company_id else []
+            cursor, count = Feed._export(spool, fmt, since=since, field_names=field_names,
+                                         domain=domain, compress=compress)
+        except (UserError, ValueError) as e:
+            spool.close()
+            return request.make_response(f"{e}\n", status=400, headers=[("Content-Type", "text/plain")])
+        size = spool.tell()
+        spool.seek(0)
+        filename = f"vin_inventory.{fmt}" + (".gz" if compress else "")
+        return request.make_response(wrap_file(request.httprequest.environ, spool), headers=[
+            ("Content-Type", "application/gzip" if compress else FEED_MIMETYPES[fmt]),
+            ("Content-Length", str(size)),
+            ("Content-Disposition", content_disposition(filename)),
+            ("X-Feed-Cursor", cursor),
+            ("X-Feed-Count", str(count)),
+        ])
+
+
+class VinTradeScanController(http.Controller):
+    """Compact VIN lookups for barcode scanners, revalidated with ETag / If-None-Match."""
+
+    @http.route("/vintrade/vehicle/<string:vin>", type="http", auth="user", methods=["GET"], csrf=False)
+    def scan_vehicle(self, vin):
+        with span("scanner.lookup", request.env.cr):
+            (result,), etag = _scan([vin])
+            if result["error"] not in (None, "not_found"):
+                return _json_response(result, status=400)
+            if request.httprequest.if_none_match.contains(etag):
+                return request.make_response("", status=304, headers=[("ETag", quote_etag(etag))])
+            return _json_response(result, status=404 if result["error"] else 200, etag=etag)
+
+    @http.route("/vintrade/vehicles", type="http", auth="user", methods=["GET"], csrf=False)
+    def scan_vehicles(self, vins=""):
+        """Batch lookup, e.g. a whole container: ``?vins=VIN1,VIN2,...`` (at most 200)."""
+        vins = [vin for vin in vins.split(",") if vin.strip()]
+        if not vins or len(vins) > SCAN_BATCH_LIMIT:
+            return _json_response({"error": f"between 1 and {SCAN_BATCH_LIMIT} VINs expected"}, status=400)
+        with span("scanner.lookup_batch", request.env.cr):
+            results, etag = _scan(vins)
+            if request.httprequest.if_none_match.contains(etag):
+                return request.make_response("", status=304, headers=[("ETag", quote_etag(etag))])
+            return _json_response({"results": results}, etag=etag)
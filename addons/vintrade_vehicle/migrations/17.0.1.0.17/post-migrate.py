@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from odoo.addons.vintrade_vehicle.models.state_log import STATE_SELECTION
+
+
+def migrate(cr, version):
+    """Backfill the state log from the mail tracking of vin.vehicle.state, then the per-state totals."""
+    cr.execute("SELECT 1 FROM vin_vehicle_state_log LIMIT 1")
+    if cr.fetchone():
+        return
+    # tracking values hold the selection labels, not the keys
+    cr.execute("""
+        CREATE TEMP TABLE tmp_state_change ON COMMIT DROP AS
+        SELECT m.res_id AS vehicle_id, tv.id AS seq, old.key AS from_state, new.key AS to_state,
+               m.date AS changed_at, m.create_uid AS user_id
+          FROM mail_tracking_value tv
+          JOIN ir_model_fields f ON f.id = tv.field_id AND f.model = 'vin.vehicle' AND f.name = 'state'
+          JOIN mail_message m ON m.id = tv.mail_message_id AND m.model = 'vin.vehicle'
+          JOIN unnest(%(keys)s::varchar[], %(labels)s::varchar[]) AS new(key, label) ON new.label = tv.new_value_char
+     LEFT JOIN unnest(%(keys)s::varchar[], %(labels)s::varchar[]) AS old(key, label) ON old.label = tv.old_value_char
+    """, {"keys": [key for key, _label in STATE_SELECTION], "labels": [label for _key, label in STATE_SELECTION]})
+    # every vehicle starts with an entry row at its creation, in the state it was created in
+    cr.execute("""
+        INSERT INTO tmp_state_change (vehicle_id, seq, from_state, to_state, changed_at, user_id)
+        SELECT v.id, 0, NULL,
+               COALESCE((SELECT c.from_state FROM tmp_state_change c
+                          WHERE c.vehicle_id = v.id ORDER BY c.changed_at, c.seq LIMIT 1),
+                        v.state, 'draft'),
+               v.create_date, v.create_uid
+          FROM vin_vehicle v
+    """)
+    cr.execute("""
+        INSERT INTO vin_vehicle_state_log
+               (vehicle_id, company_id, from_state, to_state, changed_at, user_id, duration_hours)
+        SELECT c.vehicle_id, v.company_id, c.from_state, c.to_state, c.changed_at, c.user_id,
+               EXTRACT(EPOCH FROM c.changed_at - LAG(c.changed_at) OVER (
+                   PARTITION BY c.vehicle_id ORDER BY c.changed_at, c.seq)) / 3600.0
+          FROM tmp_state_change c
+          JOIN vin_vehicle v ON v.id = c.vehicle_id
+    """)
+    cr.execute("""
+        INSERT INTO vin_vehicle_dwell (vehicle_id, state, visits, total_hours)
+        SELECT vehicle_id, from_state, count(*), sum(duration_hours)
+          FROM vin_vehicle_state_log
+         WHERE from_state IS NOT NULL AND duration_hours IS NOT NULL
+      GROUP BY vehicle_id, from_state
+    """)
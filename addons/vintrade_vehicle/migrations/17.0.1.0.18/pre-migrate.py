@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from odoo.tools.sql import column_exists, create_column
+
+
+def migrate(cr, version):
+    """Fill vin_suffix in SQL so the ORM does not recompute it record by record.
+
+    The btree index on vin is replaced by a trigram index; drop it so the
+    registry creates the new one under the same name.
+    """
+    cr.execute("DROP INDEX IF EXISTS vin_vehicle__vin_index")
+    if column_exists(cr, "vin_vehicle", "vin_suffix"):
+        return
+    create_column(cr, "vin_vehicle", "vin_suffix", "varchar")
+    cr.execute("""
+        UPDATE vin_vehicle
+           SET vin_suffix = right(upper(btrim(vin)), 6)
+         WHERE length(btrim(vin)) >= 6
+    """)
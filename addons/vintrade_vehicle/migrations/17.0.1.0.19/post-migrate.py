@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from psycopg2.extras import execute_values
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools.sql import column_exists
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+
+def migrate(cr, version):
+    """Move the raw decoder results into vin.decode.payload, then drop the old column."""
+    if not column_exists(cr, "vin_vehicle", "vin_decoder_raw_legacy"):
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Payload = env["vin.decode.payload"]
+    moved = 0
+    last_id = 0
+    while True:
+        cr.execute("""
+            SELECT id, vin_decoder_raw_legacy FROM vin_vehicle
+             WHERE id > %s AND vin_decoder_raw_legacy IS NOT NULL
+          ORDER BY id
+             LIMIT %s
+        """, (last_id, BATCH_SIZE))
+        rows = cr.fetchall()
+        if not rows:
+            break
+        payload_ids = Payload._store_many([raw for _id, raw in rows])
+        execute_values(cr._obj, """
+            UPDATE vin_vehicle v SET vin_decoder_payload_id = m.payload_id
+              FROM (VALUES %s) AS m(id, payload_id)
+             WHERE v.id = m.id
+        """, [(vehicle_id, payload_id) for (vehicle_id, _raw), payload_id in zip(rows, payload_ids)])
+        moved += len(rows)
+        last_id = rows[-1][0]
+    cr.execute("ALTER TABLE vin_vehicle DROP COLUMN vin_decoder_raw_legacy")
+    _logger.info("Moved %s decoder payloads out of vin_vehicle", moved)
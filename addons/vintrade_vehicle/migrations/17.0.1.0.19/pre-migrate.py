@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from odoo.tools.sql import column_exists, rename_column
+
+
+def migrate(cr, version):
+    """vin_decoder_raw is no longer stored on the vehicle; keep the old column for post-migrate."""
+    if column_exists(cr, "vin_vehicle", "vin_decoder_raw"):
+        rename_column(cr, "vin_vehicle", "vin_decoder_raw", "vin_decoder_raw_legacy")
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Fill the new ledger actuals of every vehicle from the posted journal items."""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    updated = env["vin.vehicle"]._refresh_actuals()
+    _logger.info("Ledger actuals computed for %s vehicles", updated)
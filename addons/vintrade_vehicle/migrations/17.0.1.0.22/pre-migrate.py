@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Store every VIN trimmed and upper-case, as create and write now do."""
+    cr.execute("""
+        UPDATE vin_vehicle v
+           SET vin = n.vin
+          FROM (SELECT DISTINCT ON (upper(btrim(vin))) id, upper(btrim(vin)) AS vin
+                  FROM vin_vehicle
+                 WHERE vin <> upper(btrim(vin))
+              ORDER BY upper(btrim(vin)), id) n
+         WHERE v.id = n.id
+           AND NOT EXISTS (SELECT 1 FROM vin_vehicle o WHERE o.vin = n.vin)
+    """)
+    _logger.info("VIN normalized on %s vehicles", cr.rowcount)
+    cr.execute("SELECT count(*) FROM vin_vehicle WHERE vin <> upper(btrim(vin))")
+    conflicts = cr.fetchone()[0]
+    if conflicts:
+        _logger.warning("%s VINs left as they are: the normalized VIN belongs to another vehicle", conflicts)
@@ -1,3 +1,12 @@
+from . import count_mixin
 from . import vehicle
 from . import sale_ext
-from . import account_ext
\ No newline at end of file
+from . import account_ext
+from . import decode_cache
+from . import decode_payload
+from . import decode_queue
+from . import offline_decoder
+from . import res_company
+from . import vehicle_report
+from . import state_log
+from . import vehicle_feed
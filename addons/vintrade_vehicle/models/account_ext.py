@@ -1,5 +1,26 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models
+from odoo import api, fields, models
+
+# journal item fields that feed vin.vehicle actual cost / revenue
+ACTUALS_LINE_FIELDS = {"vehicle_id", "account_id", "balance", "debit", "credit", "amount_currency", "price_unit",
+                       "quantity", "discount"}
+
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "state" in vals:
+            self.env["vin.vehicle"]._refresh_actuals(self.line_ids.vehicle_id.ids)
+        return res
+
+    def unlink(self):
+        vehicle_ids = self.line_ids.vehicle_id.ids
+        res = super().unlink()
+        self.env["vin.vehicle"]._refresh_actuals(vehicle_ids)
+        return res
+
 
 class AccountMoveLine(models.Model):
     _inherit = "account.move.line"
@@ -7,5 +28,49 @@ class AccountMoveLine(models.Model):
     vehicle_id = fields.Many2one(
         "vin.vehicle",
         string="Vehicle",
+        index="btree_not_null",
         help="Link this invoice line to a specific vehicle (by VIN)."
-    )
\ No newline at end of file
+    )
+
+    # Lines of draft entries do not count; posting or cancelling goes through AccountMove.write.
+    def _posted_vehicle_ids(self):
+        return self.filtered(lambda l: l.parent_state == "posted").vehicle_id.ids
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env["vin.vehicle"]._refresh_actuals(lines._posted_vehicle_ids())
+        return lines
+
+    def write(self, vals):
+        if not ACTUALS_LINE_FIELDS & set(vals):
+            return super().write(vals)
+        vehicle_ids = self._posted_vehicle_ids()
+        res = super().write(vals)
+        self.env["vin.vehicle"]._refresh_actuals(vehicle_ids + self._posted_vehicle_ids())
+        return res
+
+    def unlink(self):
+        vehicle_ids = self._posted_vehicle_ids()
+        res = super().unlink()
+        self.env["vin.vehicle"]._refresh_actuals(vehicle_ids)
+        return res
+
+
+class AccountAccount(models.Model):
+    _inherit = "account.account"
+
+    # vin.vehicle._default_account_id caches the default income/expense account per company
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if {"account_type", "company_id", "code"} & set(vals):
+            self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class RelatedCountMixin(models.AbstractModel):
+    _name = "vin.related.count.mixin"
+    _description = "Batched counters of related records (stat buttons)"
+
+    def _get_related_counts(self, model_name, field_name="res_id", domain=None, groupby=None):
+        """Count ``model_name`` rows pointing at the records of ``self`` with one grouped query.
+
+        ``field_name`` is the Many2one or integer ``res_id`` field holding the
+        reference. Returns ``{record id: count}``, or ``{(record id, groupby id): count}``
+        when an extra ``groupby`` field is given. Records without rows are left out.
+        """
+        ids = [rid for rid in self.ids if rid]
+        if not ids:
+            return {}
+        groupby_fields = [field_name] + ([groupby] if groupby else [])
+        groups = self.env[model_name]._read_group(
+            [(field_name, "in", ids)] + list(domain or []), groupby_fields, ["__count"],
+        )
+        counts = {}
+        for *keys, count in groups:
+            keys = tuple(key.id if isinstance(key, models.BaseModel) else key for key in keys)
+            counts[keys if groupby else keys[0]] = count
+        return counts
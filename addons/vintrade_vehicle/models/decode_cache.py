@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from psycopg2.extras import Json, execute_values
+
+from odoo import api, fields, models
+
+from ..tools.metrics import inc
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_ENTRIES = 50000
+
+
+def _squish_vin(vin):
+    """WMI + VDS + model year + plant (positions 1-8 and 10-11), the key vPIC decodes on."""
+    return vin[:8] + vin[9:11]
+
+
+def _decoded_cleanly(result):
+    codes = str((result or {}).get("ErrorCode") or "").split(",")
+    return codes[0].strip() == "0"
+
+
+class VinDecodeCache(models.Model):
+    _name = "vin.decode.cache"
+    _description = "VIN Decode Cache"
+    _order = "last_hit_at desc, id desc"
+
+    key = fields.Char("Key", required=True, index=True, readonly=True)
+    kind = fields.Selection(
+        [("vin", "VIN"), ("pattern", "Squish VIN Pattern")],
+        string="Tier", required=True, default="vin", readonly=True,
+    )
+    result = fields.Json("Decoded Result", readonly=True)
+    fetched_at = fields.Datetime("Fetched at", required=True, default=fields.Datetime.now, readonly=True)
+    last_hit_at = fields.Datetime("Last hit at", readonly=True)
+    hit_count = fields.Integer("Hits", readonly=True)
+    miss_count = fields.Integer("Misses", readonly=True, help="Number of times this key was fetched from vPIC.")
+
+    _sql_constraints = [("kind_key_unique", "unique(kind, key)", "A cache entry already exists for this key.")]
+
+    # --- Settings ---
+    @api.model
+    def _get_ttl(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+        return timedelta(days=int(ICP.get_param("vintrade_vehicle.decode_cache_ttl_days", DEFAULT_TTL_DAYS)))
+
+    @api.model
+    def _get_max_entries(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+        return int(ICP.get_param("vintrade_vehicle.decode_cache_max_entries", DEFAULT_MAX_ENTRIES))
+
+    # --- Lookup / store ---
+    @api.model
+    def _lookup(self, vin):
+        """Return the cached vPIC result for a normalized VIN, or None on a miss."""
+        return self._lookup_many([vin]).get(vin)
+
+    @api.model
+    def _lookup_many(self, vins):
+        """Return ``{vin: result}`` for every normalized VIN with a fresh cache entry."""
+        if not vins:
+            return {}
+        squish = {vin: _squish_vin(vin) for vin in vins}
+        fresh_after = fields.Datetime.now() - self._get_ttl()
+        self.env.cr.execute("""
+            SELECT id, kind, key, result FROM vin_decode_cache
+             WHERE ((kind = 'vin' AND key = ANY(%s)) OR (kind = 'pattern' AND key = ANY(%s)))
+               AND fetched_at >= %s
+        """, (list(squish), list(set(squish.values())), fresh_after))
+        by_vin, by_pattern = {}, {}
+        for entry_id, kind, key, result in self.env.cr.fetchall():
+            (by_vin if kind == "vin" else by_pattern)[key] = (entry_id, result)
+
+        found, hit_ids = {}, []
+        for vin, pattern in squish.items():
+            if vin in by_vin:
+                entry_id, result = by_vin[vin]
+            elif pattern in by_pattern:
+                entry_id, result = by_pattern[pattern]
+                result = dict(result, VIN=vin)
+            else:
+                continue
+            found[vin] = result
+            hit_ids.append(entry_id)
+        inc("vintrade_decode_cache_lookups_total", len(found), result="hit")
+        inc("vintrade_decode_cache_lookups_total", len(squish) - len(found), result="miss")
+        if hit_ids:
+            self.env.cr.execute("""
+                UPDATE vin_decode_cache
+                   SET hit_count = hit_count + 1, last_hit_at = now() at time zone 'UTC'
+                 WHERE id = ANY(%s)
+            """, (hit_ids,))
+        return found
+
+    @api.model
+    def _store(self, vin, result):
+        self._store_many({vin: result})
+
+    @api.model
+    def _store_many(self, results):
+        """Upsert the VIN tier and, for clean decodes, the shared squish-VIN tier."""
+        entries = {}
+        for vin, result in results.items():
+            entries[("vin", vin)] = result
+            if _decoded_cleanly(result):
+                entries[("pattern", _squish_vin(vin))] = result
+        if not entries:
+            return
+        execute_values(self.env.cr._obj, """
+            INSERT INTO vin_decode_cache
+                   (kind, key, result, fetched_at, hit_count, miss_count,
+                    create_uid, create_date, write_uid, write_date)
+            VALUES %s
+            ON CONFLICT (kind, key) DO UPDATE
+               SET result = EXCLUDED.result,
+                   fetched_at = EXCLUDED.fetched_at,
+                   miss_count = vin_decode_cache.miss_count + 1,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, [
+            (kind, key, Json(result), self.env.uid, self.env.uid)
+            for (kind, key), result in entries.items()
+        ], template="""(%s, %s, %s, now() at time zone 'UTC', 0, 1,
+                        %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')""")
+        self.invalidate_model()
+
+    @api.model
+    def _get_stats(self):
+        self.env.cr.execute("""
+            SELECT kind, count(*), COALESCE(sum(hit_count), 0), COALESCE(sum(miss_count), 0)
+              FROM vin_decode_cache
+          GROUP BY kind
+        """)
+        return {kind: {"entries": n, "hits": hits, "misses": misses}
+                for kind, n, hits, misses in self.env.cr.fetchall()}
+
+    # --- Eviction (cron) ---
+    @api.model
+    def _gc_cache(self):
+        """Drop expired entries, then trim the least recently used down to the size bound."""
+        expired_before = fields.Datetime.now() - self._get_ttl()
+        self.env.cr.execute("DELETE FROM vin_decode_cache WHERE fetched_at < %s", (expired_before,))
+        expired = self.env.cr.rowcount
+        self.env.cr.execute("""
+            DELETE FROM vin_decode_cache WHERE id IN (
+                SELECT id FROM vin_decode_cache
+              ORDER BY COALESCE(last_hit_at, fetched_at) DESC, id DESC
+                OFFSET %s
+            )
+        """, (self._get_max_entries(),))
+        evicted = self.env.cr.rowcount
+        self.invalidate_model()
+        _logger.info("VIN decode cache GC: %s expired, %s evicted", expired, evicted)
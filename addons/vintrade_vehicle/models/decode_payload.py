@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import logging
+import zlib
+
+from psycopg2 import Binary
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models
+from odoo.tools.sql import column_exists, create_column
+
+_logger = logging.getLogger(__name__)
+
+
+def _canonical(payload):
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+class VinDecodePayload(models.Model):
+    """Raw vPIC results, stored once per distinct content and zlib-compressed.
+
+    The compressed bytes live in a plain ``bytea`` column handled in SQL, so
+    they are never loaded by the ORM unless ``payload`` is asked for.
+    """
+    _name = "vin.decode.payload"
+    _description = "VIN Decoder Payload"
+    _rec_name = "hash"
+    _log_access = False
+
+    hash = fields.Char("SHA-256", required=True, readonly=True)
+    raw_size = fields.Integer("Size (bytes)", readonly=True)
+    stored_size = fields.Integer("Stored (bytes)", readonly=True)
+    payload = fields.Json("Payload", compute="_compute_payload")
+
+    _sql_constraints = [("hash_unique", "unique(hash)", "This payload is already stored.")]
+
+    def init(self):
+        if not column_exists(self.env.cr, self._table, "data"):
+            create_column(self.env.cr, self._table, "data", "bytea")
+
+    def _compute_payload(self):
+        loaded = self._load_many(self.ids)
+        for record in self:
+            record.payload = loaded.get(record.id)
+
+    @api.model
+    def _load_many(self, ids):
+        """Return ``{id: payload}`` for the given payload ids."""
+        if not ids:
+            return {}
+        self.env.cr.execute(f"SELECT id, data FROM {self._table} WHERE id = ANY(%s)", (list(ids),))
+        return {
+            payload_id: json.loads(zlib.decompress(bytes(data)))
+            for payload_id, data in self.env.cr.fetchall() if data is not None
+        }
+
+    @api.model
+    def _store_many(self, payloads):
+        """Store each payload unless identical content is already there; return their ids, in order."""
+        rows = {}
+        hashes = []
+        for payload in payloads:
+            raw = _canonical(payload)
+            digest = hashlib.sha256(raw).hexdigest()
+            hashes.append(digest)
+            if digest not in rows:
+                data = zlib.compress(raw, 6)
+                rows[digest] = (digest, len(raw), len(data), Binary(data))
+        if not rows:
+            return []
+        execute_values(self.env.cr._obj, f"""
+            INSERT INTO {self._table} (hash, raw_size, stored_size, data)
+            VALUES %s
+            ON CONFLICT (hash) DO NOTHING
+        """, list(rows.values()))
+        self.env.cr.execute(f"SELECT hash, id FROM {self._table} WHERE hash = ANY(%s)", (list(rows),))
+        ids = dict(self.env.cr.fetchall())
+        return [ids[digest] for digest in hashes]
+
+    @api.model
+    def _gc_payloads(self):
+        """Drop payloads no vehicle points at any more."""
+        self.env["vin.vehicle"].flush_model(["vin_decoder_payload_id"])
+        self.env.cr.execute(f"""
+            DELETE FROM {self._table} p
+             WHERE NOT EXISTS (SELECT 1 FROM vin_vehicle v WHERE v.vin_decoder_payload_id = p.id)
+        """)
+        _logger.info("VIN decoder payload GC: %s unreferenced payloads dropped", self.env.cr.rowcount)
+        self.invalidate_model()
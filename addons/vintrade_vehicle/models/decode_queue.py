@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+from ..tools.vpic import VPIC_BATCH_SIZE
+
+_logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 6 * 3600
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN_SECONDS = 600
+
+
+class VinDecodeQueue(models.Model):
+    _name = "vin.decode.queue"
+    _description = "VIN Decode Queue"
+    _order = "next_attempt_at, id"
+
+    vehicle_id = fields.Many2one("vin.vehicle", required=True, index=True, ondelete="cascade")
+    vin = fields.Char("VIN", required=True)
+    state = fields.Selection(
+        [("pending", "Pending"), ("failed", "Failed")],
+        default="pending", required=True, index=True,
+    )
+    attempts = fields.Integer("Attempts")
+    next_attempt_at = fields.Datetime("Next attempt", default=fields.Datetime.now, index=True)
+    last_error = fields.Text("Last error")
+
+    # --- Enqueue ---
+    @api.model
+    def _enqueue(self, vehicles):
+        """Queue one decode per vehicle, replacing any job left for an older VIN."""
+        self.search([("vehicle_id", "in", vehicles.ids)]).unlink()
+        jobs = self.create([
+            {"vehicle_id": v.id, "vin": v.vin.strip().upper()}
+            for v in vehicles
+        ])
+        cron = self.env.ref("vintrade_vehicle.ir_cron_vin_decode_queue", raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return jobs
+
+    # --- Circuit breaker ---
+    @api.model
+    def _breaker_param(self, key, default):
+        return self.env["ir.config_parameter"].sudo().get_param(f"vintrade_vehicle.vpic_breaker_{key}", default)
+
+    @api.model
+    def _breaker_open_until(self):
+        value = self._breaker_param("open_until", False)
+        return fields.Datetime.to_datetime(value) if value else None
+
+    @api.model
+    def _breaker_failures(self):
+        return int(self._breaker_param("failures", 0) or 0)
+
+    @api.model
+    def _breaker_trip(self):
+        cooldown = int(self._breaker_param("cooldown", BREAKER_COOLDOWN_SECONDS))
+        open_until = fields.Datetime.now() + timedelta(seconds=cooldown)
+        self.env["ir.config_parameter"].sudo().set_param(
+            "vintrade_vehicle.vpic_breaker_open_until", fields.Datetime.to_string(open_until))
+        _logger.warning("vPIC circuit breaker open until %s", open_until)
+
+    @api.model
+    def _breaker_failure(self, half_open=False):
+        """Count a failed batch; trip after ``threshold`` in a row, across runs, or at once when probing."""
+        failures = self._breaker_failures() + 1
+        self.env["ir.config_parameter"].sudo().set_param("vintrade_vehicle.vpic_breaker_failures", failures)
+        threshold = int(self._breaker_param("threshold", BREAKER_THRESHOLD))
+        if half_open or failures >= threshold:
+            self._breaker_trip()
+            return True
+        return False
+
+    @api.model
+    def _breaker_reset(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+        was_open = bool(ICP.get_param("vintrade_vehicle.vpic_breaker_open_until"))
+        ICP.set_param("vintrade_vehicle.vpic_breaker_open_until", False)
+        ICP.set_param("vintrade_vehicle.vpic_breaker_failures", 0)
+        if was_open:
+            _logger.info("vPIC circuit breaker closed")
+
+    # --- Worker (cron) ---
+    @api.model
+    def _cron_process(self, limit=1000):
+        """Decode due jobs in vPIC-sized batches, behind a circuit breaker.
+
+        Each batch runs in its own savepoint. Consecutive batches failing on
+        vPIC are counted across runs; after ``threshold`` of them the breaker
+        opens for the cooldown. Once that is over, the breaker is half-open: a
+        single probe batch goes out, and a failure opens it again right away.
+        Other errors only put the batch back in the queue.
+        """
+        now = fields.Datetime.now()
+        open_until = self._breaker_open_until()
+        if open_until and open_until > now:
+            _logger.info("vPIC circuit breaker open until %s; decode queue left untouched", open_until)
+            return
+        half_open = bool(open_until)
+        auto_commit = not getattr(threading.current_thread(), "testing", False)
+
+        jobs = self.search([("state", "=", "pending"), ("next_attempt_at", "<=", now)], limit=limit)
+        # the decode mode is per company, so never mix companies in one batch
+        by_company = {}
+        for job in jobs:
+            by_company.setdefault(job.vehicle_id.company_id.id, []).append(job.id)
+        batches = [
+            self.browse(ids)
+            for job_ids in by_company.values()
+            for ids in split_every(VPIC_BATCH_SIZE, job_ids)
+        ]
+        for batch in batches:
+            tripped = False
+            try:
+                # the decode writes the cache: a database error must not abort the whole run
+                with self.env.cr.savepoint():
+                    # no offline fallback, so that a vPIC outage counts as one
+                    results = batch.vehicle_id._nhtsa_decode_batch(batch.mapped("vin"), offline_fallback=False)
+            except UserError as e:
+                batch._retry_later(str(e))
+                tripped = self._breaker_failure(half_open=half_open)
+            except Exception as e:
+                _logger.exception("VIN decode batch failed")
+                batch._retry_later(str(e))
+            else:
+                if half_open or self._breaker_failures():
+                    self._breaker_reset()
+                half_open = False
+                try:
+                    with self.env.cr.savepoint():
+                        batch._apply_results(results)
+                except Exception as e:
+                    _logger.exception("Could not apply VIN decode results")
+                    batch._retry_later(str(e))
+            if auto_commit:
+                self.env.cr.commit()
+            if tripped:
+                break
+
+    def _apply_results(self, results):
+        done = self.browse()
+        missing = self.browse()
+        for job in self:
+            vehicle = job.vehicle_id
+            if (vehicle.vin or "").strip().upper() != job.vin:
+                # VIN changed after queuing; the newer job takes over
+                done |= job
+            elif job.vin in results:
+                vehicle._apply_nhtsa_results({job.vin: results[job.vin]})
+                done |= job
+            else:
+                missing |= job
+        missing._retry_later("vPIC returned no result for this VIN")
+        done.unlink()
+
+    def _retry_later(self, error):
+        now = fields.Datetime.now()
+        failed_vehicles = self.env["vin.vehicle"]
+        for job in self:
+            attempts = job.attempts + 1
+            vals = {"attempts": attempts, "last_error": error}
+            if attempts >= MAX_ATTEMPTS:
+                vals["state"] = "failed"
+                failed_vehicles |= job.vehicle_id
+            else:
+                delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+                vals["next_attempt_at"] = now + timedelta(seconds=delay)
+            job.write(vals)
+        failed_vehicles.write({"decode_state": "failed"})
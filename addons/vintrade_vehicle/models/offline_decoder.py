@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import logging
+import os
+import re
+import zipfile
+
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models, tools, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Position 10 code -> model year, for the 1980-2009 cycle (2010-2039 is +30).
+MODEL_YEAR_CODES = {ch: 1980 + i for i, ch in enumerate("ABCDEFGHJKLMNPRSTVWXY123456789")}
+
+WMI_COLUMNS = ["wmi", "manufacturer", "make", "country", "vehicle_type"]
+PATTERN_COLUMNS = [
+    "wmi", "vds_pattern", "year_from", "year_to", "make", "model", "body_class",
+    "fuel_type_primary", "fuel_type_secondary", "electrification_level",
+    "engine_cylinders", "displacement_l",
+]
+
+
+def _wmi_key(vin):
+    """Manufacturers building < 1000 vehicles/year use '9' in position 3 and positions 12-14."""
+    return vin[:3] + vin[11:14] if vin[2] == "9" else vin[:3]
+
+
+def _model_year_candidates(vin):
+    year = MODEL_YEAR_CODES.get(vin[9])
+    if year is None:
+        return []
+    # Position 7 alphabetic marks the 2010+ cycle for passenger cars and light trucks.
+    return [year + 30, year] if vin[6].isalpha() else [year, year + 30]
+
+
+class VinOfflineWmi(models.Model):
+    _name = "vin.offline.wmi"
+    _description = "Offline vPIC: World Manufacturer Identifier"
+    _order = "wmi"
+
+    wmi = fields.Char("WMI", required=True, size=6)
+    manufacturer = fields.Char("Manufacturer")
+    make = fields.Char("Make")
+    country = fields.Char("Country")
+    vehicle_type = fields.Char("Vehicle Type")
+
+    _sql_constraints = [("wmi_unique", "unique(wmi)", "This WMI already exists.")]
+
+    # --- Index ---
+    @api.model
+    @tools.ormcache()
+    def _offline_index(self):
+        """In-memory lookup tables built once per registry: WMI rows and compiled VDS patterns."""
+        self.env.cr.execute("SELECT wmi, manufacturer, make, country FROM vin_offline_wmi")
+        wmis = {wmi: (manufacturer, make, country) for wmi, manufacturer, make, country in self.env.cr.fetchall()}
+        self.env.cr.execute("""
+            SELECT wmi, vds_pattern, year_from, year_to, make, model, body_class,
+                   fuel_type_primary, fuel_type_secondary, electrification_level,
+                   engine_cylinders, displacement_l
+              FROM vin_offline_pattern
+        """)
+        patterns = {}
+        for row in self.env.cr.fetchall():
+            wmi, vds = row[0], row[1] or ""
+            regex = re.compile(re.escape(vds).replace(r"\*", "."))
+            # fewer wildcards = more specific, tried first
+            patterns.setdefault(wmi, []).append((vds.count("*"), regex, row[2:]))
+        for entries in patterns.values():
+            entries.sort(key=lambda e: e[0])
+        return wmis, patterns
+
+    @api.model
+    def _decode(self, vin, partial=False):
+        """Decode a normalized VIN from the local tables, in vPIC result shape; None if unknown.
+
+        A VIN whose manufacturer is known but that matches no VDS pattern is
+        also None, unless ``partial`` asks for the manufacturer-only result.
+        """
+        wmis, patterns = self._offline_index()
+        wmi = _wmi_key(vin)
+        if wmi not in wmis:
+            return None
+        manufacturer, make, country = wmis[wmi]
+        result = {
+            "VIN": vin, "Make": make, "Manufacturer": manufacturer, "PlantCountry": country,
+            "ErrorCode": "0", "Source": "offline",
+        }
+        years = _model_year_candidates(vin)
+        vds = vin[3:8]
+        for _wildcards, regex, values in patterns.get(wmi, ()):
+            year_from, year_to = values[0], values[1]
+            year = next((y for y in years if (not year_from or y >= year_from) and (not year_to or y <= year_to)), None)
+            if (years and year is None) or not regex.fullmatch(vds):
+                continue
+            (_yf, _yt, p_make, model, body, fuel1, fuel2, elec, cylinders, displacement) = values
+            result.update({
+                "Make": p_make or make, "Model": model, "ModelYear": year, "BodyClass": body,
+                "FuelTypePrimary": fuel1, "FuelTypeSecondary": fuel2, "ElectrificationLevel": elec,
+                "EngineCylinders": cylinders, "DisplacementL": displacement,
+            })
+            return result
+        if not partial:
+            return None
+        result["ModelYear"] = years[0] if years else None
+        return result
+
+    @api.model
+    def _decode_many(self, vins, partial=False):
+        results = {}
+        for vin in vins:
+            result = self._decode(vin, partial=partial)
+            if result:
+                results[vin] = result
+        return results
+
+    # --- Loading ---
+    @api.model
+    def _load_extract(self, source):
+        """(Re)load the offline tables from a vPIC extract.
+
+        ``source`` is a directory, a .zip file or an http(s) URL of a .zip holding
+        ``wmi.csv`` and ``vds_patterns.csv`` with the WMI_COLUMNS / PATTERN_COLUMNS
+        headers. Existing rows are replaced.
+        """
+        source = source or self.env["ir.config_parameter"].sudo().get_param("vintrade_vehicle.vpic_extract_url")
+        if not source:
+            raise UserError(_("No vPIC extract given and vintrade_vehicle.vpic_extract_url is not set."))
+        if source.startswith(("http://", "https://")):
+            import requests
+            resp = requests.get(source, timeout=300)
+            resp.raise_for_status()
+            source = io.BytesIO(resp.content)
+
+        if isinstance(source, io.BytesIO) or zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                names = {os.path.basename(n): n for n in archive.namelist()}
+
+                def opener(name):
+                    return io.TextIOWrapper(archive.open(names[name]), encoding="utf-8-sig")
+                counts = self._load_tables(opener)
+        else:
+            def opener(name):
+                return open(os.path.join(source, name), encoding="utf-8-sig", newline="")
+            counts = self._load_tables(opener)
+        self.env.registry.clear_cache()
+        _logger.info("Offline vPIC extract loaded: %(wmi)s WMIs, %(patterns)s VDS patterns", counts)
+        return counts
+
+    @api.model
+    def _load_tables(self, opener):
+        cr = self.env.cr
+        cr.execute("DELETE FROM vin_offline_pattern")
+        cr.execute("DELETE FROM vin_offline_wmi")
+        counts = {}
+        for table, filename, columns in (
+            ("vin_offline_wmi", "wmi.csv", WMI_COLUMNS),
+            ("vin_offline_pattern", "vds_patterns.csv", PATTERN_COLUMNS),
+        ):
+            with opener(filename) as f:
+                rows = (
+                    [(row.get(col) or None) for col in columns] + [self.env.uid, self.env.uid]
+                    for row in csv.DictReader(f)
+                )
+                template = "({}, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')".format(
+                    ", ".join(["%s"] * len(columns)))
+                counts[table] = 0
+                for chunk in tools.split_every(5000, rows, list):
+                    execute_values(cr._obj, f"""
+                        INSERT INTO {table} ({", ".join(columns)}, create_uid, create_date, write_uid, write_date)
+                        VALUES %s
+                    """, chunk, template=template)
+                    counts[table] += len(chunk)
+        self.invalidate_model()
+        self.env["vin.offline.pattern"].invalidate_model()
+        return {"wmi": counts["vin_offline_wmi"], "patterns": counts["vin_offline_pattern"]}
+
+
+class VinOfflinePattern(models.Model):
+    _name = "vin.offline.pattern"
+    _description = "Offline vPIC: VDS Pattern"
+    _order = "wmi, vds_pattern"
+
+    wmi = fields.Char("WMI", required=True, size=6, index=True)
+    vds_pattern = fields.Char("VDS Pattern", required=True, help="Positions 4-8; '*' matches any character.")
+    year_from = fields.Integer("From Year")
+    year_to = fields.Integer("To Year")
+    make = fields.Char("Make")
+    model = fields.Char("Model")
+    body_class = fields.Char("Body Class")
+    fuel_type_primary = fields.Char("Fuel Type (Primary)")
+    fuel_type_secondary = fields.Char("Fuel Type (Secondary)")
+    electrification_level = fields.Char("Electrification Level")
+    engine_cylinders = fields.Char("Engine Cylinders")
+    displacement_l = fields.Char("Displacement (L)")
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models
+
+
+class ResCompany(models.Model):
+    _inherit = "res.company"
+
+    vin_decode_mode = fields.Selection(
+        [
+            ("online", "Online (vPIC)"),
+            ("offline", "Offline only"),
+            ("offline_first", "Offline first, then vPIC"),
+        ],
+        string="VIN Decoding", default="online", required=True,
+        help="Online decodes through NHTSA vPIC and falls back to the offline tables when vPIC is unreachable. "
+             "Offline only uses the locally loaded vPIC extract.",
+    )
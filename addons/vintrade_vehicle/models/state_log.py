@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models
+from odoo.tools import SQL, create_index
+
+STATE_SELECTION = [
+    ("draft", "Draft"), ("purchased", "Purchased"), ("enroute", "En Route"),
+    ("warehouse", "At Warehouse"), ("shipped", "Shipped"),
+    ("delivered", "Delivered"), ("cancelled", "Cancelled"),
+]
+# group operators of vin.vehicle.dwell.report computed with percentile_cont
+PERCENTILES = {"median": 0.5, "p90": 0.9}
+
+
+class VinVehicleStateLog(models.Model):
+    """One narrow row per vehicle state change; ``duration_hours`` is the time spent in ``from_state``."""
+    _name = "vin.vehicle.state.log"
+    _description = "Vehicle State Transition"
+    _order = "changed_at desc, id desc"
+    _log_access = False
+
+    vehicle_id = fields.Many2one("vin.vehicle", required=True, ondelete="cascade", readonly=True)
+    company_id = fields.Many2one("res.company", readonly=True)
+    from_state = fields.Selection(STATE_SELECTION, string="From", readonly=True)
+    to_state = fields.Selection(STATE_SELECTION, string="To", required=True, readonly=True)
+    changed_at = fields.Datetime("Changed at", required=True, readonly=True)
+    user_id = fields.Many2one("res.users", string="By", readonly=True)
+    duration_hours = fields.Float("Hours in previous state", readonly=True)
+
+    def init(self):
+        create_index(self.env.cr, "vin_vehicle_state_log_vehicle_changed_idx",
+                     self._table, ["vehicle_id", "changed_at"])
+        create_index(self.env.cr, "vin_vehicle_state_log_dwell_idx",
+                     self._table, ["from_state", "company_id", "changed_at"])
+
+    @api.model
+    def _log_transitions(self, changes):
+        """Record ``(vehicle_id, from_state, to_state)`` changes in one statement.
+
+        The time spent in ``from_state`` is measured from the vehicle's previous
+        log row and added to its per-state totals in vin.vehicle.dwell.
+        """
+        if not changes:
+            return
+        self.env["vin.vehicle"].flush_model(["company_id"])
+        execute_values(self.env.cr._obj, """
+            WITH change (vehicle_id, from_state, to_state, user_id) AS (VALUES %s),
+            inserted AS (
+                INSERT INTO vin_vehicle_state_log
+                       (vehicle_id, company_id, from_state, to_state, changed_at, user_id, duration_hours)
+                SELECT c.vehicle_id, v.company_id, c.from_state, c.to_state,
+                       now() at time zone 'UTC', c.user_id,
+                       EXTRACT(EPOCH FROM (now() at time zone 'UTC') - prev.changed_at) / 3600.0
+                  FROM change c
+                  JOIN vin_vehicle v ON v.id = c.vehicle_id
+             LEFT JOIN LATERAL (
+                        SELECT changed_at FROM vin_vehicle_state_log l
+                         WHERE l.vehicle_id = c.vehicle_id
+                      ORDER BY l.changed_at DESC, l.id DESC
+                         LIMIT 1
+                       ) prev ON TRUE
+             RETURNING vehicle_id, from_state, duration_hours
+            )
+            INSERT INTO vin_vehicle_dwell (vehicle_id, state, visits, total_hours)
+            SELECT vehicle_id, from_state, 1, duration_hours
+              FROM inserted
+             WHERE from_state IS NOT NULL AND duration_hours IS NOT NULL
+            ON CONFLICT (vehicle_id, state) DO UPDATE
+               SET visits = vin_vehicle_dwell.visits + 1,
+                   total_hours = vin_vehicle_dwell.total_hours + EXCLUDED.total_hours
+        """, [change + (self.env.uid,) for change in changes],
+            template="(%s::int, %s::varchar, %s::varchar, %s::int)")
+        self.invalidate_model()
+        self.env["vin.vehicle.dwell"].invalidate_model()
+
+
+class VinVehicleDwell(models.Model):
+    """Precomputed time-in-state totals per vehicle, maintained by vin.vehicle.state.log."""
+    _name = "vin.vehicle.dwell"
+    _description = "Vehicle Time in State"
+    _order = "vehicle_id, state"
+    _log_access = False
+
+    vehicle_id = fields.Many2one("vin.vehicle", required=True, index=True, ondelete="cascade", readonly=True)
+    state = fields.Selection(STATE_SELECTION, required=True, readonly=True)
+    visits = fields.Integer("Visits", readonly=True)
+    total_hours = fields.Float("Total Hours", readonly=True)
+    total_days = fields.Float("Total Days", compute="_compute_total_days")
+
+    _sql_constraints = [("vehicle_state_unique", "unique(vehicle_id, state)", "One total per vehicle and state.")]
+
+    @api.depends("total_hours")
+    def _compute_total_days(self):
+        for dwell in self:
+            dwell.total_days = dwell.total_hours / 24.0
+
+
+class VinVehicleDwellReport(models.Model):
+    """Completed stays in a state, with median / p90 aggregates for the pivot."""
+    _name = "vin.vehicle.dwell.report"
+    _description = "Vehicle Dwell Time Report"
+    _auto = False
+    _order = "left_at desc"
+
+    vehicle_id = fields.Many2one("vin.vehicle", string="Vehicle", readonly=True)
+    company_id = fields.Many2one("res.company", string="Company", readonly=True)
+    state = fields.Selection(STATE_SELECTION, string="State", readonly=True)
+    next_state = fields.Selection(STATE_SELECTION, string="Next State", readonly=True)
+    left_at = fields.Datetime("Left at", readonly=True)
+    hours = fields.Float("Avg Hours", readonly=True, group_operator="avg")
+    hours_median = fields.Float("Median Hours", readonly=True, group_operator="median")
+    hours_p90 = fields.Float("P90 Hours", readonly=True, group_operator="p90")
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS
+            SELECT id, vehicle_id, company_id, from_state AS state, to_state AS next_state,
+                   changed_at AS left_at, duration_hours AS hours,
+                   duration_hours AS hours_median, duration_hours AS hours_p90
+              FROM vin_vehicle_state_log
+             WHERE from_state IS NOT NULL AND duration_hours IS NOT NULL
+        """)
+
+    def _read_group_select(self, aggregate_spec, query):
+        fname, __, func = aggregate_spec.partition(":")
+        if func in PERCENTILES:
+            return SQL("percentile_cont(%s) WITHIN GROUP (ORDER BY %s)",
+                       PERCENTILES[func], SQL.identifier(self._table, fname))
+        return super()._read_group_select(aggregate_spec, query)
@@ -1,47 +1,47 @@
 # -*- coding: utf-8 -*-
-import json
 import logging
 import re
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.osv import expression
+from odoo.tools import SQL, create_index, split_every
 
-try:
-    import requests
-except Exception:
-    requests = None
+from ..tools.vin import (
+    ERR_CHARSET, ERR_CHECK_DIGIT, ERR_FORBIDDEN, ERR_LENGTH, _vin_check_digit, validate_vins,
+)
+from ..tools.metrics import inc, span, slow_threshold, traced
+from ..tools.vpic import VPIC_BATCH_SIZE, VPIC_URL, vpic_request
 
 _logger = logging.getLogger(__name__)
 
-VIN_TRANS = {
-    **{str(i): i for i in range(10)},
-    **dict(
-        A=1, B=2, C=3, D=4, E=5, F=6, G=7, H=8,
-        J=1, K=2, L=3, M=4, N=5, P=7, R=9,
-        S=2, T=3, U=4, V=5, W=6, X=7, Y=8, Z=9,
-    ),
+VIN_SUFFIX_LENGTH = 6
+# columns returned by the scanner lookup API (_scan_lookup)
+SCAN_FIELDS = ["vin", "name", "state", "make", "model", "year", "is_dg", "lot_number", "company_id"]
+VIN_SEARCH_RE = re.compile(r"[A-HJ-NPR-Z0-9]+")
+
+# Workflow: draft -> purchased -> enroute -> warehouse -> shipped -> delivered;
+# anything not yet delivered can be cancelled.
+STATE_FLOW = ["draft", "purchased", "enroute", "warehouse", "shipped", "delivered"]
+ALLOWED_TRANSITIONS = {
+    state: {next_state, "cancelled"} for state, next_state in zip(STATE_FLOW, STATE_FLOW[1:])
 }
-VIN_WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
-VIN_FORBIDDEN = set("IOQ")
 
 
-def _vin_check_digit(vin: str):
-    total = 0
-    for i, ch in enumerate(vin):
-        if ch in VIN_FORBIDDEN:
-            return None
-        val = VIN_TRANS.get(ch)
-        if val is None:
-            return None
-        total += int(val) * VIN_WEIGHTS[i]
-    remainder = total % 11
-    return "X" if remainder == 10 else str(remainder)
+# journal item accounts counted in the ledger actuals
+ACTUAL_COST_TYPES = ["expense", "expense_direct_cost", "expense_depreciation"]
+ACTUAL_REVENUE_TYPES = ["income", "income_other"]
+
+
+def _vin_is_valid(vin):
+    v = (vin or "").strip().upper()
+    return len(v) == 17 and _vin_check_digit(v) == v[8]
 
 
 class VinVehicle(models.Model):
     _name = "vin.vehicle"
     _description = "Vehicle (VIN)"
-    _inherit = ["mail.thread", "mail.activity.mixin"]
+    _inherit = ["mail.thread", "mail.activity.mixin", "vin.related.count.mixin"]
     _order = "create_date desc"
 
     # Company / currency
@@ -54,6 +54,7 @@ class VinVehicle(models.Model):
         default=lambda self: self.env.company.currency_id.id,
         help="Currency for purchase and fee amounts.",
     )
+    company_currency_id = fields.Many2one(related="company_id.currency_id", string="Company Currency")
 
     # Identity
     name = fields.Char(
@@ -61,7 +62,11 @@ class VinVehicle(models.Model):
         default=lambda self: self.env["ir.sequence"].next_by_code("vin.vehicle"),
         copy=False, index=True, tracking=True,
     )
-    vin = fields.Char("VIN", required=True, index=True, tracking=True)
+    vin = fields.Char("VIN", required=True, index="trigram", tracking=True)
+    vin_suffix = fields.Char(
+        "VIN Serial", compute="_compute_vin_suffix", store=True, index=True,
+        help="Last 6 characters of the VIN (production serial), for yard lookups.",
+    )
     vin_ok = fields.Boolean("VIN Check OK", compute="_compute_vin_ok", store=True)
 
     # Basic info
@@ -122,6 +127,19 @@ class VinVehicle(models.Model):
         compute="_compute_profit", store=True,
         help="(Sale Price or Expected Sale Price) − Total Cost − Repair Estimate.",
     )
+    # Ledger actuals, maintained from posted journal items by _refresh_actuals
+    actual_cost = fields.Monetary(
+        "Actual Cost", currency_field="company_currency_id", readonly=True, copy=False,
+        help="Posted expense journal items linked to this vehicle, in company currency.",
+    )
+    actual_revenue = fields.Monetary(
+        "Actual Revenue", currency_field="company_currency_id", readonly=True, copy=False,
+        help="Posted income journal items linked to this vehicle, in company currency.",
+    )
+    actual_margin = fields.Monetary(
+        "Actual Margin", currency_field="company_currency_id", readonly=True, copy=False,
+        help="Actual Revenue − Actual Cost.",
+    )
 
     # Workflow
     state = fields.Selection(
@@ -133,12 +151,25 @@ class VinVehicle(models.Model):
         default="draft", tracking=True,
     )
 
+    state_log_ids = fields.One2many("vin.vehicle.state.log", "vehicle_id", string="State History")
+    dwell_ids = fields.One2many("vin.vehicle.dwell", "vehicle_id", string="Time in State")
+
     # Attachments stat button
     attachment_count = fields.Integer("Attachments", compute="_compute_attachment_count")
 
     # NHTSA
+    decode_state = fields.Selection(
+        [("pending", "Pending"), ("done", "Decoded"), ("failed", "Failed")],
+        string="Decode Status", readonly=True, copy=False, index=True,
+        help="VIN decoding runs in the background after save; see the VIN decode queue.",
+    )
     vin_decoded_at = fields.Datetime("VIN decoded at", readonly=True)
-    vin_decoder_raw = fields.Json("VIN decoder raw response", readonly=True)
+    vin_decoder_payload_id = fields.Many2one(
+        "vin.decode.payload", string="VIN decoder payload", readonly=True, copy=False, index="btree_not_null")
+    vin_decoder_raw = fields.Json(
+        "VIN decoder raw response", compute="_compute_vin_decoder_raw", inverse="_inverse_vin_decoder_raw",
+        help="Loaded from the shared, compressed payload store on demand.",
+    )
     engine_cylinders = fields.Char("Engine Cylinders", readonly=True)
     displacement = fields.Char("Displacement (L)", readonly=True)
     fuel_type = fields.Char("Fuel Type (Primary)", readonly=True)
@@ -162,33 +193,111 @@ class VinVehicle(models.Model):
 
     _sql_constraints = [("vin_unique", "unique(vin)", "This VIN already exists.")]
 
+    def init(self):
+        # keyset pagination of the inventory feed (vin.vehicle.feed)
+        create_index(self.env.cr, "vin_vehicle_write_date_id_idx", self._table, ["write_date", "id"])
+
     # --- Compute / constraints ---
     @api.depends("vin")
     def _compute_vin_ok(self):
+        codes = validate_vins(self.mapped(lambda r: r.vin or ""), check_duplicates=False)
+        for rec, code in zip(self, codes):
+            rec.vin_ok = bool(rec.vin) and code is None
+
+    @api.depends("vin")
+    def _compute_vin_suffix(self):
+        for rec in self:
+            vin = (rec.vin or "").strip().upper()
+            rec.vin_suffix = vin[-VIN_SUFFIX_LENGTH:] if len(vin) >= VIN_SUFFIX_LENGTH else False
+
+    @api.depends("vin_decoder_payload_id")
+    def _compute_vin_decoder_raw(self):
+        payloads = self.env["vin.decode.payload"]._load_many(self.vin_decoder_payload_id.ids)
         for rec in self:
-            rec.vin_ok = False
-            if rec.vin and len(rec.vin.strip()) == 17:
-                v = rec.vin.strip().upper()
-                if any(ch in VIN_FORBIDDEN for ch in v):
-                    continue
-                check = _vin_check_digit(v)
-                rec.vin_ok = (check == v[8])
+            rec.vin_decoder_raw = payloads.get(rec.vin_decoder_payload_id.id)
+
+    def _inverse_vin_decoder_raw(self):
+        with_raw = self.filtered("vin_decoder_raw")
+        payload_ids = self.env["vin.decode.payload"]._store_many(with_raw.mapped("vin_decoder_raw"))
+        for rec, payload_id in zip(with_raw, payload_ids):
+            if rec.vin_decoder_payload_id.id != payload_id:
+                rec.vin_decoder_payload_id = payload_id
+        (self - with_raw).filtered("vin_decoder_payload_id").vin_decoder_payload_id = False
+
+    @api.model
+    def _name_search(self, name, domain=None, operator="ilike", limit=None, order=None):
+        """Pick an index-friendly VIN lookup from the shape of the input.
+
+        17 characters is an exact VIN; up to 8 characters is the serial at the
+        end of the VIN (vin_suffix index, trigram index below 6); anything in
+        between is a VIN prefix (trigram index). The VIN lookup is combined
+        with the default search on the reference, so reference fragments keep
+        matching; other input only goes through the default search.
+        """
+        term = (name or "").strip().upper()
+        if operator != "ilike" or not VIN_SEARCH_RE.fullmatch(term) or len(term) > 17:
+            return super()._name_search(name, domain, operator, limit, order)
+        if len(term) == 17:
+            vin_domain = [("vin", "=", term)]
+        elif len(term) > 8:
+            vin_domain = [("vin", "=ilike", term + "%")]
+        elif len(term) >= VIN_SUFFIX_LENGTH:
+            vin_domain = [("vin_suffix", "=", term[-VIN_SUFFIX_LENGTH:]), ("vin", "=ilike", "%" + term)]
+        elif len(term) >= 3:
+            vin_domain = [("vin", "=ilike", "%" + term)]
+        else:
+            return super()._name_search(name, domain, operator, limit, order)
+        name_domain = [(self._rec_name, operator, name)]
+        return self._search(expression.AND([domain or [], expression.OR([vin_domain, name_domain])]),
+                            limit=limit, order=order)
+
+    @api.model
+    def _scan_lookup(self, vins):
+        """Compact projection of the vehicles with these (valid, upper-case) VINs, for scanners.
+
+        One query on the VIN index, access rules applied. Returns
+        ``{vin: (values, version)}``; ``version`` changes whenever the vehicle
+        or its buyer is written, and is what the scanner API's ETag is built from.
+        """
+        if not vins:
+            return {}
+        self.flush_model(SCAN_FIELDS + ["buyer_partner_id", "write_date"])
+        self.env["res.partner"].flush_model(["name", "write_date"])
+        query = self._search([("vin", "in", list(vins))])
+        self.env.cr.execute(SQL("""
+            SELECT v.id, v.vin, v.name, v.state, v.make, v.model, v.year, v.is_dg, v.lot_number,
+                   v.company_id, v.buyer_partner_id, p.name, v.write_date, p.write_date
+              FROM vin_vehicle v
+         LEFT JOIN res_partner p ON p.id = v.buyer_partner_id
+             WHERE v.id IN %s
+        """, query.subselect()))
+        states = dict(self._fields["state"]._description_selection(self.env))
+        result = {}
+        for (vehicle_id, vin, name, state, make, model, year, is_dg, lot_number,
+             company_id, buyer_id, buyer_name, write_date, buyer_write_date) in self.env.cr.fetchall():
+            values = {
+                "id": vehicle_id, "vin": vin, "reference": name,
+                "state": state, "state_label": states.get(state),
+                "make": make, "model": model, "year": year, "is_dg": bool(is_dg),
+                "lot_number": lot_number, "company_id": company_id,
+                "buyer": {"id": buyer_id, "name": buyer_name} if buyer_id else None,
+            }
+            version = f"{vehicle_id}:{write_date.isoformat()}:{buyer_write_date.isoformat() if buyer_write_date else ''}"
+            result[vin] = (values, version)
+        return result
 
     @api.constrains("vin")
     def _check_vin(self):
-        for rec in self:
-            if not rec.vin:
-                continue
-            v = rec.vin.strip().upper()
-            if len(v) != 17:
-                raise ValidationError(_("VIN must be exactly 17 characters."))
-            if any(ch in VIN_FORBIDDEN for ch in v):
-                raise ValidationError(_("VIN cannot contain I, O, or Q."))
-            if not re.match(r"^[A-HJ-NPR-Z0-9]{17}$", v):
-                raise ValidationError(_("VIN must be alphanumeric (no special chars)."))
-            check = _vin_check_digit(v)
-            if check is None or check != v[8]:
-                raise ValidationError(_("Invalid VIN check digit."))
+        records = self.filtered("vin")
+        messages = {
+            ERR_LENGTH: _("VIN must be exactly 17 characters."),
+            ERR_FORBIDDEN: _("VIN cannot contain I, O, or Q."),
+            ERR_CHARSET: _("VIN must be alphanumeric (no special chars)."),
+            ERR_CHECK_DIGIT: _("Invalid VIN check digit."),
+        }
+        for code in validate_vins(records.mapped("vin"), check_duplicates=False):
+            if code:
+                raise ValidationError(messages[code])
 
     @api.constrains("year")
     def _check_year(self):
@@ -219,12 +328,10 @@ class VinVehicle(models.Model):
             ft2 = (rec.fuel_type_secondary or "").strip().lower()
             rec.is_dg = bool(elec) or any(k in ft1 for k in kw) or any(k in ft2 for k in kw)
 
-    @api.depends()
     def _compute_attachment_count(self):
+        counts = self._get_related_counts("ir.attachment", "res_id", [("res_model", "=", self._name)])
         for rec in self:
-            rec.attachment_count = self.env["ir.attachment"].search_count(
-                [("res_model", "=", self._name), ("res_id", "=", rec.id)]
-            )
+            rec.attachment_count = counts.get(rec.id, 0)
 
     # --- NHTSA decode helpers ---
     @api.model
@@ -232,23 +339,93 @@ class VinVehicle(models.Model):
         v = (dct or {}).get(key)
         return v if v not in (None, "", "0") else False
 
+    @api.model
+    def _nhtsa_base_url(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+        return (ICP.get_param("vintrade_vehicle.vpic_url") or VPIC_URL).rstrip("/")
+
+    @api.model
+    def _nhtsa_max_rps(self):
+        ICP = self.env["ir.config_parameter"].sudo()
+        return float(ICP.get_param("vintrade_vehicle.vpic_max_rps", 5))
+
+    def _vin_decode_mode(self):
+        return (self.company_id[:1] or self.env.company).vin_decode_mode or "online"
+
+    def _offline_decode(self, vins, partial=False):
+        return self.env["vin.offline.wmi"].sudo()._decode_many(vins, partial=partial)
+
+    @traced("vpic.decode")
     def _nhtsa_decode(self, vin):
         vin = (vin or "").strip().upper()
         if not vin:
             raise UserError(_("VIN is empty"))
-        url = f"https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVinValuesExtended/{vin}?format=json"
+        mode = self._vin_decode_mode()
+        if mode != "online":
+            # manufacturer-only matches are final only when vPIC is never asked
+            result = self._offline_decode([vin], partial=mode == "offline").get(vin)
+            if result:
+                return result
+            if mode == "offline":
+                raise UserError(_("VIN %s is not covered by the offline vPIC data.") % vin)
+        Cache = self.env["vin.decode.cache"].sudo()
+        result = Cache._lookup(vin)
+        if result is None:
+            try:
+                result = self._nhtsa_fetch(vin)
+            except UserError:
+                result = self._offline_decode([vin]).get(vin) if mode == "online" else None
+                if result is None:
+                    raise
+                return result
+            Cache._store(vin, result)
+        return result
+
+    @traced("vpic.decode_batch")
+    def _nhtsa_decode_batch(self, vins, offline_fallback=True):
+        """Decode many VINs at once: cache first, then vPIC batch POSTs of up to 50 VINs.
+
+        Depending on the company's decode mode the offline tables are used
+        instead of, before, or as a fallback for vPIC; without
+        ``offline_fallback`` a vPIC failure is raised as is. Returns a dict
+        mapping each normalized VIN to its vPIC-shaped result; VINs nobody
+        could decode are left out.
+        """
+        vins = [v for v in dict.fromkeys((v or "").strip().upper() for v in vins) if v]
+        mode = self._vin_decode_mode()
+        results = {}
+        if mode != "online":
+            results = self._offline_decode(vins, partial=mode == "offline")
+            if mode == "offline":
+                return results
+        Cache = self.env["vin.decode.cache"].sudo()
+        results.update(Cache._lookup_many([v for v in vins if v not in results]))
+        missing = [v for v in vins if v not in results]
+        for chunk in split_every(VPIC_BATCH_SIZE, missing, list):
+            try:
+                answers = self._nhtsa_fetch_batch(chunk)
+            except UserError:
+                fallback = self._offline_decode(chunk) if mode == "online" and offline_fallback else {}
+                if not fallback:
+                    raise
+                results.update(fallback)
+                continue
+            fetched = {}
+            for result in answers:
+                vin = (result.get("VIN") or "").strip().upper()
+                if vin in chunk:
+                    fetched[vin] = result
+            Cache._store_many(fetched)
+            results.update(fetched)
+        return results
+
+    @traced("vpic.http")
+    def _nhtsa_fetch(self, vin):
+        url = f"{self._nhtsa_base_url()}/DecodeVinValuesExtended/{vin}?format=json"
         try:
-            if requests:
-                resp = requests.get(url, timeout=10)
-                resp.raise_for_status()
-                data = resp.json()
-            else:
-                from urllib.request import urlopen
-                import ssl
-                ctx = ssl.create_default_context()
-                with urlopen(url, timeout=15, context=ctx) as f:
-                    data = json.loads(f.read().decode("utf-8"))
+            data = vpic_request(url, timeout=10, max_rps=self._nhtsa_max_rps())
         except Exception as e:
+            inc("vintrade_vpic_errors_total")
             _logger.exception("NHTSA decode failed for VIN %s", vin)
             raise UserError(_("Could not reach NHTSA decode service: %s") % e)
         results = data.get("Results") or []
@@ -256,6 +433,18 @@ class VinVehicle(models.Model):
             raise UserError(_("No decode results returned for VIN %s") % vin)
         return results[0]
 
+    @traced("vpic.http_batch")
+    def _nhtsa_fetch_batch(self, vins):
+        url = f"{self._nhtsa_base_url()}/DecodeVINValuesBatch/"
+        try:
+            data = vpic_request(url, data={"format": "json", "data": ";".join(vins)},
+                                timeout=30, max_rps=self._nhtsa_max_rps())
+        except Exception as e:
+            inc("vintrade_vpic_errors_total")
+            _logger.exception("NHTSA batch decode failed for %s VINs", len(vins))
+            raise UserError(_("Could not reach NHTSA decode service: %s") % e)
+        return data.get("Results") or []
+
     def _vals_from_nhtsa(self, result):
         vals = {}
         vals["make"] = self._safe_get(result, "Make") or vals.get("make")
@@ -275,13 +464,48 @@ class VinVehicle(models.Model):
         vals["vin_decoded_at"] = fields.Datetime.now()
         return vals
 
+    def _apply_nhtsa_results(self, results):
+        """Write decoded values onto each vehicle whose VIN is in ``results``.
+
+        Raw payloads go to the shared payload store in one batch, and only
+        the columns whose value actually changed are rewritten.
+        """
+        matched = [(rec, results[vin]) for rec in self
+                   if (vin := (rec.vin or "").strip().upper()) in results and results[vin]]
+        payload_ids = self.env["vin.decode.payload"]._store_many([result for _rec, result in matched])
+        decoded = self.browse()
+        for (rec, result), payload_id in zip(matched, payload_ids):
+            vals = rec._vals_from_nhtsa(result)
+            del vals["vin_decoder_raw"]
+            vals.update(vin_decoder_payload_id=payload_id, decode_state="done")
+            vals = {
+                fname: value for fname, value in vals.items()
+                if rec._fields[fname].convert_to_write(rec[fname], rec) != value
+            }
+            super(VinVehicle, rec.with_context(skip_autodecode=True)).write(vals)
+            decoded |= rec
+        return decoded
+
+    def _enqueue_decode(self):
+        """Queue a background decode for the vehicles holding a valid VIN."""
+        todo = self.filtered(lambda r: _vin_is_valid(r.vin))
+        if not todo:
+            return
+        self.env["vin.decode.queue"].sudo()._enqueue(todo)
+        super(VinVehicle, todo.with_context(skip_autodecode=True)).write({"decode_state": "pending"})
+
     def action_decode_vin(self):
-        self.ensure_one()
-        result = self._nhtsa_decode(self.vin)
-        self.write(self._vals_from_nhtsa(result))
+        records = self.filtered("vin")
+        if not records:
+            raise UserError(_("VIN is empty"))
+        decoded = records._apply_nhtsa_results(records._nhtsa_decode_batch(records.mapped("vin")))
+        if not decoded:
+            raise UserError(_("No decode results returned for VIN %s") % ", ".join(records.mapped("vin")))
         return {
             "type": "ir.actions.client", "tag": "display_notification",
-            "params": {"title": _("VIN decoded"), "message": _("Vehicle fields updated from NHTSA."),
+            "params": {"title": _("VIN decoded"),
+                       "message": _("Vehicle fields updated from NHTSA (%(done)s of %(total)s).",
+                                    done=len(decoded), total=len(records)),
                        "type": "success", "sticky": False}
         }
 
@@ -304,66 +528,122 @@ class VinVehicle(models.Model):
             _logger.exception("Onchange VIN autodecode failed for %s", v)
 
     @api.model
-    def create(self, vals):
-        rec = super().create(vals)
-        if vals.get("create_vendor_bill_on_save"):
-            try:
-                rec._create_vendor_bill()
-            except Exception as e:
-                _logger.exception("Auto vendor bill creation failed")
-                rec.message_post(body=_("Vendor bill could not be created automatically: %s") % e)
+    def _draw_names(self, count):
+        """Draw ``count`` references from the vin.vehicle sequence in one round-trip when possible."""
+        seq = self.env["ir.sequence"].sudo().search([
+            ("code", "=", "vin.vehicle"), ("company_id", "in", [self.env.company.id, False]),
+        ], order="company_id", limit=1)
+        if not seq or seq.implementation != "standard" or seq.use_date_range:
+            return [self.env["ir.sequence"].next_by_code("vin.vehicle") for _i in range(count)]
+        self.env.cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)", ("ir_sequence_%03d" % seq.id, count))
+        return [seq.get_next_char(number) for number, in self.env.cr.fetchall()]
 
-        vin = vals.get("vin")
-        if vin and len(vin.strip()) == 17 and _vin_check_digit(vin.strip().upper()) == vin.strip().upper()[8]:
-            try:
-                result = rec._nhtsa_decode(vin)
-                vals2 = rec._vals_from_nhtsa(result)
-                super(VinVehicle, rec.with_context(skip_autodecode=True)).write(vals2)
-            except Exception:
-                _logger.exception("Auto-decode on create failed for %s", vin)
-        return rec
+    @api.model
+    def _normalize_vin(self, vals):
+        # stored upper-case and trimmed, so exact lookups can use the VIN indexes
+        if vals.get("vin"):
+            vals["vin"] = vals["vin"].strip().upper()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            self._normalize_vin(vals)
+        unnamed = [vals for vals in vals_list if "name" not in vals]
+        if len(unnamed) > 1:
+            for vals, name in zip(unnamed, self._draw_names(len(unnamed))):
+                vals["name"] = name
+        records = super().create(vals_list)
+        self.env["vin.vehicle.state.log"]._log_transitions([(rec.id, None, rec.state or "draft") for rec in records])
+
+        to_bill = records.browse([rec.id for rec, vals in zip(records, vals_list) if vals.get("create_vendor_bill_on_save")])
+        errors = to_bill._create_vendor_bills(raise_on_error=False)
+        for rec in to_bill.browse(list(errors)):
+            rec.message_post(body=_("Vendor bill could not be created automatically: %s") % errors[rec.id])
+
+        records.filtered("vin")._enqueue_decode()
+        return records
 
     def write(self, vals):
+        self._normalize_vin(vals)
+        old_states = {rec.id: rec.state for rec in self} if "state" in vals else {}
         res = super().write(vals)
+        if old_states:
+            self.env["vin.vehicle.state.log"]._log_transitions([
+                (vehicle_id, old_state, vals["state"])
+                for vehicle_id, old_state in old_states.items() if old_state != vals["state"]
+            ])
         if vals.get("create_vendor_bill_on_save"):
-            for rec in self:
-                if not rec.vendor_bill_id:
-                    try:
-                        rec._create_vendor_bill()
-                    except Exception as e:
-                        _logger.exception("Vendor bill creation failed on write")
-                        rec.message_post(body=_("Vendor bill could not be created: %s") % e)
+            errors = self._create_vendor_bills(raise_on_error=False)
+            for rec in self.browse(list(errors)):
+                rec.message_post(body=_("Vendor bill could not be created: %s") % errors[rec.id])
 
         if "vin" in vals and not self.env.context.get("skip_autodecode"):
-            for rec in self:
-                vin = rec.vin and rec.vin.strip()
-                if vin and len(vin) == 17 and _vin_check_digit(vin.upper()) == vin.upper()[8]:
-                    try:
-                        result = rec._nhtsa_decode(vin)
-                        vals2 = rec._vals_from_nhtsa(result)
-                        super(VinVehicle, rec.with_context(skip_autodecode=True)).write(vals2)
-                    except Exception:
-                        _logger.exception("Auto-decode on write failed for %s", vin)
+            self._enqueue_decode()
         return res
 
     # --- Accounting helpers / actions ---
+    @api.model
+    @tools.ormcache("company_id", "account_type")
+    def _default_account_id(self, company_id, account_type):
+        """First account of ``account_type`` in the company; cleared whenever accounts change."""
+        return self.env["account.account"].sudo().search([
+            ("account_type", "=", account_type),
+            ("company_id", "=", company_id),
+        ], limit=1).id
+
     def _get_default_expense_account(self):
-        account = self.env["account.account"].search([
-            ("account_type", "=", "expense"),
-            ("company_id", "=", self.company_id.id),
-        ], limit=1)
-        if not account:
+        account_id = self._default_account_id(self.company_id.id, "expense")
+        if not account_id:
             raise UserError(_("Please configure at least one Expense account for company %s.") % self.company_id.display_name)
-        return account
+        return self.env["account.account"].browse(account_id)
 
     def _get_default_income_account(self):
-        account = self.env["account.account"].search([
-            ("account_type", "=", "income"),
-            ("company_id", "=", self.company_id.id),
-        ], limit=1)
-        if not account:
+        account_id = self._default_account_id(self.company_id.id, "income")
+        if not account_id:
             raise UserError(_("Please configure at least one Income account for company %s.") % self.company_id.display_name)
-        return account
+        return self.env["account.account"].browse(account_id)
+
+    @api.model
+    @traced("vehicle.refresh_actuals")
+    def _refresh_actuals(self, vehicle_ids=None):
+        """Recompute actual cost / revenue / margin from posted journal items.
+
+        One grouped query over the ``vehicle_id`` index for the given vehicles
+        (all of them when ``vehicle_ids`` is None); only rows whose totals
+        changed are written.
+        """
+        if vehicle_ids is not None:
+            vehicle_ids = [vid for vid in vehicle_ids if vid]
+            if not vehicle_ids:
+                return 0
+        self.env["account.move.line"].flush_model(["vehicle_id", "balance", "account_id", "parent_state"])
+        self.env["account.account"].flush_model(["account_type"])
+        self.flush_model(["actual_cost", "actual_revenue", "actual_margin"])
+        line_filter = "AND l.vehicle_id = ANY(%(ids)s)" if vehicle_ids is not None else ""
+        vehicle_filter = "AND v2.id = ANY(%(ids)s)" if vehicle_ids is not None else ""
+        self.env.cr.execute(f"""
+            WITH totals AS (
+                    SELECT l.vehicle_id,
+                           SUM(l.balance) FILTER (WHERE a.account_type = ANY(%(cost)s)) AS cost,
+                           -SUM(l.balance) FILTER (WHERE a.account_type = ANY(%(revenue)s)) AS revenue
+                      FROM account_move_line l
+                      JOIN account_account a ON a.id = l.account_id
+                     WHERE l.vehicle_id IS NOT NULL AND l.parent_state = 'posted' {line_filter}
+                  GROUP BY l.vehicle_id
+            )
+            UPDATE vin_vehicle v
+               SET actual_cost = COALESCE(t.cost, 0),
+                   actual_revenue = COALESCE(t.revenue, 0),
+                   actual_margin = COALESCE(t.revenue, 0) - COALESCE(t.cost, 0)
+              FROM vin_vehicle v2
+         LEFT JOIN totals t ON t.vehicle_id = v2.id
+             WHERE v.id = v2.id {vehicle_filter}
+               AND (COALESCE(v.actual_cost, 0), COALESCE(v.actual_revenue, 0))
+                   IS DISTINCT FROM (COALESCE(t.cost, 0), COALESCE(t.revenue, 0))
+        """, {"ids": vehicle_ids, "cost": ACTUAL_COST_TYPES, "revenue": ACTUAL_REVENUE_TYPES})
+        updated = self.env.cr.rowcount
+        self.invalidate_model(["actual_cost", "actual_revenue", "actual_margin"])
+        return updated
 
     def action_open_attachments(self):
         self.ensure_one()
@@ -386,13 +666,16 @@ class VinVehicle(models.Model):
         self.ensure_one()
         if self.vendor_bill_id:
             return
+        self._create_vendor_bills()
+
+    def _prepare_vendor_bill_vals(self, expense_account):
+        self.ensure_one()
         if not self.seller_partner_id:
             raise UserError(_("Select a Seller / Counterparty to create a vendor bill."))
         amount = (self.purchase_price or 0.0) + (self.auction_fees or 0.0) + (self.other_fees or 0.0)
         if not amount:
             raise UserError(_("No purchase amounts present (price/fees)."))
-        expense_account = self._get_default_expense_account()
-        move = self.env["account.move"].create({
+        return {
             "move_type": "in_invoice",
             "partner_id": self.seller_partner_id.id,
             "invoice_date": self.purchase_date or fields.Date.context_today(self),
@@ -400,47 +683,172 @@ class VinVehicle(models.Model):
             "invoice_line_ids": [(0, 0, {
                 "name": f"Vehicle {self.vin} purchase & fees",
                 "quantity": 1.0, "price_unit": amount, "account_id": expense_account.id,
+                "vehicle_id": self.id,
             })],
             "invoice_origin": self.name,
+        }
+
+    @traced("vendor_bill.create")
+    def _create_vendor_bills(self, raise_on_error=True):
+        """Create the draft vendor bills of all vehicles without one in a single batch.
+
+        With ``raise_on_error=False`` vehicles that cannot be billed are skipped
+        and returned as ``{vehicle_id: error}``.
+        """
+        errors = {}
+        accounts = {}
+        billed = self.browse()
+        vals_list = []
+        for rec in self.filtered(lambda r: not r.vendor_bill_id):
+            try:
+                if rec.company_id not in accounts:
+                    accounts[rec.company_id] = rec._get_default_expense_account()
+                vals_list.append(rec._prepare_vendor_bill_vals(accounts[rec.company_id]))
+            except UserError as e:
+                if raise_on_error:
+                    raise
+                _logger.info("Vendor bill skipped for %s: %s", rec.display_name, e)
+                errors[rec.id] = e
+                continue
+            billed |= rec
+        if not billed:
+            return errors
+        moves = self.env["account.move"].create(vals_list)
+        for rec, move in zip(billed, moves):
+            rec.vendor_bill_id = move.id
+        billed._message_log_batch({
+            rec.id: _("Vendor Bill created: %s") % (move.name or move.display_name)
+            for rec, move in zip(billed, moves)
         })
-        self.vendor_bill_id = move.id
-        self.message_post(body=_("Vendor Bill created: %s") % (move.name or move.display_name))
+        return errors
 
-    def action_create_customer_invoice(self):
-        """Create a draft customer invoice for this vehicle."""
+    def _customer_invoice_amount(self):
         self.ensure_one()
-        if self.customer_invoice_id:
-            return {"type": "ir.actions.act_window", "res_model": "account.move", "view_mode": "form", "res_id": self.customer_invoice_id.id}
+        return self.sale_price or self.expected_sale_price
 
-        if not self.buyer_partner_id:
-            raise UserError(_("Select a Customer (Buyer) before creating an invoice."))
+    def _prepare_customer_invoice_line_vals(self, income_account):
+        self.ensure_one()
+        return {
+            "name": f"Vehicle {self.make or ''} {self.model or ''} {self.year or ''} — VIN {self.vin}",
+            "quantity": 1.0,
+            "price_unit": self._customer_invoice_amount(),
+            "account_id": income_account.id,
+            "vehicle_id": self.id,
+        }
 
-        amount = self.sale_price or self.expected_sale_price
-        if not amount:
-            raise UserError(_("Set a Sale Price or Expected Sale Price."))
+    def _check_customer_invoice_credit(self):
+        """Hook: validate the credit of the buyers about to be invoiced for these vehicles, all at once."""
+        return True
+
+    def _create_customer_invoices(self):
+        """Create draft customer invoices for the vehicles not invoiced yet.
+
+        Vehicles are grouped by company, buyer and currency into one invoice
+        per group, with one line per vehicle. Returns the new invoices.
+        """
+        to_invoice = self.filtered(lambda r: not r.customer_invoice_id)
+        missing_buyer = to_invoice.filtered(lambda r: not r.buyer_partner_id)
+        if missing_buyer:
+            raise UserError(_("Select a Customer (Buyer) before creating an invoice: %s",
+                              ", ".join(missing_buyer.mapped("display_name"))))
+        missing_price = to_invoice.filtered(lambda r: not r._customer_invoice_amount())
+        if missing_price:
+            raise UserError(_("Set a Sale Price or Expected Sale Price: %s",
+                              ", ".join(missing_price.mapped("display_name"))))
+        if not to_invoice:
+            return self.env["account.move"]
+        with span("customer_invoice.credit_check", self.env.cr,
+                  slow_ms=slow_threshold(self.env, "customer_invoice.credit_check")):
+            to_invoice._check_customer_invoice_credit()
+
+        groups = {}
+        for rec in to_invoice:
+            groups.setdefault((rec.company_id, rec.buyer_partner_id, rec.currency_id), []).append(rec.id)
+        invoice_date = fields.Date.context_today(self)
+        groups = [(key, self.browse(ids)) for key, ids in groups.items()]
+        vals_list = []
+        for (company, partner, currency), vehicles in groups:
+            income_account = vehicles[0]._get_default_income_account()
+            vals_list.append({
+                "move_type": "out_invoice",
+                "company_id": company.id,
+                "partner_id": partner.id,
+                "invoice_date": invoice_date,
+                "currency_id": currency.id,
+                "invoice_line_ids": [(0, 0, rec._prepare_customer_invoice_line_vals(income_account)) for rec in vehicles],
+                "invoice_origin": ", ".join(vehicles.mapped("name")),
+            })
+        with span("customer_invoice.create_moves", self.env.cr,
+                  slow_ms=slow_threshold(self.env, "customer_invoice.create_moves")):
+            moves = self.env["account.move"].with_context(default_move_type="out_invoice").create(vals_list)
+
+        messages = {}
+        prices = {}
+        for (_key, vehicles), move in zip(groups, moves):
+            vehicles.write({"customer_invoice_id": move.id})
+            message = _("Customer Invoice created: %s") % (move.name or move.display_name)
+            for rec in vehicles:
+                messages[rec.id] = message
+                # keep Profit consistent with the invoiced amount
+                amount = rec._customer_invoice_amount()
+                if rec.sale_price != amount:
+                    prices.setdefault(amount, []).append(rec.id)
+        for amount, ids in prices.items():
+            self.browse(ids).write({"sale_price": amount})
+        to_invoice._message_log_batch(messages)
+        return moves
+
+    @traced("customer_invoice.action")
+    def action_create_customer_invoice(self):
+        """Create draft customer invoices for the selected vehicles, one per buyer and currency."""
+        if len(self) == 1 and self.customer_invoice_id:
+            return {"type": "ir.actions.act_window", "res_model": "account.move", "view_mode": "form", "res_id": self.customer_invoice_id.id}
+        moves = self._create_customer_invoices()
+        if len(moves) == 1:
+            return {"type": "ir.actions.act_window", "res_model": "account.move", "view_mode": "form", "res_id": moves.id}
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Customer Invoices"),
+            "res_model": "account.move",
+            "view_mode": "tree,form",
+            "domain": [("id", "in", moves.ids)],
+        }
 
-        income_account = self._get_default_income_account()
-        move = self.env["account.move"].create({
-            "move_type": "out_invoice",
-            "partner_id": self.buyer_partner_id.id,
-            "invoice_date": fields.Date.context_today(self),
-            "currency_id": self.currency_id.id,
-            "invoice_line_ids": [(0, 0, {
-                "name": f"Vehicle {self.make or ''} {self.model or ''} {self.year or ''} — VIN {self.vin}",
-                "quantity": 1.0, "price_unit": amount, "account_id": income_account.id,
-            })],
-            "invoice_origin": self.name,
-        })
-        self.customer_invoice_id = move.id
-        # Optionally set sale_price from created document’s line (keeps Profit consistent)
-        self.sale_price = amount
-        self.message_post(body=_("Customer Invoice created: %s") % (move.name or move.display_name))
-        return {"type": "ir.actions.act_window", "res_model": "account.move", "view_mode": "form", "res_id": move.id}
+    # --- Workflow ---
+    def _transition(self, new_state, quiet=False):
+        """Move the whole recordset to ``new_state`` in one write.
+
+        Every vehicle must be allowed to make the move (see
+        ALLOWED_TRANSITIONS), otherwise nothing changes. Field tracking is
+        replaced by a single batched log entry per vehicle; with ``quiet``
+        (or ``tracking_disable`` in context, as imports do) nothing is logged.
+        """
+        if not self:
+            return True
+        blocked = self.filtered(lambda r: new_state not in ALLOWED_TRANSITIONS.get(r.state or "draft", ()))
+        if blocked:
+            labels = dict(self._fields["state"]._description_selection(self.env))
+            raise UserError(_(
+                "These vehicles cannot be set to %(state)s:\n%(vehicles)s",
+                state=labels[new_state],
+                vehicles="\n".join(
+                    f"{rec.display_name} ({labels.get(rec.state or 'draft')})" for rec in blocked[:20]
+                ) + ("\n..." if len(blocked) > 20 else ""),
+            ))
+        old_states = {rec.id: rec.state or "draft" for rec in self}
+        self.with_context(tracking_disable=True).write({"state": new_state})
+        if not (quiet or self.env.context.get("tracking_disable")):
+            labels = dict(self._fields["state"]._description_selection(self.env))
+            self._message_log_batch({
+                rec.id: _("Status: %(old)s → %(new)s", old=labels[old_states[rec.id]], new=labels[new_state])
+                for rec in self
+            })
+        return True
 
     # State convenience
-    def action_set_state(self, new_state): self.write({"state": new_state})
-    def action_mark_purchased(self): self.action_set_state("purchased")
-    def action_mark_enroute(self): self.action_set_state("enroute")
-    def action_mark_warehouse(self): self.action_set_state("warehouse")
-    def action_mark_shipped(self): self.action_set_state("shipped")
-    def action_mark_delivered(self): self.action_set_state("delivered")
\ No newline at end of file
+    def action_set_state(self, new_state): return self._transition(new_state)
+    def action_mark_purchased(self): return self.action_set_state("purchased")
+    def action_mark_enroute(self): return self.action_set_state("enroute")
+    def action_mark_warehouse(self): return self.action_set_state("warehouse")
+    def action_mark_shipped(self): return self.action_set_state("shipped")
+    def action_mark_delivered(self): return self.action_set_state("delivered")
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+from odoo import _, api, models
+from odoo.exceptions import UserError
+from odoo.tools import SQL, config
+
+from ..tools.metrics import traced
+
+_logger = logging.getLogger(__name__)
+
+FEED_FORMATS = {"jsonl", "csv"}
+FEED_FIELD_TYPES = {"char", "text", "selection", "integer", "float", "monetary", "boolean", "date", "datetime", "many2one"}
+FEED_DEFAULT_FIELDS = [
+    "vin", "year", "make", "model", "trim", "body_type", "exterior_color", "fuel_type", "is_dg",
+    "distance_travelled", "distance_uom", "state", "expected_sale_price", "currency_id", "company_id",
+]
+FEED_CHUNK_SIZE = 1000
+CURSOR_RE = re.compile(r"^(\d{8}T\d{6}\.\d{6})-(\d+)$")
+
+
+def encode_cursor(write_date, record_id):
+    return f"{write_date:%Y%m%dT%H%M%S.%f}-{record_id}"
+
+
+def decode_cursor(cursor):
+    """``(write_date, id)`` of a feed cursor; ``None`` for an empty one."""
+    if not cursor:
+        return None
+    match = CURSOR_RE.match(cursor)
+    if not match:
+        raise UserError(_("Invalid feed cursor: %s", cursor))
+    return datetime.strptime(match[1], "%Y%m%dT%H%M%S.%f"), int(match[2])
+
+
+class VinVehicleFeed(models.AbstractModel):
+    """Inventory export for dealer portals, in keyset pages ordered by ``(write_date, id)``.
+
+    A feed covers the vehicles changed after the ``since`` cursor and before
+    a cut-off, whose cursor is returned for the next call. ``write_date`` is
+    the start time of the writing transaction, not its commit time, so the
+    cut-off is the start of the oldest transaction still in flight: every
+    row dated before it is committed and visible, and rows of transactions
+    that commit later are picked up by the next delta instead of being skipped.
+    """
+    _name = "vin.vehicle.feed"
+    _description = "Vehicle Inventory Feed"
+
+    @api.model
+    def _feed_fields(self, field_names=None):
+        if not field_names:
+            return list(FEED_DEFAULT_FIELDS)
+        Vehicle = self.env["vin.vehicle"]
+        invalid = [
+            name for name in field_names
+            if name not in Vehicle._fields
+            or not Vehicle._fields[name].store or Vehicle._fields[name].type not in FEED_FIELD_TYPES
+        ]
+        if invalid:
+            raise UserError(_("These fields cannot be exported in the inventory feed: %s", ", ".join(invalid)))
+        return [name for name in dict.fromkeys(field_names) if name not in ("id", "write_date")]
+
+    @api.model
+    def _feed_token_fields(self):
+        """Fields that token callers may export: ``vintrade.feed_token_fields``, comma-separated."""
+        param = self.env["ir.config_parameter"].sudo().get_param("vintrade.feed_token_fields")
+        if not param:
+            return list(FEED_DEFAULT_FIELDS)
+        return self._feed_fields([name.strip() for name in param.split(",") if name.strip()])
+
+    @api.model
+    def _feed_until(self):
+        # transactions of the other sessions on this database; ours only ever sees its own rows
+        self.env.cr.execute("""
+            SELECT LEAST(MIN(xact_start), statement_timestamp()) AT TIME ZONE 'UTC'
+              FROM pg_stat_activity
+             WHERE datname = current_database() AND pid <> pg_backend_pid() AND xact_start IS NOT NULL
+        """)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _feed_pages(self, since, until, field_names, domain=None, chunk_size=FEED_CHUNK_SIZE):
+        """Yield lists of vehicle dicts with ``since < (write_date, id)`` and ``write_date < until``.
+
+        Each page is a keyset query on the ``(write_date, id)`` index followed
+        by a read of the requested columns; the cache is dropped between pages
+        so memory does not grow with the size of the feed.
+        """
+        Vehicle = self.env["vin.vehicle"]
+        types = {name: Vehicle._fields[name].type for name in field_names}
+        after = decode_cursor(since)
+        while True:
+            query = Vehicle._search(domain or [], order="write_date, id", limit=chunk_size)
+            query.add_where(SQL("vin_vehicle.write_date < %s", until))
+            if after:
+                query.add_where(SQL("(vin_vehicle.write_date, vin_vehicle.id) > (%s, %s)", *after))
+            self.env.cr.execute(query.select(SQL("vin_vehicle.id"), SQL("vin_vehicle.write_date")))
+            keys = self.env.cr.fetchall()
+            if not keys:
+                return
+            rows = {row["id"]: row for row in Vehicle.browse([key[0] for key in keys]).read(field_names)}
+            page = []
+            for record_id, write_date in keys:
+                row = rows[record_id]
+                values = {"id": record_id, "write_date": write_date}
+                for name, ftype in types.items():
+                    value = row[name]
+                    if value is False and ftype != "boolean":
+                        value = None
+                    values[name] = value
+                page.append(values)
+            yield page
+            after = keys[-1]
+            self.env.invalidate_all()
+            if len(keys) < chunk_size:
+                return
+
+    @api.model
+    @traced("vehicle.feed_export")
+    def _export(self, fileobj, fmt="jsonl", since=None, field_names=None, domain=None, compress=True):
+        """Write the feed to the binary ``fileobj``; return ``(next_cursor, row_count)``."""
+        if fmt not in FEED_FORMATS:
+            raise UserError(_("Unsupported feed format: %s", fmt))
+        field_names = self._feed_fields(field_names)
+        until = self._feed_until()
+        out = gzip.GzipFile(fileobj=fileobj, mode="wb", mtime=0) if compress else fileobj
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        count = 0
+        if fmt == "csv":
+            writer = csv.writer(text)
+            writer.writerow(["id", "write_date", *field_names])
+        for page in self._feed_pages(since, until, field_names, domain):
+            for values in page:
+                if fmt == "jsonl":
+                    text.write(json.dumps(values, default=str, separators=(",", ":")) + "\n")
+                else:
+                    writer.writerow([
+                        value[1] if isinstance(value, tuple) else ("" if value is None else value)
+                        for value in values.values()
+                    ])
+            count += len(page)
+        text.flush()
+        text.detach()
+        if compress:
+            out.close()
+        return encode_cursor(until, 0), count
+
+    @api.model
+    def _feed_directory(self):
+        return self.env["ir.config_parameter"].sudo().get_param("vintrade_vehicle.feed_path") or os.path.join(
+            config["data_dir"], "vintrade_feed", self.env.cr.dbname)
+
+    @api.model
+    def _cron_write_feed(self):
+        """Write the vehicles changed since the last run to a new ``.jsonl.gz`` file.
+
+        The first run (no ``vintrade_vehicle.feed_cursor``) writes the full
+        inventory. Files older than ``vintrade_vehicle.feed_keep_days`` are removed.
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        directory = self._feed_directory()
+        os.makedirs(directory, exist_ok=True)
+        since = ICP.get_param("vintrade_vehicle.feed_cursor") or None
+        stamp = f"{self.env.cr.now():%Y%m%dT%H%M%S}"
+        path = os.path.join(directory, f"vin_inventory_{stamp}.jsonl.gz")
+        with open(path + ".part", "wb") as fileobj:
+            cursor, count = self.sudo()._export(fileobj, "jsonl", since=since)
+        if count:
+            os.replace(path + ".part", path)
+            _logger.info("Inventory feed: %s vehicles written to %s", count, path)
+        else:
+            os.unlink(path + ".part")
+        ICP.set_param("vintrade_vehicle.feed_cursor", cursor)
+
+        keep_days = int(ICP.get_param("vintrade_vehicle.feed_keep_days", 7))
+        cutoff = time.time() - keep_days * 86400
+        for name in os.listdir(directory):
+            full = os.path.join(directory, name)
+            if name.startswith("vin_inventory_") and os.path.getmtime(full) < cutoff:
+                os.unlink(full)
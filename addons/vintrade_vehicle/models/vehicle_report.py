@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+COST_BUCKETS = [
+    ("0_5k", "< 5k"), ("5k_10k", "5k - 10k"), ("10k_20k", "10k - 20k"),
+    ("20k_40k", "20k - 40k"), ("40k_plus", "40k +"),
+]
+AGE_BUCKETS = [
+    ("0_30", "0 - 30 days"), ("31_60", "31 - 60 days"), ("61_90", "61 - 90 days"), ("90_plus", "90 + days"),
+]
+
+
+class VinVehicleReport(models.Model):
+    """Vehicle profitability and inventory, read from a materialized view.
+
+    The view is a snapshot of vin_vehicle taken at the last refresh (hourly
+    cron or the Refresh menu), so dashboards never touch the operational table.
+    """
+    _name = "vin.vehicle.report"
+    _description = "Vehicle Profitability Report"
+    _auto = False
+    _rec_name = "vehicle_id"
+    _order = "purchase_date desc, id desc"
+
+    vehicle_id = fields.Many2one("vin.vehicle", string="Vehicle", readonly=True)
+    vin = fields.Char("VIN", readonly=True)
+    company_id = fields.Many2one("res.company", string="Company", readonly=True)
+    currency_id = fields.Many2one("res.currency", string="Currency", readonly=True)
+    company_currency_id = fields.Many2one("res.currency", string="Company Currency", readonly=True)
+    make = fields.Char("Make", readonly=True)
+    model = fields.Char("Model", readonly=True)
+    year = fields.Char("Year", readonly=True)
+    state = fields.Selection(
+        [
+            ("draft", "Draft"), ("purchased", "Purchased"), ("enroute", "En Route"),
+            ("warehouse", "At Warehouse"), ("shipped", "Shipped"),
+            ("delivered", "Delivered"), ("cancelled", "Cancelled"),
+        ],
+        string="Status", readonly=True,
+    )
+    buyer_partner_id = fields.Many2one("res.partner", string="Customer (Buyer)", readonly=True)
+    purchase_date = fields.Date("Purchase Date", readonly=True)
+    invoice_date = fields.Date("Invoice Date", readonly=True)
+    in_inventory = fields.Boolean("In Inventory", readonly=True, help="Purchased and not delivered, invoiced or cancelled.")
+
+    total_cost = fields.Monetary("Total Cost", currency_field="currency_id", readonly=True)
+    repair_estimate = fields.Monetary("Repair Estimate", currency_field="currency_id", readonly=True)
+    sale_amount = fields.Monetary("Sale Amount", currency_field="currency_id", readonly=True,
+                                  help="Actual sale price, or the expected one while unsold.")
+    profit = fields.Monetary("Profit", currency_field="currency_id", readonly=True)
+    margin_pct = fields.Float("Margin (%)", readonly=True, group_operator="avg")
+    actual_cost = fields.Monetary("Actual Cost", currency_field="company_currency_id", readonly=True,
+                                  help="Posted expense journal items linked to the vehicle.")
+    actual_revenue = fields.Monetary("Actual Revenue", currency_field="company_currency_id", readonly=True,
+                                     help="Posted income journal items linked to the vehicle.")
+    actual_margin = fields.Monetary("Actual Margin", currency_field="company_currency_id", readonly=True)
+    days_in_inventory = fields.Integer("Days in Inventory", readonly=True, group_operator="avg",
+                                       help="Purchase date to invoice date, or to the last refresh while unsold.")
+    cost_bucket = fields.Selection(COST_BUCKETS, string="Cost Bucket", readonly=True)
+    age_bucket = fields.Selection(AGE_BUCKETS, string="Age Bucket", readonly=True)
+
+    def _select(self):
+        return """
+            v.id AS id,
+            v.id AS vehicle_id,
+            v.vin,
+            v.company_id,
+            v.currency_id,
+            c.currency_id AS company_currency_id,
+            v.make,
+            v.model,
+            v.year,
+            v.state,
+            v.buyer_partner_id,
+            v.purchase_date,
+            inv.invoice_date,
+            (v.purchase_date IS NOT NULL AND inv.invoice_date IS NULL
+                AND COALESCE(v.state, 'draft') NOT IN ('delivered', 'cancelled')) AS in_inventory,
+            COALESCE(v.total_cost, 0) AS total_cost,
+            COALESCE(v.repair_estimate, 0) AS repair_estimate,
+            COALESCE(NULLIF(v.sale_price, 0), v.expected_sale_price, 0) AS sale_amount,
+            COALESCE(v.profit, 0) AS profit,
+            CASE WHEN COALESCE(NULLIF(v.sale_price, 0), v.expected_sale_price, 0) <> 0
+                 THEN 100.0 * COALESCE(v.profit, 0) / COALESCE(NULLIF(v.sale_price, 0), v.expected_sale_price)
+            END AS margin_pct,
+            COALESCE(v.actual_cost, 0) AS actual_cost,
+            COALESCE(v.actual_revenue, 0) AS actual_revenue,
+            COALESCE(v.actual_margin, 0) AS actual_margin,
+            COALESCE(inv.invoice_date, CURRENT_DATE) - v.purchase_date AS days_in_inventory,
+            CASE
+                WHEN COALESCE(v.total_cost, 0) < 5000 THEN '0_5k'
+                WHEN v.total_cost < 10000 THEN '5k_10k'
+                WHEN v.total_cost < 20000 THEN '10k_20k'
+                WHEN v.total_cost < 40000 THEN '20k_40k'
+                ELSE '40k_plus'
+            END AS cost_bucket,
+            CASE
+                WHEN v.purchase_date IS NULL THEN NULL
+                WHEN COALESCE(inv.invoice_date, CURRENT_DATE) - v.purchase_date <= 30 THEN '0_30'
+                WHEN COALESCE(inv.invoice_date, CURRENT_DATE) - v.purchase_date <= 60 THEN '31_60'
+                WHEN COALESCE(inv.invoice_date, CURRENT_DATE) - v.purchase_date <= 90 THEN '61_90'
+                ELSE '90_plus'
+            END AS age_bucket
+        """
+
+    def _from(self):
+        return """
+            vin_vehicle v
+            JOIN res_company c ON c.id = v.company_id
+            LEFT JOIN account_move inv ON inv.id = v.customer_invoice_id AND inv.state = 'posted'
+        """
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self._table}")
+        cr.execute(f"DROP VIEW IF EXISTS {self._table}")
+        cr.execute(f"""
+            CREATE MATERIALIZED VIEW {self._table} AS
+            SELECT {self._select()}
+              FROM {self._from()}
+        """)
+        # the unique index is what allows REFRESH ... CONCURRENTLY
+        cr.execute(f"CREATE UNIQUE INDEX {self._table}_id_uniq ON {self._table} (id)")
+        cr.execute(f"CREATE INDEX {self._table}_company_state_idx ON {self._table} (company_id, state)")
+        cr.execute(f"CREATE INDEX {self._table}_make_model_idx ON {self._table} (make, model)")
+        cr.execute(f"CREATE INDEX {self._table}_purchase_date_idx ON {self._table} (purchase_date)")
+        cr.execute(f"CREATE INDEX {self._table}_inventory_idx ON {self._table} (company_id) WHERE in_inventory")
+
+    @api.model
+    def _refresh(self):
+        """Rebuild the snapshot without blocking readers of the current one."""
+        self.env["vin.vehicle"].flush_model()
+        self.env["account.move"].flush_model(["state", "invoice_date"])
+        self.env.cr.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}")
+        self.invalidate_model()
+        self.env["ir.config_parameter"].sudo().set_param(
+            "vintrade_vehicle.vehicle_report_refreshed_at", fields.Datetime.to_string(fields.Datetime.now()))
+        _logger.info("Vehicle profitability report refreshed")
+
+    @api.model
+    def action_refresh(self):
+        self._refresh()
+        return {
+            "type": "ir.actions.client",
+            "tag": "reload",
+        }
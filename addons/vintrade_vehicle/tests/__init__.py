@@ -0,0 +1,4 @@
+from . import test_decode_cache
+from . import test_decode_queue
+from . import test_offline_decoder
+from . import test_perf_vehicle
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""Shared pieces of the vintrade performance suites.
+
+* ``VinTradeDataGenerator`` builds deterministic data sets (same seed, same data).
+* ``VinTradeBenchCase`` measures query counts and wall time per scale and
+  writes every measurement to a JSON file so runs can be compared.
+* ``vpic_stub`` answers vPIC calls locally, with results derived from the VIN.
+
+Scales come from ``VINTRADE_BENCH_SCALES`` (default ``1000``; e.g.
+``1000,10000,100000``) and the JSON goes to ``VINTRADE_BENCH_OUTPUT``
+(default ``vintrade_bench_<db>.json`` in the temp directory). Run with::
+
+    odoo-bin -d <db> -i vintrade_ledger --test-tags vintrade_perf --stop-after-init
+"""
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+from ..tools.vin import _vin_check_digit
+
+_logger = logging.getLogger(__name__)
+
+VIN_ALPHABET = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+MAKES = [("1HG", "HONDA", ["CIVIC", "ACCORD", "CR-V"]), ("1FT", "FORD", ["F-150", "ESCAPE", "EXPLORER"]),
+         ("5YJ", "TESLA", ["MODEL 3", "MODEL Y"]), ("JTD", "TOYOTA", ["COROLLA", "PRIUS", "RAV4"]),
+         ("WBA", "BMW", ["330I", "X5"])]
+
+
+def bench_scales():
+    return [int(s) for s in os.environ.get("VINTRADE_BENCH_SCALES", "1000").split(",") if s.strip()]
+
+
+class VinTradeDataGenerator:
+    """Deterministic vehicles, partners, wallet moves and receivable lines."""
+
+    def __init__(self, env, seed=17):
+        self.env = env
+        self.rng = random.Random(seed)
+        self._vins = set()
+
+    def vins(self, count):
+        """``count`` new VINs with a valid check digit, never repeated within this generator."""
+        vins = []
+        while len(vins) < count:
+            wmi, _make, _models = self.rng.choice(MAKES)
+            body = list(wmi) + [self.rng.choice(VIN_ALPHABET) for _i in range(14)]
+            body[8] = "0"
+            body[8] = _vin_check_digit("".join(body))
+            vin = "".join(body)
+            if vin not in self._vins:
+                self._vins.add(vin)
+                vins.append(vin)
+        return vins
+
+    def partners(self, count, **vals):
+        return self.env["res.partner"].create([
+            dict({"name": f"Bench Customer {self.rng.randrange(10 ** 9):09d}", "customer_rank": 1}, **vals)
+            for _i in range(count)
+        ])
+
+    def vehicle_vals(self, count, company, buyers=None, sellers=None):
+        vals_list = []
+        for vin in self.vins(count):
+            price = round(self.rng.uniform(2000, 45000), 2)
+            vals = {
+                "vin": vin,
+                "company_id": company.id,
+                "currency_id": company.currency_id.id,
+                "year": str(self.rng.randint(2005, 2024)),
+                "purchase_date": date(2024, 1, 1) + timedelta(days=self.rng.randrange(365)),
+                "purchase_price": price,
+                "auction_fees": round(price * 0.08, 2),
+                "expected_sale_price": round(price * self.rng.uniform(1.05, 1.4), 2),
+            }
+            if buyers:
+                vals["buyer_partner_id"] = self.rng.choice(buyers.ids)
+            if sellers:
+                vals["seller_partner_id"] = self.rng.choice(sellers.ids)
+            vals_list.append(vals)
+        return vals_list
+
+    def vehicles(self, count, company, **kwargs):
+        Vehicle = self.env["vin.vehicle"].with_context(
+            tracking_disable=True, mail_create_nolog=True, mail_create_nosubscribe=True)
+        return Vehicle.create(self.vehicle_vals(count, company, **kwargs))
+
+    def wallet_moves(self, partners, per_partner, company):
+        return self.env["vin.wallet.move"].create([
+            {
+                "partner_id": partner.id,
+                "company_id": company.id,
+                "date": date(2024, 1, 1) + timedelta(days=self.rng.randrange(365)),
+                "amount": round(self.rng.uniform(-500, 1500), 2),
+                "note": "bench",
+            }
+            for partner in partners for _i in range(per_partner)
+        ])
+
+    def receivable_entries(self, partners, per_partner, company_data):
+        """Posted journal entries with one receivable line per partner and entry."""
+        company = company_data["company"]
+        moves = self.env["account.move"].create([
+            {
+                "move_type": "entry",
+                "company_id": company.id,
+                "journal_id": company_data["default_journal_misc"].id,
+                "date": date(2024, 1, 1) + timedelta(days=self.rng.randrange(365)),
+                "line_ids": [
+                    (0, 0, {"partner_id": partner.id, "account_id": company_data["default_account_receivable"].id,
+                            "debit": amount, "credit": 0.0}),
+                    (0, 0, {"account_id": company_data["default_account_revenue"].id,
+                            "debit": 0.0, "credit": amount}),
+                ],
+            }
+            for partner in partners for amount in
+            (round(self.rng.uniform(100, 5000), 2) for _i in range(per_partner))
+        ])
+        moves.action_post()
+        return moves
+
+
+def vpic_stub(url, data=None, timeout=10, max_rps=0):
+    """Stand-in for tools.vpic.vpic_request: deterministic results, no network."""
+    vins = data["data"].split(";") if data else [url.rstrip("/").split("?")[0].rsplit("/", 1)[-1]]
+    results = []
+    for vin in vins:
+        make, models = next(((m, ms) for wmi, m, ms in MAKES if vin.startswith(wmi)), ("GENERIC", ["MODEL"]))
+        results.append({
+            "VIN": vin, "ErrorCode": "0", "Make": make,
+            "Model": models[sum(map(ord, vin)) % len(models)], "ModelYear": str(2000 + sum(map(ord, vin)) % 25),
+            "BodyClass": "Sedan/Saloon", "FuelTypePrimary": "Gasoline", "Manufacturer": make,
+            "PlantCountry": "UNITED STATES (USA)", "EngineCylinders": "4", "DisplacementL": "2.0",
+        })
+    return {"Count": len(results), "Results": results}
+
+
+class VinTradeBenchCase(AccountTestInvoicingCommon):
+    """Base class: company with a chart of accounts, vPIC stubbed, results collected as JSON."""
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.company = cls.company_data["company"]
+        cls.generator = VinTradeDataGenerator(cls.env)
+        cls.results = []
+        cls.startClassPatcher(patch("odoo.addons.vintrade_vehicle.models.vehicle.vpic_request", vpic_stub))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._write_results()
+        super().tearDownClass()
+
+    @classmethod
+    def _write_results(cls):
+        if not cls.results:
+            return
+        path = os.environ.get("VINTRADE_BENCH_OUTPUT") or os.path.join(
+            tempfile.gettempdir(), f"vintrade_bench_{cls.env.cr.dbname}.json")
+        existing = []
+        if os.path.exists(path):
+            with open(path) as f:
+                existing = json.load(f)
+        with open(path, "w") as f:
+            json.dump(existing + cls.results, f, indent=2)
+        _logger.info("vintrade benchmark: %s measurements written to %s", len(cls.results), path)
+
+    @contextmanager
+    def measure(self, case, scale, budget):
+        """Time the block, record its query count, and fail if it exceeds ``budget``.
+
+        ``budget`` is ``(fixed, per_1000)``: the allowed queries are
+        ``fixed + per_1000 * scale / 1000``, so an N+1 regression trips it.
+        """
+        fixed, per_1000 = budget
+        allowed = int(fixed + per_1000 * scale / 1000)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries_before = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        with self.assertQueryCount(allowed):
+            yield
+        seconds = time.perf_counter() - start
+        queries = self.env.cr.sql_log_count - queries_before
+        self.results.append({
+            "suite": type(self).__name__,
+            "case": case,
+            "scale": scale,
+            "queries": queries,
+            "query_budget": allowed,
+            "seconds": round(seconds, 4),
+            "ms_per_record": round(1000 * seconds / scale, 4) if scale else None,
+        })
+        _logger.info("bench %-36s n=%-7s %6s queries %9.3fs", case, scale, queries, seconds)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from .common import VinTradeDataGenerator
+
+
+@tagged("post_install", "-at_install")
+class TestDecodeCache(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Cache = cls.env["vin.decode.cache"]
+        # the size bound applies to the whole table
+        cls.Cache.search([]).unlink()
+        cls.vin_a, cls.vin_b, cls.vin_c = VinTradeDataGenerator(cls.env).vins(3)
+        # a failed decode only fills the VIN tier, which keeps the entry counts simple
+        cls.Cache._store_many({vin: {"VIN": vin, "ErrorCode": "1"} for vin in (cls.vin_a, cls.vin_b, cls.vin_c)})
+
+    def _set_times(self, vin, fetched_days, hit_days=None):
+        now = fields.Datetime.now()
+        last_hit_at = now - timedelta(days=hit_days) if hit_days is not None else None
+        self.env.cr.execute("""
+            UPDATE vin_decode_cache SET fetched_at = %s, last_hit_at = %s WHERE kind = 'vin' AND key = %s
+        """, (now - timedelta(days=fetched_days), last_hit_at, vin))
+        self.Cache.invalidate_model()
+
+    def _keys(self):
+        return set(self.Cache.search([]).mapped("key"))
+
+    def test_expired_entries(self):
+        self._set_times(self.vin_a, fetched_days=31)
+        self.assertEqual(set(self.Cache._lookup_many([self.vin_a, self.vin_b])), {self.vin_b})
+        self.Cache._gc_cache()
+        self.assertEqual(self._keys(), {self.vin_b, self.vin_c})
+
+    def test_ttl_setting(self):
+        self._set_times(self.vin_a, fetched_days=3)
+        self.env["ir.config_parameter"].sudo().set_param("vintrade_vehicle.decode_cache_ttl_days", 2)
+        self.assertIsNone(self.Cache._lookup(self.vin_a))
+        self.Cache._gc_cache()
+        self.assertEqual(self._keys(), {self.vin_b, self.vin_c})
+
+    def test_least_recently_used_evicted(self):
+        self.env["ir.config_parameter"].sudo().set_param("vintrade_vehicle.decode_cache_max_entries", 2)
+        self._set_times(self.vin_a, fetched_days=5, hit_days=0.1)
+        self._set_times(self.vin_b, fetched_days=2)
+        self._set_times(self.vin_c, fetched_days=10, hit_days=6)
+        # a hit moves the entry to the front
+        self.assertTrue(self.Cache._lookup(self.vin_c))
+        self.Cache._gc_cache()
+        self.assertEqual(self._keys(), {self.vin_a, self.vin_c})
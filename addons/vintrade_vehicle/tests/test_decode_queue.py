@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from .common import VinTradeDataGenerator
+
+
+@tagged("post_install", "-at_install")
+class TestDecodeQueueBreaker(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Queue = cls.env["vin.decode.queue"]
+        cls.ICP = cls.env["ir.config_parameter"].sudo()
+        cls.vehicles = VinTradeDataGenerator(cls.env).vehicles(3, cls.env.company)
+        # one batch per cron run: only the jobs of these vehicles
+        cls.Queue.search([("vehicle_id", "not in", cls.vehicles.ids)]).unlink()
+        cls.ICP.set_param("vintrade_vehicle.vpic_breaker_threshold", 3)
+
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+        self.vpic_down = False
+        self.error = None
+
+        def decode(records, vins, offline_fallback=True):
+            self.calls += 1
+            self.assertFalse(offline_fallback)
+            if self.vpic_down:
+                raise UserError("Could not reach NHTSA decode service")
+            if self.error:
+                raise self.error
+            return {}
+
+        self.patch(type(self.env["vin.vehicle"]), "_nhtsa_decode_batch", decode)
+
+    def _run(self):
+        self.Queue.search([("vehicle_id", "in", self.vehicles.ids)]).write({
+            "state": "pending", "attempts": 0, "next_attempt_at": fields.Datetime.now() - timedelta(minutes=1),
+        })
+        self.Queue._cron_process()
+
+    def _open_until(self, **delta):
+        self.ICP.set_param("vintrade_vehicle.vpic_breaker_open_until",
+                           fields.Datetime.to_string(fields.Datetime.now() + timedelta(**delta)))
+
+    def test_failures_counted_across_runs(self):
+        self.vpic_down = True
+        for failures in (1, 2):
+            self._run()
+            self.assertEqual(self.Queue._breaker_failures(), failures)
+            self.assertFalse(self.Queue._breaker_open_until())
+        self._run()
+        self.assertGreater(self.Queue._breaker_open_until(), fields.Datetime.now())
+
+    def test_success_resets_count(self):
+        self.vpic_down = True
+        self._run()
+        self._run()
+        self.vpic_down = False
+        self._run()
+        self.assertEqual(self.Queue._breaker_failures(), 0)
+
+    def test_open_breaker_leaves_queue(self):
+        self._open_until(minutes=5)
+        self._run()
+        self.assertEqual(self.calls, 0)
+
+    def test_half_open_probe_fails(self):
+        self.ICP.set_param("vintrade_vehicle.vpic_breaker_failures", 3)
+        self._open_until(minutes=-1)
+        self.vpic_down = True
+        self._run()
+        self.assertEqual(self.calls, 1)
+        self.assertGreater(self.Queue._breaker_open_until(), fields.Datetime.now())
+
+    def test_half_open_probe_closes(self):
+        self.ICP.set_param("vintrade_vehicle.vpic_breaker_failures", 3)
+        self._open_until(minutes=-1)
+        self._run()
+        self.assertFalse(self.Queue._breaker_open_until())
+        self.assertEqual(self.Queue._breaker_failures(), 0)
+
+    def test_other_errors_leave_breaker(self):
+        self.error = ValueError("boom")
+        self._run()
+        self.assertEqual(self.Queue._breaker_failures(), 0)
+        jobs = self.Queue.search([("vehicle_id", "in", self.vehicles.ids)])
+        self.assertEqual(jobs.mapped("attempts"), [1, 1, 1])
+        self.assertEqual(set(jobs.mapped("last_error")), {"boom"})
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestOfflineDecoder(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env["vin.offline.wmi"].search([("wmi", "=", "XZZ")]).unlink()
+        cls.env["vin.offline.wmi"].create({"wmi": "XZZ", "manufacturer": "Test Motors", "make": "TESTMAKE"})
+        cls.env["vin.offline.pattern"].create({
+            "wmi": "XZZ", "vds_pattern": "AB1**", "year_from": 2000, "year_to": 2009, "model": "Roadster",
+        })
+        cls.env.registry.clear_cache()
+        cls.known = "XZZAB123X3A000001"
+        cls.wmi_only = "XZZQQ999X3A000002"
+        cls.Vehicle = cls.env["vin.vehicle"]
+
+    def setUp(self):
+        super().setUp()
+        self.fetched = []
+
+        def fetch_batch(records, vins):
+            self.fetched += vins
+            return [{"VIN": vin, "ErrorCode": "0", "Make": "VPIC"} for vin in vins]
+
+        self.patch(type(self.Vehicle), "_nhtsa_fetch_batch", fetch_batch)
+
+    def _decode(self, mode):
+        self.env.company.vin_decode_mode = mode
+        return self.Vehicle._nhtsa_decode_batch([self.known, self.wmi_only])
+
+    def test_offline_first_asks_vpic_for_manufacturer_only_matches(self):
+        results = self._decode("offline_first")
+        self.assertEqual(self.fetched, [self.wmi_only])
+        self.assertEqual(results[self.known]["Model"], "Roadster")
+        self.assertEqual(results[self.wmi_only]["Make"], "VPIC")
+
+    def test_offline_keeps_manufacturer_only_matches(self):
+        results = self._decode("offline")
+        self.assertFalse(self.fetched)
+        self.assertEqual(results[self.wmi_only]["Make"], "TESTMAKE")
+        self.assertNotIn("Model", results[self.wmi_only])
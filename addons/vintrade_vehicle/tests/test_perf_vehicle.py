@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import io
+from datetime import timedelta
+
+from odoo.tests import tagged
+
+from ..models.vehicle_feed import encode_cursor
+from .common import VinTradeBenchCase, bench_scales
+
+
+@tagged("post_install", "-at_install", "-standard", "vintrade_perf")
+class TestVehiclePerformance(VinTradeBenchCase):
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.buyers = cls.generator.partners(20)
+        cls.sellers = cls.generator.partners(5)
+
+    def test_vehicle_create(self):
+        Vehicle = self.env["vin.vehicle"].with_context(
+            tracking_disable=True, mail_create_nolog=True, mail_create_nosubscribe=True)
+        for scale in bench_scales():
+            vals_list = self.generator.vehicle_vals(scale, self.company, buyers=self.buyers, sellers=self.sellers)
+            with self.measure("vehicle.create", scale, (60, 40)):
+                vehicles = Vehicle.create(vals_list)
+            self.assertEqual(len(vehicles), scale)
+            self.assertTrue(all(vehicles.mapped("vin_ok")))
+
+    def test_vehicle_write(self):
+        for scale in bench_scales():
+            vehicles = self.generator.vehicles(scale, self.company)
+            with self.measure("vehicle.write (price)", scale, (20, 20)):
+                vehicles.write({"repair_estimate": 250.0})
+            with self.measure("vehicle._transition", scale, (30, 20)):
+                vehicles._transition("purchased")
+            self.assertEqual(set(vehicles.mapped("state")), {"purchased"})
+
+    def test_vehicle_list_read(self):
+        fields = ["name", "vin", "vin_ok", "year", "make", "model", "state", "decode_state",
+                  "total_cost", "profit", "attachment_count"]
+        for scale in bench_scales():
+            self.generator.vehicles(scale, self.company)
+            Vehicle = self.env["vin.vehicle"]
+            with self.measure("vehicle list page (80 rows)", scale, (15, 0)):
+                Vehicle.web_search_read([], {f: {} for f in fields}, limit=80)
+            with self.measure("vehicle read all + counters", scale, (15, 5)):
+                Vehicle.search([]).read(fields)
+            with self.measure("vehicle read_group by make", scale, (10, 0)):
+                Vehicle.read_group([], ["profit:sum", "total_cost:sum"], ["make", "state"], lazy=False)
+
+    def test_vehicle_scan_lookup(self):
+        Vehicle = self.env["vin.vehicle"]
+        for scale in bench_scales():
+            vehicles = self.generator.vehicles(scale, self.company, buyers=self.buyers)
+            vins = set(vehicles[:200].mapped("vin"))
+            with self.measure("scanner lookup (200 VINs)", scale, (5, 0)):
+                found = Vehicle._scan_lookup(vins)
+            self.assertEqual(set(found), vins)
+
+    def test_vehicle_feed(self):
+        Feed = self.env["vin.vehicle.feed"]
+        # the delta rows below are dated in the future: move the cut-off past them
+        self.patch(type(Feed), "_feed_until", lambda self: self.env.cr.now() + timedelta(hours=2))
+        for scale in bench_scales():
+            vehicles = self.generator.vehicles(scale, self.company)
+            with self.measure("inventory feed full (jsonl.gz)", scale, (10, 8)):
+                _cursor, count = Feed._export(io.BytesIO(), "jsonl")
+            self.assertGreaterEqual(count, scale)
+            changed = vehicles[:300]
+            self.env.cr.execute("UPDATE vin_vehicle SET write_date = now() at time zone 'UTC' + interval '1 hour'"
+                                " WHERE id = ANY(%s)", (changed.ids,))
+            since = encode_cursor(self.env.cr.now() + timedelta(minutes=30), 0)
+            with self.measure("inventory feed delta (300 rows, csv)", scale, (10, 0)):
+                _cursor, count = Feed._export(io.BytesIO(), "csv", since=since, field_names=["vin", "state"],
+                                             domain=[("company_id", "=", self.company.id)])
+            self.assertGreaterEqual(count, len(changed))
+
+    def test_vehicle_actuals(self):
+        for scale in bench_scales():
+            vehicles = self.generator.vehicles(scale, self.company, sellers=self.sellers)
+            vehicles._create_vendor_bills()
+            with self.measure("vendor bills post + ledger actuals", scale, (150, 300)):
+                vehicles.vendor_bill_id.action_post()
+            self.assertTrue(all(vehicles.mapped("actual_cost")))
+            self.assertEqual(vehicles.mapped("actual_margin"), [-cost for cost in vehicles.mapped("actual_cost")])
+            with self.measure("ledger actuals rebuild", scale, (5, 0)):
+                self.env["vin.vehicle"]._refresh_actuals()
+
+    def test_vehicle_decode_queue(self):
+        Queue = self.env["vin.decode.queue"]
+        for scale in bench_scales():
+            vehicles = self.generator.vehicles(scale, self.company)
+            self.assertEqual(Queue.search_count([("vehicle_id", "in", vehicles.ids)]), scale)
+            Queue.search([("vehicle_id", "not in", vehicles.ids)]).unlink()
+            with self.measure("decode queue (vPIC stub)", scale, (30, 120)):
+                Queue._cron_process(limit=scale)
+            self.assertEqual(set(vehicles.mapped("decode_state")), {"done"})
+
+    def test_vehicle_customer_invoices(self):
+        for scale in bench_scales():
+            vehicles = self.generator.vehicles(scale, self.company, buyers=self.buyers)
+            with self.measure("action_create_customer_invoice", scale, (150, 300)):
+                vehicles.action_create_customer_invoice()
+            self.assertTrue(all(vehicles.mapped("customer_invoice_id")))
+            self.assertLessEqual(len(vehicles.customer_invoice_id), len(self.buyers))
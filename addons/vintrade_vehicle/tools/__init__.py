@@ -0,0 +1,3 @@
+from . import vin
+from . import vpic
+from . import metrics
\ No newline at end of file
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmark: per-record VIN validation vs. validate_vins().
+
+Runs without Odoo::
+
+    python addons/vintrade_vehicle/tools/bench_vin_validation.py --count 100000
+"""
+import argparse
+import importlib.util
+import os
+import random
+import re
+import time
+
+_spec = importlib.util.spec_from_file_location("vin", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vin.py"))
+vin_tools = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vin_tools)
+
+ALPHABET = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+
+
+def make_vins(count, seed=17, invalid_ratio=0.05):
+    rng = random.Random(seed)
+    vins = []
+    for _i in range(count):
+        body = [rng.choice(ALPHABET) for _j in range(17)]
+        body[8] = "0"
+        body[8] = vin_tools._vin_check_digit("".join(body))
+        if rng.random() < invalid_ratio:
+            body[8] = "X" if body[8] != "X" else "1"
+        vins.append("".join(body))
+    return vins
+
+
+def per_record(vins):
+    """The former _compute_vin_ok + _check_vin bodies, one VIN at a time."""
+    results = []
+    for vin in vins:
+        ok = False
+        if vin and len(vin.strip()) == 17:
+            v = vin.strip().upper()
+            if not any(ch in vin_tools.VIN_FORBIDDEN for ch in v):
+                ok = vin_tools._vin_check_digit(v) == v[8]
+        v = vin.strip().upper()
+        if len(v) == 17 and not any(ch in vin_tools.VIN_FORBIDDEN for ch in v):
+            re.match(r"^[A-HJ-NPR-Z0-9]{17}$", v)
+            vin_tools._vin_check_digit(v)
+        results.append(ok)
+    return results
+
+
+def timed(label, func, vins, repeat):
+    best = min(_run(func, vins) for _i in range(repeat))
+    print(f"{label:<28} {best * 1000:9.1f} ms   {len(vins) / best:12,.0f} VIN/s")
+    return best
+
+
+def _run(func, vins):
+    start = time.perf_counter()
+    func(vins)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    vins = make_vins(args.count)
+    expected = per_record(vins)
+    assert [code is None for code in vin_tools.validate_vins(vins, check_duplicates=False)] == expected
+
+    print(f"{args.count:,} VINs, best of {args.repeat}")
+    base = timed("per-record (current)", per_record, vins, args.repeat)
+    python = timed("validate_vins (python)", vin_tools._validate_python, vins, args.repeat)
+    print(f"{'':<28} x{base / python:.1f}")
+    if vin_tools.np is not None:
+        vectorized = timed("validate_vins (numpy)", vin_tools._validate_numpy, vins, args.repeat)
+        print(f"{'':<28} x{base / vectorized:.1f}")
+    else:
+        print("numpy not installed; vectorized path skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Process-local timing and counter metrics for the vintrade hot paths.
+
+``span()`` times a block and counts the SQL queries it ran on a cursor;
+``inc()`` bumps a counter. ``render_prometheus()`` dumps everything in the
+Prometheus text exposition format (served by ``/vintrade/metrics``).
+
+Each Odoo worker process keeps its own numbers, as with any per-process
+Prometheus client: scrape every worker, or run with a single one.
+"""
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_spans = {}       # span -> {"count", "seconds", "queries", "buckets"}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Add ``value`` to the counter ``name`` with the given labels."""
+    if not value:
+        return
+    key = (name, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(span_name, seconds, queries=0):
+    with _lock:
+        stats = _spans.get(span_name)
+        if stats is None:
+            stats = _spans[span_name] = {"count": 0, "seconds": 0.0, "queries": 0, "buckets": [0] * len(BUCKETS)}
+        stats["count"] += 1
+        stats["seconds"] += seconds
+        stats["queries"] += queries
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats["buckets"][i] += 1
+
+
+@contextmanager
+def span(name, cr=None, slow_ms=0):
+    """Time the block as ``name``; with ``cr``, also count the queries it sent.
+
+    Blocks slower than ``slow_ms`` (when set) are logged with their query count.
+    """
+    queries_before = cr.sql_log_count if cr is not None else 0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        queries = (cr.sql_log_count - queries_before) if cr is not None else 0
+        observe(name, seconds, queries)
+        if slow_ms and seconds * 1000 >= slow_ms:
+            _logger.warning("slow %s: %.0f ms, %s queries", name, seconds * 1000, queries)
+
+
+def traced(name):
+    """Decorate a model method so each call is a ``span`` on the record's cursor.
+
+    The slow-operation threshold comes from the ``vintrade.slow_ms.<name>``
+    or ``vintrade.slow_ms`` system parameter (milliseconds, 0 = off).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with span(name, self.env.cr, slow_ms=slow_threshold(self.env, name)):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def slow_threshold(env, name):
+    ICP = env["ir.config_parameter"].sudo()
+    return float(ICP.get_param(f"vintrade.slow_ms.{name}") or ICP.get_param("vintrade.slow_ms") or 0)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+
+
+def render_prometheus():
+    with _lock:
+        counters = dict(_counters)
+        spans = {name: dict(stats, buckets=list(stats["buckets"])) for name, stats in _spans.items()}
+    lines = []
+    for metric in sorted({name for name, _labels in counters}):
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    if spans:
+        lines.append("# HELP vintrade_span_seconds Wall time of instrumented vintrade operations.")
+        lines.append("# TYPE vintrade_span_seconds histogram")
+        for name, stats in sorted(spans.items()):
+            label = _fmt_labels((("span", name),))[1:-1]
+            for bound, count in zip(BUCKETS, stats["buckets"]):
+                lines.append(f'vintrade_span_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'vintrade_span_seconds_bucket{{{label},le="+Inf"}} {stats["count"]}')
+            lines.append(f'vintrade_span_seconds_sum{{{label}}} {stats["seconds"]:.6f}')
+            lines.append(f'vintrade_span_seconds_count{{{label}}} {stats["count"]}')
+        lines.append("# HELP vintrade_span_queries_total SQL queries sent by instrumented vintrade operations.")
+        lines.append("# TYPE vintrade_span_queries_total counter")
+        for name, stats in sorted(spans.items()):
+            lines.append(f'vintrade_span_queries_total{_fmt_labels((("span", name),))} {stats["queries"]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""VIN check-digit validation, per VIN and in bulk.
+
+Kept free of Odoo imports so it can be benchmarked standalone
+(see ``bench_vin_validation.py``).
+"""
+from operator import mul
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+VIN_TRANS = {
+    **{str(i): i for i in range(10)},
+    **dict(
+        A=1, B=2, C=3, D=4, E=5, F=6, G=7, H=8,
+        J=1, K=2, L=3, M=4, N=5, P=7, R=9,
+        S=2, T=3, U=4, V=5, W=6, X=7, Y=8, Z=9,
+    ),
+}
+VIN_WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
+VIN_FORBIDDEN = set("IOQ")
+
+# Error codes returned by validate_vins(); None means the VIN is valid.
+ERR_LENGTH = "length"
+ERR_FORBIDDEN = "forbidden_char"
+ERR_CHARSET = "charset"
+ERR_CHECK_DIGIT = "check_digit"
+ERR_DUPLICATE = "duplicate"
+
+# Below this size the NumPy setup costs more than the Python loop.
+NUMPY_MIN_BATCH = 64
+
+# Byte-indexed lookup tables: transliteration value (-1 = not allowed) and I/O/Q mask.
+_VALUE_TABLE = [-1] * 256
+for _ch, _val in VIN_TRANS.items():
+    _VALUE_TABLE[ord(_ch)] = _val
+_FORBIDDEN_TABLE = [chr(b) in VIN_FORBIDDEN for b in range(256)]
+_CHECK_CHARS = "0123456789X"
+
+if np is not None:
+    _NP_VALUES = np.array(_VALUE_TABLE, dtype=np.int16)
+    _NP_FORBIDDEN = np.array(_FORBIDDEN_TABLE, dtype=bool)
+    _NP_WEIGHTS = np.array(VIN_WEIGHTS, dtype=np.int32)
+    _NP_CHECK_CHARS = np.frombuffer(_CHECK_CHARS.encode("ascii"), dtype=np.uint8)
+
+
+def _vin_check_digit(vin: str):
+    total = 0
+    for i, ch in enumerate(vin):
+        if ch in VIN_FORBIDDEN:
+            return None
+        val = VIN_TRANS.get(ch)
+        if val is None:
+            return None
+        total += int(val) * VIN_WEIGHTS[i]
+    remainder = total % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def _validate_python(vins):
+    codes = []
+    for vin in vins:
+        if len(vin) != 17 or not vin.isascii():
+            codes.append(ERR_LENGTH if len(vin) != 17 else ERR_CHARSET)
+            continue
+        raw = vin.encode("ascii")
+        if any(_FORBIDDEN_TABLE[b] for b in raw):
+            codes.append(ERR_FORBIDDEN)
+            continue
+        values = [_VALUE_TABLE[b] for b in raw]
+        if -1 in values:
+            codes.append(ERR_CHARSET)
+            continue
+        check = _CHECK_CHARS[sum(map(mul, values, VIN_WEIGHTS)) % 11]
+        codes.append(None if check == vin[8] else ERR_CHECK_DIGIT)
+    return codes
+
+
+def _validate_numpy(vins):
+    codes = [ERR_LENGTH] * len(vins)
+    idx = [i for i, vin in enumerate(vins) if len(vin) == 17]
+    ascii_idx = [i for i in idx if vins[i].isascii()]
+    for i in set(idx).difference(ascii_idx):
+        codes[i] = ERR_CHARSET
+    if not ascii_idx:
+        return codes
+    chars = np.frombuffer("".join(vins[i] for i in ascii_idx).encode("ascii"), dtype=np.uint8).reshape(-1, 17)
+    values = _NP_VALUES[chars]
+    forbidden = _NP_FORBIDDEN[chars].any(axis=1)
+    bad_charset = (values < 0).any(axis=1)
+    check = _NP_CHECK_CHARS[(values.astype(np.int32) @ _NP_WEIGHTS) % 11]
+    bad_check = check != chars[:, 8]
+    result = np.where(forbidden, 1, np.where(bad_charset, 2, np.where(bad_check, 3, 0)))
+    labels = (None, ERR_FORBIDDEN, ERR_CHARSET, ERR_CHECK_DIGIT)
+    for i, code in zip(ascii_idx, result.tolist()):
+        codes[i] = labels[code]
+    return codes
+
+
+def validate_vins(vins, check_duplicates=True):
+    """Validate many VINs at once.
+
+    Each VIN is stripped and upper-cased, then checked for length,
+    forbidden letters (I/O/Q), charset and check digit. With
+    ``check_duplicates`` every repeat of an otherwise valid VIN after its
+    first occurrence is flagged. Returns one error code (``ERR_*``) or
+    ``None`` per input, in order.
+    """
+    normalized = [(vin or "").strip().upper() for vin in vins]
+    if np is not None and len(normalized) >= NUMPY_MIN_BATCH:
+        codes = _validate_numpy(normalized)
+    else:
+        codes = _validate_python(normalized)
+    if check_duplicates:
+        seen = set()
+        for i, vin in enumerate(normalized):
+            if codes[i] is None:
+                if vin in seen:
+                    codes[i] = ERR_DUPLICATE
+                seen.add(vin)
+    return codes
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Pooled HTTP access to the NHTSA vPIC API, shared by all threads of a worker."""
+import json
+import threading
+import time
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except Exception:
+    requests = None
+
+# vPIC REST root; override with the ``vintrade_vehicle.vpic_url`` system parameter
+# (e.g. to point at a local stub server).
+VPIC_URL = "https://vpic.nhtsa.dot.gov/api/vehicles"
+# DecodeVINValuesBatch accepts at most 50 VINs per request.
+VPIC_BATCH_SIZE = 50
+
+_lock = threading.Lock()
+_session = None
+_next_call = 0.0
+
+
+def _get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _throttle(max_rps):
+    """Space calls at least ``1 / max_rps`` seconds apart across the process."""
+    global _next_call
+    if not max_rps or max_rps <= 0:
+        return
+    with _lock:
+        now = time.monotonic()
+        wait = _next_call - now
+        _next_call = max(now, _next_call) + 1.0 / max_rps
+    if wait > 0:
+        time.sleep(wait)
+
+
+def vpic_request(url, data=None, timeout=10, max_rps=0):
+    """GET ``url`` (or POST form ``data`` to it) and return the decoded JSON body."""
+    _throttle(max_rps)
+    if requests:
+        session = _get_session()
+        if data is None:
+            resp = session.get(url, timeout=timeout)
+        else:
+            resp = session.post(url, data=data, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    import ssl
+    from urllib.parse import urlencode
+    from urllib.request import urlopen
+    body = urlencode(data).encode("utf-8") if data is not None else None
+    ctx = ssl.create_default_context()
+    with urlopen(url, data=body, timeout=timeout + 5, context=ctx) as f:
+        return json.loads(f.read().decode("utf-8"))
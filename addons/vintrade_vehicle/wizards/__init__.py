@@ -0,0 +1,2 @@
+from . import manifest_import
+from . import state_transition
\ No newline at end of file
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import io
+import logging
+import time
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+from ..tools.vin import ERR_DUPLICATE, validate_vins
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+_logger = logging.getLogger(__name__)
+
+# Manifest header (lower-cased, stripped) -> vin.vehicle field
+COLUMN_ALIASES = {
+    "vin": "vin",
+    "lot": "lot_number", "lot #": "lot_number", "lot#": "lot_number", "lot no": "lot_number",
+    "lot number": "lot_number", "lot_number": "lot_number",
+    "price": "purchase_price", "purchase price": "purchase_price", "purchase_price": "purchase_price",
+    "sale price": "purchase_price", "hammer price": "purchase_price",
+    "fees": "auction_fees", "fee": "auction_fees", "auction fees": "auction_fees", "auction_fees": "auction_fees",
+    "buyer fee": "auction_fees",
+    "seller": "seller", "seller name": "seller",
+}
+MONETARY_COLUMNS = ("purchase_price", "auction_fees")
+MAX_LOGGED_ERRORS = 200
+
+
+class ManifestImportWizard(models.TransientModel):
+    _name = "vin.manifest.import.wizard"
+    _description = "Auction Manifest Import"
+
+    file = fields.Binary("Manifest", required=True, help="CSV or XLSX with lot #, VIN, price, fees and seller columns.")
+    filename = fields.Char("File Name")
+    company_id = fields.Many2one("res.company", required=True, default=lambda self: self.env.company)
+    currency_id = fields.Many2one("res.currency", required=True, default=lambda self: self.env.company.currency_id)
+    seller_partner_id = fields.Many2one("res.partner", string="Seller / Counterparty",
+                                        help="Set on every imported vehicle; required for vendor bills.")
+    purchase_date = fields.Date("Purchase Date", default=fields.Date.context_today)
+    create_vendor_bills = fields.Boolean("Create Vendor Bills")
+    chunk_size = fields.Integer("Chunk Size", default=1000, required=True)
+
+    state = fields.Selection([("draft", "Draft"), ("done", "Done")], default="draft")
+    rows_read = fields.Integer("Rows Read", readonly=True)
+    rows_created = fields.Integer("Vehicles Created", readonly=True)
+    rows_skipped = fields.Integer("Rows Skipped", readonly=True)
+    duration = fields.Float("Duration (s)", readonly=True)
+    rows_per_sec = fields.Float("Rows / s", readonly=True)
+    log = fields.Text("Log", readonly=True)
+
+    # --- Reading ---
+    def _open_file(self):
+        """Open the uploaded file as a binary stream, straight from the filestore when possible."""
+        attachment = self.env["ir.attachment"].sudo().search([
+            ("res_model", "=", self._name), ("res_id", "=", self.id), ("res_field", "=", "file"),
+        ], limit=1)
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), "rb")
+        return io.BytesIO(attachment.raw if attachment else base64.b64decode(self.file))
+
+    def _iter_rows(self, stream):
+        """Yield one ``{field: value}`` dict per manifest row."""
+        if (self.filename or "").lower().endswith((".xlsx", ".xlsm")):
+            if openpyxl is None:
+                raise UserError(_("Reading XLSX manifests requires the openpyxl Python package."))
+            workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+            rows = workbook.active.iter_rows(values_only=True)
+        else:
+            rows = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        header = next(rows, None)
+        if not header:
+            raise UserError(_("The manifest is empty."))
+        columns = [COLUMN_ALIASES.get(str(h or "").strip().lower()) for h in header]
+        if "vin" not in columns:
+            raise UserError(_("The manifest has no VIN column."))
+        for row in rows:
+            if not any(row):
+                continue
+            yield {col: value for col, value in zip(columns, row) if col}
+
+    def _parse_amount(self, value):
+        if value in (None, ""):
+            return 0.0
+        if isinstance(value, (int, float)):
+            return float(value)
+        return float(str(value).replace(",", "").replace("$", "").strip() or 0.0)
+
+    # --- Import ---
+    def _log_error(self, errors, message):
+        if len(errors) < MAX_LOGGED_ERRORS:
+            errors.append(message)
+
+    def _prepare_vals_list(self, rows, errors):
+        """Turn a chunk of rows into vehicle vals, dropping invalid VINs and VINs already in the database."""
+        vins = [str(row.get("vin") or "").strip().upper() for row in rows]
+        codes = validate_vins(vins)
+        self.env.cr.execute("SELECT vin FROM vin_vehicle WHERE vin = ANY(%s)", ([v for v in vins if v],))
+        existing = {vin for vin, in self.env.cr.fetchall()}
+
+        vals_list = []
+        for row, vin, code in zip(rows, vins, codes):
+            if vin in existing:
+                code = ERR_DUPLICATE
+            if code:
+                self._log_error(errors, _("VIN %(vin)s (lot %(lot)s): %(code)s",
+                                          vin=vin or "-", lot=row.get("lot_number") or "-", code=code))
+                continue
+            vals = {
+                "vin": vin,
+                "lot_number": str(row.get("lot_number") or "").strip() or False,
+                "seller": str(row.get("seller") or "").strip() or False,
+                "company_id": self.company_id.id,
+                "currency_id": self.currency_id.id,
+                "purchase_date": self.purchase_date,
+                "seller_partner_id": self.seller_partner_id.id,
+                "create_vendor_bill_on_save": self.create_vendor_bills,
+            }
+            try:
+                for col in MONETARY_COLUMNS:
+                    vals[col] = self._parse_amount(row.get(col))
+            except ValueError:
+                self._log_error(errors, _("VIN %(vin)s (lot %(lot)s): bad amount",
+                                          vin=vin, lot=row.get("lot_number") or "-"))
+                continue
+            vals_list.append(vals)
+        return vals_list
+
+    def action_import(self):
+        self.ensure_one()
+        if self.chunk_size <= 0:
+            raise UserError(_("Chunk size must be positive."))
+        wizard_id, chunk_size = self.id, self.chunk_size
+        Vehicle = self.env["vin.vehicle"].with_context(
+            tracking_disable=True, mail_create_nolog=True, mail_create_nosubscribe=True,
+        )
+        read = created = 0
+        errors = []
+        start = time.perf_counter()
+        with self._open_file() as stream:
+            for rows in split_every(chunk_size, self._iter_rows(stream), list):
+                read += len(rows)
+                vals_list = self.browse(wizard_id)._prepare_vals_list(rows, errors)
+                created += len(Vehicle.create(vals_list))
+                # keep memory flat: push the chunk to the database and drop it from the ORM cache
+                self.env.flush_all()
+                self.env.invalidate_all()
+                _logger.info("Manifest import: %s rows read, %s vehicles created", read, created)
+        duration = time.perf_counter() - start
+
+        wizard = self.browse(wizard_id)
+        log = "\n".join(errors)
+        if read - created > len(errors):
+            log += "\n" + _("... and %s more", read - created - len(errors))
+        wizard.write({
+            "state": "done",
+            "rows_read": read,
+            "rows_created": created,
+            "rows_skipped": read - created,
+            "duration": duration,
+            "rows_per_sec": read / duration if duration else 0.0,
+            "log": log,
+        })
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": wizard.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    def action_open_vehicles(self):
+        self.ensure_one()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Imported Vehicles"),
+            "res_model": "vin.vehicle",
+            "view_mode": "tree,form",
+            "domain": [("create_date", ">=", self.create_date), ("create_uid", "=", self.env.uid)],
+        }
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+
+
+class VehicleStateWizard(models.TransientModel):
+    _name = "vin.vehicle.state.wizard"
+    _description = "Change Vehicle Status"
+
+    vehicle_ids = fields.Many2many("vin.vehicle", string="Vehicles", required=True)
+    vehicle_count = fields.Integer(compute="_compute_vehicle_count")
+    new_state = fields.Selection(
+        [
+            ("purchased", "Purchased"), ("enroute", "En Route"), ("warehouse", "At Warehouse"),
+            ("shipped", "Shipped"), ("delivered", "Delivered"), ("cancelled", "Cancelled"),
+        ],
+        string="New Status", required=True,
+    )
+    quiet = fields.Boolean("Skip chatter log", help="Change the status without logging anything on the vehicles.")
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if self.env.context.get("active_model") == "vin.vehicle" and "vehicle_ids" in fields_list:
+            res["vehicle_ids"] = [(6, 0, self.env.context.get("active_ids", []))]
+        return res
+
+    @api.depends("vehicle_ids")
+    def _compute_vehicle_count(self):
+        for wizard in self:
+            wizard.vehicle_count = len(wizard.vehicle_ids)
+
+    def action_apply(self):
+        self.ensure_one()
+        self.vehicle_ids._transition(self.new_state, quiet=self.quiet)
+        return {"type": "ir.actions.act_window_close"}